@@ -0,0 +1,168 @@
+'''Plays concurrent matches between headless clients against a DOG server and reports throughput and latencies.
+
+    python -m benchmarks.load_test --matches 10 --duration 30
+'''
+import argparse
+import json
+import random
+import time
+from threading import Thread
+from urllib.request import urlopen
+
+from dog.async_dog_actor import AsyncDogActor
+from dog.async_dog_proxy import AsyncDogProxy
+from dog.dog_actor import DogActor
+from dog.dog_interface import DogPlayerInterface
+from dog.dog_proxy import DogProxy
+from dog.local_dog_server import LocalDogServer
+from dog.start_status import StartStatus
+from engine import Game, GameState, Player
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.games: int = 0
+        self.moves: int = 0
+        self.withdrawals: int = 0
+        self.move_rtts: list[float] = []
+
+class HeadlessClient(DogPlayerInterface):
+    '''Plays random moves as soon as it is its turn. Starters ask for a new match whenever they are idle.'''
+    RETRY_DELAY = 0.2
+
+    def __init__(self, name: str, actor, starter: bool, board_size: int, stats: LoadStats) -> None:
+        self._name: str = name
+        self._actor = actor
+        self._starter: bool = starter
+        self._stats: LoadStats = stats
+        self._game: Game = Game(board_size)
+        self._waiting_start: bool = False
+        self._next_request: float = 0
+        self._move_sent_at: float | None = None
+
+    def initialize(self) -> str:
+        return self._actor.initialize(self._name, self)
+
+    def tick(self, now: float) -> None:
+        self._actor.process_events()
+        if not self._starter or self._waiting_start or now < self._next_request: return
+        if self._game.game_state == GameState.WAITING:
+            self._waiting_start = True
+            self._actor.start_match(2, self.match_started)
+
+    def match_started(self, start_status: StartStatus) -> None:
+        self._waiting_start = False
+        if str(start_status.get_code()) in '01':
+            self._next_request = time.perf_counter() + self.RETRY_DELAY
+        else:
+            self.start_game(start_status, False)
+
+    def receive_start(self, start_status: StartStatus) -> None:
+        if str(start_status.get_code()) not in '01': self.start_game(start_status, True)
+
+    def start_game(self, start_status: StartStatus, received: bool) -> None:
+        # Same setup as HexInterface.start_game
+        self._game.restart()
+        p1, p2 = start_status.get_players()
+        if received: p1, p2 = p2, p1
+        self._game.player1 = Player(p1[0])
+        self._game.player2 = Player(p2[0])
+        self._game.local_player = self._game.player2 if received else self._game.player1
+        self._game.game_state = GameState.RUNNING
+        self._game.current_player_turn = self._game.player1 if str(p1[2]) == "1" else self._game.player2
+        self._move_sent_at = None
+        self.play()
+
+    def play(self) -> None:
+        if self._game.game_state != GameState.RUNNING or self._game.current_player_turn != self._game.local_player: return
+        move = self._game.make_move(*random.choice(self._game.legal_moves()))
+        self._stats.moves += 1
+        self._move_sent_at = time.perf_counter()
+        self._actor.send_move(move)
+        if self._game.game_state == GameState.ENDED:
+            self._stats.games += 1
+            self.finish()
+
+    def receive_move(self, a_move) -> None:
+        if self._move_sent_at is not None: self._stats.move_rtts.append(time.perf_counter() - self._move_sent_at)
+        self._game.receive_move(a_move)
+        if self._game.game_state == GameState.ENDED: self.finish()
+        else: self.play()
+
+    def receive_withdrawal_notification(self) -> None:
+        self._stats.withdrawals += 1
+        self.finish()
+
+    def finish(self) -> None:
+        self._game.restart()
+        self._next_request = time.perf_counter() + self.RETRY_DELAY
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    if not values: return None
+    values = sorted(values)
+    return values[min(len(values)-1, int(fraction*len(values)))]
+
+def server_stats(url: str) -> dict | None:
+    try:
+        with urlopen(url + "stats/", timeout=5) as resp: return json.loads(resp.read())
+    except OSError:
+        return None
+
+def run(url: str, matches: int, clients: int, duration: float, board_size: int, use_async: bool) -> dict:
+    stats = LoadStats()
+    players = []
+    for k in range(max(clients, 2*matches)):
+        # Every pair has its own game id so the server always matches the same two clients
+        game_id = f"load-{k//2}" if k < 2*matches else f"load-idle-{k}"
+        if use_async: actor = AsyncDogActor(a_proxy=AsyncDogProxy(url=url, game_id=game_id))
+        else: actor = DogActor(DogProxy(url=url, game_id=game_id))
+        players.append(HeadlessClient(f"bot{k}", actor, k < 2*matches and k % 2 == 0, board_size, stats))
+    for player in players: player.initialize()
+
+    stats_before = server_stats(url)
+    start = time.perf_counter()
+    while (now := time.perf_counter()) - start < duration:
+        for player in players: player.tick(now)
+        time.sleep(0.002)
+    elapsed = time.perf_counter() - start
+    stats_after = server_stats(url)
+
+    report = {
+        "clients": len(players),
+        "matches": matches,
+        "board_size": board_size,
+        "async": use_async,
+        "duration": elapsed,
+        "games": stats.games,
+        "games_per_second": stats.games / elapsed,
+        "moves": stats.moves,
+        "moves_per_second": stats.moves / elapsed,
+        "withdrawals": stats.withdrawals,
+        "move_rtt_p50": percentile(stats.move_rtts, 0.5),
+        "move_rtt_p90": percentile(stats.move_rtts, 0.9),
+        "move_rtt_p99": percentile(stats.move_rtts, 0.99),
+    }
+    if stats_before and stats_after:
+        requests = {
+            endpoint: count - stats_before["requests"].get(endpoint, 0)
+            for endpoint, count in stats_after["requests"].items()
+        }
+        report["server_requests"] = requests
+        report["server_requests_per_second"] = sum(requests.values()) / elapsed
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DOG client load test")
+    parser.add_argument("--url", help="DOG server to test, by default a local server is started")
+    parser.add_argument("--matches", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=0, help="clients beyond two per match stay idle in the lobby")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--size", type=int, default=7)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use AsyncDogActor instead of DogActor")
+    arguments = parser.parse_args()
+
+    url = arguments.url
+    if url is None:
+        server = LocalDogServer(("127.0.0.1", 0))
+        Thread(target=server.serve_forever, daemon=True).start()
+        url = server.get_url()
+    print(json.dumps(run(url, arguments.matches, arguments.clients, arguments.duration, arguments.size, arguments.use_async), indent=4))
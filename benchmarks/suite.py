@@ -0,0 +1,220 @@
+'''Times the hot paths of the engine, the renderer and the DOG protocol, and compares them with a saved baseline.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+'''
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+from threading import Thread
+
+from dog.dog_interface import DogPlayerInterface
+from dog.dog_proxy import DogProxy
+from dog.local_dog_server import LocalDogServer
+from dog.move_codec import decode_match_response, decode_move, encode_move
+from engine import Game, GameState, Player
+
+SIZES = (7, 11, 19, 51)
+RENDER_SIZES = (7, 11, 19)
+
+def measure(function, calls: int, repeat: int, number: int = 1) -> dict:
+    '''Runs `function` number times per repeat. Times are per call, `function` making `calls` of what is measured.'''
+    times = [t / (number*calls) for t in timeit.Timer(function).repeat(repeat, number)]
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "repeat": repeat,
+        "calls": calls*number,
+    }
+
+def scripted_moves(size: int) -> list[tuple[int, int]]:
+    '''Same random game on every run, until one of the players wins.'''
+    cells = [(i, j) for i in range(size) for j in range(size)]
+    random.Random(size).shuffle(cells)
+    game = new_game(size)
+    for index, cell in enumerate(cells):
+        game.apply_move(*cell)
+        if game.game_state == GameState.ENDED: return cells[:index+1]
+    return cells
+
+def new_game(size: int) -> Game:
+    game = Game(size)
+    game.player1, game.player2 = Player("P1"), Player("P2")
+    game.current_player_turn = game.player1
+    game.game_state = GameState.RUNNING
+    return game
+
+def engine_benchmarks(sizes: tuple[int, ...], repeat: int) -> dict[str, dict]:
+    results = {}
+    for size in sizes:
+        moves = scripted_moves(size)
+
+        def play() -> None:
+            game = new_game(size)
+            for i, j in moves:
+                # make_move only accepts the local player's moves
+                game.local_player = game.current_player_turn
+                game.make_move(i, j)
+        results[f"game.make_move[{size}]"] = measure(play, len(moves), repeat)
+
+        middle = new_game(size)
+        for i, j in moves[:len(moves)//2]: middle.apply_move(i, j)
+        results[f"game.check_winner[{size}]"] = measure(middle.check_winner, 1, repeat, 1000)
+
+        cells = [(i, j) for i in range(size) for j in range(size)]
+
+        def neighbors() -> None:
+            for i, j in cells: middle.cell_neighbors(i, j)
+        results[f"game.cell_neighbors[{size}]"] = measure(neighbors, len(cells), repeat)
+    return results
+
+def render_benchmarks(sizes: tuple[int, ...], repeat: int, url: str) -> dict[str, dict]:
+    '''Needs a display, the window is withdrawn so it never shows.'''
+    import tkinter as tk
+    import main
+
+    # The name prompt would wait for a user
+    main.simpledialog.askstring = lambda *args, **kwargs: "benchmark"
+    os.environ["DOG_SERVER_URL"] = url
+    try:
+        interface = main.HexInterface()
+    except tk.TclError as error:
+        return {"render.skipped": {"reason": str(error)}}
+    interface.root.withdraw()
+    results = {}
+    try:
+        for size in sizes:
+            moves = scripted_moves(size)
+            interface._game = new_game(size)
+            game = interface.game
+            game.player1, game.player2 = main.Player("P1", 0.0), main.Player("P2", 0.5)
+            game.current_player_turn = game.player1
+
+            def full_redraw() -> None:
+                interface.create_board()
+                interface.draw_board()
+                interface.root.update_idletasks()
+            results[f"render.draw_board.full[{size}]"] = measure(full_redraw, 1, repeat)
+
+            def move_redraw() -> None:
+                # One stone more per redraw, as during a match
+                interface._game = new_game(size)
+                interface.game.player1, interface.game.player2 = game.player1, game.player2
+                interface.game.current_player_turn = game.player1
+                for i, j in moves:
+                    interface.game.apply_move(i, j)
+                    interface.draw_board()
+                interface.root.update_idletasks()
+            results[f"render.draw_board.move[{size}]"] = measure(move_redraw, len(moves), repeat)
+
+            def update() -> None:
+                interface.update_screen()
+                interface.root.update_idletasks()
+            results[f"render.update_screen[{size}]"] = measure(update, 1, repeat, 20)
+
+            cells = [(i, j) for i in range(size) for j in range(size)]
+
+            def convert() -> None:
+                for i, j in cells: interface.convert_ij(i, j)
+            results[f"render.convert_ij[{size}]"] = measure(convert, len(cells), repeat)
+    finally:
+        interface.root.destroy()
+    return results
+
+class NullActor(DogPlayerInterface):
+    def receive_start(self, start_status) -> None: pass
+    def receive_move(self, a_move) -> None: pass
+    def receive_withdrawal_notification(self) -> None: pass
+
+def protocol_benchmarks(repeat: int, url: str) -> dict[str, dict]:
+    results = {}
+    move = {"cell": 60, "match_status": "next"}
+    results["dog.encode_move"] = measure(lambda: encode_move(move), 1, repeat, 10000)
+    # The server sends the move back as a Python literal inside JSON, the slower path of the decoder
+    response = json.dumps({"1": str({**move, "player": "123", "order": "7"})})
+    results["dog.decode_match_response"] = measure(lambda: decode_move(decode_match_response(response)["1"]), 1, repeat, 2000)
+
+    sender, receiver = DogProxy(url=url, game_id="benchmark"), DogProxy(url=url, game_id="benchmark")
+    for proxy in (sender, receiver): proxy.initialize(f"benchmark{proxy.player_id}", NullActor())
+    sender.start_match(2)
+    # Every move is a different one, a repeated response would be skipped before being decoded
+    counter = iter(range(10**9))
+
+    def send_and_poll() -> None:
+        sender.send_move({"cell": next(counter) % 121, "match_status": "next"})
+        receiver.match_status()
+    results["dog.send_move+match_status"] = measure(send_and_poll, 1, repeat, 50)
+    results["dog.match_status.unchanged"] = measure(receiver.match_status, 1, repeat, 50)
+    return results
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    '''Benchmarks whose fastest run got slower than the baseline's by more than `threshold`. The fastest run is
+    the one least disturbed by the rest of the machine.'''
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or "min" not in result or "min" not in baseline[name]: continue
+        ratio = result["min"] / baseline[name]["min"]
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + threshold: regressions.append(name)
+        print(f"{name:45} {result['min']*1e6:12.2f}µs {ratio:7.2f}x{'  REGRESSION' if ratio > 1 + threshold else ''}",
+              file=sys.stderr)
+    return regressions
+
+def run(groups: set[str], sizes: tuple[int, ...], repeat: int) -> dict:
+    server = LocalDogServer(("127.0.0.1", 0))
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = server.get_url()
+    results = {}
+    try:
+        if "engine" in groups: results.update(engine_benchmarks(sizes, repeat))
+        if "render" in groups:
+            results.update(render_benchmarks(tuple(size for size in sizes if size in RENDER_SIZES), repeat, url))
+        if "protocol" in groups: results.update(protocol_benchmarks(repeat, url))
+    finally:
+        server.shutdown()
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "repeat": repeat,
+            "unit": "seconds per call",
+        },
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hex benchmarks")
+    parser.add_argument("--groups", default="engine,render,protocol", help="comma separated: engine, render, protocol")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="board sizes of the engine and render groups")
+    parser.add_argument("--repeat", type=int, default=7, help="measurements of each benchmark, the fastest is compared")
+    parser.add_argument("--output", help="write the results to this file instead of the standard output")
+    parser.add_argument("--baseline", help="results to compare with, exits with 1 if any benchmark regressed")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown tolerated before flagging a regression")
+    parser.add_argument("--save-baseline", help="also write the results to this file, as the next baseline")
+    arguments = parser.parse_args()
+
+    report = run(set(arguments.groups.split(",")), tuple(int(size) for size in arguments.sizes.split(",")), arguments.repeat)
+    regressions = []
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file: baseline = json.load(baseline_file)["results"]
+        regressions = compare(report["results"], baseline, arguments.threshold)
+        report["regressions"] = regressions
+    text = json.dumps(report, indent=4)
+    if arguments.output:
+        with open(arguments.output, "w") as output: output.write(text)
+    else:
+        print(text)
+    if arguments.save_baseline:
+        with open(arguments.save_baseline, "w") as baseline_file: baseline_file.write(text)
+    sys.exit(1 if regressions else 0)
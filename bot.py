@@ -0,0 +1,108 @@
+'''Computer player that connects to DOG like the graphical client and plays with MCTS or alpha-beta.
+
+    python bot.py --name Robo --time 2
+    python bot.py --name Robo --engine alphabeta
+'''
+import argparse
+import time
+
+from dog.dog_actor import DogActor
+from dog.dog_interface import DogPlayerInterface
+from dog.start_status import StartStatus
+from engine import Game, GameState, Player
+from engine.book import OpeningBook
+from engine.mcts import MCTS
+from themes import Theme
+
+class Bot(DogPlayerInterface):
+    '''Waits for matches started by other players, or starts them itself if `starter` is set.'''
+    RETRY_DELAY = 5
+
+    def __init__(self, name: str, engine, size: int = Theme.GAME_SIZE, starter: bool = False) -> None:
+        self._name: str = name
+        # MCTS or AlphaBeta, both play(game) and keep the last_result
+        self._engine = engine
+        self._starter: bool = starter
+        self._game: Game = Game(size)
+        self._dog_server_interface: DogActor = DogActor()
+        self._waiting_start: bool = False
+        self._next_request: float = 0
+
+    def run(self) -> None:
+        print(self._dog_server_interface.initialize(self._name, self))
+        while True:
+            self._dog_server_interface.process_events()
+            if self._starter and not self._waiting_start and self._game.game_state == GameState.WAITING \
+                    and time.monotonic() >= self._next_request:
+                self._waiting_start = True
+                self._dog_server_interface.start_match(2, self.match_started)
+            time.sleep(0.05)
+
+    def match_started(self, start_status: StartStatus) -> None:
+        self._waiting_start = False
+        if str(start_status.get_code()) in '01': self._next_request = time.monotonic() + self.RETRY_DELAY
+        else: self.start_game(start_status)
+
+    def receive_start(self, start_status: StartStatus) -> None:
+        if str(start_status.get_code()) not in '01': self.start_game(start_status, True)
+
+    def start_game(self, start_status: StartStatus, received=False) -> None:
+        # Same setup as HexInterface.start_game
+        self._game.restart()
+        p1, p2 = start_status.get_players()
+        if received: p1, p2 = p2, p1
+        self._game.player1 = Player(p1[0])
+        self._game.player2 = Player(p2[0])
+        self._game.local_player = self._game.player2 if received else self._game.player1
+        self._game.game_state = GameState.RUNNING
+        self._game.current_player_turn = self._game.player1 if str(p1[2]) == "1" else self._game.player2
+        print(f"Partida contra {(p2 if not received else p1)[0]}")
+        self.play()
+
+    def play(self) -> None:
+        if move := self._engine.play(self._game):
+            result = self._engine.last_result
+            if isinstance(self._engine, MCTS):
+                print(f"Jogada {result.move}: {result.playouts} simulações, {result.playouts_per_second:.0f}/s, valor {result.value:.2f}")
+            else:
+                print(f"Jogada {result.move}: profundidade {result.depth}, {result.nodes} nós, {result.nodes_per_second:.0f}/s, valor {result.value:.2f}")
+            self._dog_server_interface.send_move(move)
+            self.check_end()
+
+    def receive_move(self, a_move) -> None:
+        self._game.receive_move(a_move)
+        if not self.check_end(): self.play()
+
+    def receive_withdrawal_notification(self) -> None:
+        print("Adversário desistiu!")
+        self._game.restart()
+
+    def check_end(self) -> bool:
+        if self._game.game_state != GameState.ENDED: return False
+        print(f"{self._game.winner.name} venceu!")
+        self._game.restart()
+        self._next_request = time.monotonic() + self.RETRY_DELAY
+        return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hex bot for DOG")
+    parser.add_argument("--name", default="Robo")
+    parser.add_argument("--time", type=float, default=2.0, help="seconds per move")
+    parser.add_argument("--playouts", type=int, help="playouts per worker and move")
+    parser.add_argument("--workers", type=int, help="processes used by the search, every core by default")
+    parser.add_argument("--size", type=int, default=Theme.GAME_SIZE)
+    parser.add_argument("--start", action="store_true", help="start matches instead of waiting for them")
+    parser.add_argument("--engine", choices=("mcts", "alphabeta"), default="mcts")
+    parser.add_argument("--depth", type=int, help="maximum depth of the alpha-beta search")
+    parser.add_argument("--no-book", action="store_true", help="search every move, even in the opening book")
+    arguments = parser.parse_args()
+
+    book = None if arguments.no_book else OpeningBook(arguments.size)
+    if arguments.engine == "alphabeta":
+        # Imported here so the MCTS bot does not need numpy
+        from engine.alphabeta import AlphaBeta
+        engine = AlphaBeta(arguments.time, arguments.depth, book=book)
+    else:
+        engine = MCTS(arguments.time, arguments.playouts, arguments.workers, book=book)
+    try: Bot(arguments.name, engine, arguments.size, arguments.start).run()
+    finally: engine.close()
@@ -0,0 +1,113 @@
+import asyncio
+from queue import Empty, Queue
+from dog.async_dog_proxy import AsyncDogProxy
+from dog.dog_event_loop import DogEventLoop
+from dog.polling_scheduler import PollingScheduler
+
+
+class AsyncDogActor:
+    #   Drop-in alternative to DogActor: polling is a task on a shared event loop instead of a thread per match
+    #   Callbacks to the player actor go through a_dispatcher, e.g. lambda callback: root.after(0, callback) for Tk
+    #   Without a dispatcher they are queued like in DogActor and run by process_events
+    def __init__(self, a_dispatcher=None, an_event_loop=None, a_proxy=None, a_scheduler=None):
+        super().__init__()
+        self.event_loop = an_event_loop if an_event_loop is not None else DogEventLoop.get_default()
+        self.proxy = a_proxy if a_proxy is not None else AsyncDogProxy()
+        self.scheduler = a_scheduler if a_scheduler is not None else PollingScheduler()
+        self.inbound = Queue()
+        self.dispatcher = a_dispatcher if a_dispatcher is not None else self.inbound.put
+        self.player_actor = None
+        self.polling_task = None
+        self.wake_event = None
+
+    def initialize(self, player_name, a_player_actor, callback=None):
+        self.player_actor = a_player_actor
+        return self.submit(self.async_initialize(player_name), callback)
+
+    def start_match(self, number_of_players, callback=None):
+        return self.submit(self.async_start_match(number_of_players), callback)
+
+    def send_move(self, move):
+        if self.proxy.metrics is not None:
+            self.proxy.metrics.mark("send_queued")
+        self.event_loop.submit(self.async_send_move(move))
+
+    def process_events(self):
+        while True:
+            try:
+                event = self.inbound.get_nowait()
+            except Empty:
+                return
+            try:
+                event()
+            except Exception as error:  #   one bad message must not drop the events queued after it
+                self.player_actor.receive_error(error)
+
+    def submit(self, coroutine, callback):
+        #   Without a callback, blocks until the result is ready, like DogActor
+        future = self.event_loop.submit(coroutine)
+        if callback is None:
+            return future.result()
+
+        def done_callback(done):
+            if done.exception() is not None:
+                self.report_error(done.exception())
+            else:
+                self.dispatcher(lambda: callback(done.result()))
+        future.add_done_callback(done_callback)
+
+    async def async_initialize(self, player_name):
+        message = await self.proxy.async_initialize(player_name, self)
+        self.wake_event = asyncio.Event()
+        self.polling_task = asyncio.create_task(self.poll())
+        return message
+
+    async def async_start_match(self, number_of_players):
+        start_status = await self.proxy.async_start_match(number_of_players)
+        self.wake()
+        return start_status
+
+    async def async_send_move(self, move):
+        try:
+            await self.proxy.async_send_move(move)
+        except Exception as error:  #   nobody waits for the result of a move
+            self.report_error(error)
+        self.wake()  #   the opponent's reply is expected soon
+
+    def wake(self):
+        self.scheduler.wake()
+        if self.wake_event is not None:
+            self.wake_event.set()
+
+    async def poll(self):
+        while True:
+            status = self.proxy.get_status()
+            try:
+                if status == 2:  #   connected without match
+                    await self.proxy.async_start_status()
+                elif status == 3:  #   waiting remote move
+                    await self.proxy.async_match_status()
+            except Exception as error:  #   polls again after the interval, like PollingThread
+                self.report_error(error)
+            try:
+                await asyncio.wait_for(self.wake_event.wait(), self.scheduler.next_interval(self.proxy.get_status()))
+            except asyncio.TimeoutError:
+                pass
+            self.wake_event.clear()
+
+    def close(self):
+        if self.polling_task is not None:
+            self.event_loop.call_soon(self.polling_task.cancel)
+        self.event_loop.call_soon(self.proxy.async_session.close)
+
+    def receive_start(self, start_status):
+        self.dispatcher(lambda: self.player_actor.receive_start(start_status))
+
+    def receive_move(self, a_move):
+        self.dispatcher(lambda: self.player_actor.receive_move(a_move))
+
+    def receive_withdrawal_notification(self):
+        self.dispatcher(lambda: self.player_actor.receive_withdrawal_notification())
+
+    def report_error(self, error):
+        self.dispatcher(lambda: self.player_actor.receive_error(error))
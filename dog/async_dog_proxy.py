@@ -0,0 +1,76 @@
+import asyncio
+import time
+from dog.async_http import AsyncHttpSession, ConnectError
+from dog.dog_proxy import DogProxy
+from dog.move_codec import encode_move
+
+
+class AsyncDogProxy(DogProxy):
+    #   Same protocol and state as DogProxy, with the requests made as coroutines
+    def __init__(self, a_session=None, connect_timeout=3.05, read_timeout=10, max_retries=3, backoff=0.5, pool_size=4, url=None, game_id=None, metrics=None):
+        super().__init__(connect_timeout, read_timeout, max_retries, backoff, pool_size, url, game_id, metrics)
+        self.async_session = a_session if a_session is not None else AsyncHttpSession(connect_timeout, read_timeout, pool_size)
+
+    async def async_post(self, endpoint, post_data, idempotent=True):
+        #   Same retry policy as DogProxy.post
+        url = self.url + endpoint
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                await asyncio.sleep(self.retry_delay(attempt))
+            start = time.perf_counter()
+            try:
+                resp = await self.async_session.post(url, post_data)
+            except ConnectError:
+                continue
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                if idempotent:
+                    continue
+                return None  #   the server may already have handled it
+            except ValueError as error:  #   a response that is not HTTP
+                self.report_error(error)
+                return None
+            self.record_latency(endpoint, time.perf_counter() - start)
+            if self.metrics is not None:
+                self.record_transfer(post_data, resp)
+            if resp.status_code < 500 or attempt == self.max_retries:
+                return resp
+        return None
+
+    async def async_initialize(self, a_name, an_actor):
+        message = self.load_config(a_name, an_actor)
+        if message:
+            return message
+        post_data = {"player_name": self.player_name, "player_id": self.player_id, "game_id": self.game_id}
+        resp = await self.async_post("player/", post_data)
+        return self.handle_register_player(resp)
+
+    async def async_start_match(self, number_of_players):
+        post_data = {"player_id": self.player_id, "game_id": self.game_id, "number_of_players": number_of_players}
+        resp = await self.async_post("start/", post_data, idempotent=False)
+        return self.handle_start_match(resp)
+
+    async def async_start_status(self):
+        with self.lock:
+            unsent_move = self.unsent_move
+        if unsent_move is not None:  #   the last move of the match failed, see if the server holds it
+            await self.async_match_status()
+        post_data = {"player_id": self.player_id, "game_id": self.game_id}
+        resp = await self.async_post("started/", post_data)
+        self.handle_start_status(resp)
+
+    async def async_send_move(self, a_move):
+        json_move = encode_move(self.trace_move(a_move))  # convert move to json
+        post_data = {"player_id": self.player_id, "game_id": self.game_id, "move": json_move}
+        resp = await self.async_post("move/", post_data, idempotent=False)
+        if self.metrics is not None:
+            self.metrics.mark("move_sent")
+        return self.handle_send_move(a_move, resp)
+
+    async def async_match_status(self):
+        post_data = {"player_id": self.player_id, "game_id": self.game_id}
+        resp = await self.async_post("match/", post_data)
+        self.handle_match_status(resp)
+        with self.lock:
+            unsent_move = self.unsent_move
+        if unsent_move is not None and resp is not None and resp.status_code == 200:
+            await self.async_send_move(unsent_move)
@@ -0,0 +1,111 @@
+import asyncio
+import ssl
+from urllib.parse import urlencode, urlsplit
+
+
+class ConnectError(OSError):
+    #   The connection could not be opened, so the request was never sent
+    pass
+
+
+class AsyncHttpResponse:
+    def __init__(self, status_code, text):
+        super().__init__()
+        self.status_code = status_code
+        self.text = text
+
+
+class AsyncHttpSession:
+    #   Minimal HTTP/1.1 client on asyncio streams, enough for the form POSTs of the DOG protocol
+    #   Connections are kept alive and reused, at most pool_size idle connections per host
+    def __init__(self, connect_timeout=3.05, read_timeout=10, pool_size=4):
+        super().__init__()
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.idle_connections = {}
+        self.ssl_context = None
+
+    async def post(self, url, post_data):
+        parts = urlsplit(url)
+        https = parts.scheme == "https"
+        host = parts.hostname
+        port = parts.port or (443 if https else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        body = urlencode(post_data).encode()
+        request = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Content-Type: application/x-www-form-urlencoded\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode() + body
+
+        key = (host, port, https)
+        idle = self.idle_connections.setdefault(key, [])
+        while idle:
+            #   a pooled connection may have been closed by the server in the meantime
+            reader, writer = idle.pop()
+            try:
+                return await self.send(key, reader, writer, request)
+            except (OSError, asyncio.IncompleteReadError):
+                writer.close()
+        try:
+            reader, writer = await asyncio.wait_for(self.connect(host, port, https), self.connect_timeout)
+        except (OSError, asyncio.TimeoutError) as error:
+            raise ConnectError(f"could not connect to {host}:{port}: {error}") from error
+        try:
+            return await self.send(key, reader, writer, request)
+        except BaseException:
+            writer.close()
+            raise
+
+    async def connect(self, host, port, https):
+        if https and self.ssl_context is None:
+            self.ssl_context = ssl.create_default_context()
+        return await asyncio.open_connection(host, port, ssl=self.ssl_context if https else None)
+
+    async def send(self, key, reader, writer, request):
+        writer.write(request)
+        await writer.drain()
+        status_code, headers, body = await asyncio.wait_for(self.read_response(reader), self.read_timeout)
+        if headers.get("connection", "").lower() == "close" or len(self.idle_connections[key]) >= self.pool_size:
+            writer.close()
+        else:
+            self.idle_connections[key].append((reader, writer))
+        charset = "utf-8"
+        content_type = headers.get("content-type", "")
+        if "charset=" in content_type:
+            charset = content_type.split("charset=")[-1].split(";")[0].strip()
+        return AsyncHttpResponse(status_code, body.decode(charset, errors="replace"))
+
+    async def read_response(self, reader):
+        status_line = await reader.readuntil(b"\r\n")
+        status_code = int(status_line.split()[1])
+        headers = {}
+        while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while (size := int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)) > 0:
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            while await reader.readuntil(b"\r\n") != b"\r\n":  #   trailers
+                pass
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+        return status_code, headers, body
+
+    def close(self):
+        for connections in self.idle_connections.values():
+            for reader, writer in connections:
+                writer.close()
+        self.idle_connections = {}
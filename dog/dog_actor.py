@@ -1,31 +1,87 @@
+from queue import Empty, Queue
 from dog.dog_proxy import DogProxy
 from dog.polling_thread import PollingThread
+from dog.sender_thread import SenderThread
 
 
 class DogActor:
-    def __init__(self):
+    def __init__(self, a_proxy=None, a_scheduler=None):
         super().__init__()
-        self.proxy = DogProxy()
+        self.proxy = a_proxy if a_proxy is not None else DogProxy()
         self.player_actor = None
-        self.polling_thread = PollingThread(self.proxy, True)
+        self.polling_thread = PollingThread(self.proxy, True, a_scheduler, self.report_error)
+        #   Requests to the server are made by the sender thread, in order
+        self.outbound = Queue()
+        self.sender_thread = SenderThread(self.outbound, True, self.report_error)
+        #   Events for the player actor, handled in its own thread by process_events
+        self.inbound = Queue()
 
-    def initialize(self, player_name, a_player_actor):
+    def initialize(self, player_name, a_player_actor, callback=None):
+        #   Without a callback, blocks until the server answers
+        #   With one, registers in the sender thread and calls it back with the message from process_events
         self.player_actor = a_player_actor
-        resp_dict = self.proxy.initialize(player_name, self)
+        if callback is None:
+            resp_dict = self.proxy.initialize(player_name, self)
+            self.polling_thread.start()
+            self.sender_thread.start()
+            return resp_dict
+
+        def request():
+            try:
+                message = self.proxy.initialize(player_name, self)
+            except Exception as error:  #   the callback is called anyway, the player actor must not wait forever
+                self.report_error(error)
+                message = "Você está sem conexão"
+            self.polling_thread.wake()
+            self.inbound.put(lambda: callback(message))
+        self.outbound.put(request)
+        #   The polling thread does nothing until the player is registered
         self.polling_thread.start()
-        return resp_dict
+        self.sender_thread.start()
+
+    def start_match(self, number_of_players, callback=None):
+        #   Without a callback, blocks until the server answers
+        if callback is None:
+            start_status = self.proxy.start_match(number_of_players)
+            self.polling_thread.wake()
+            return start_status
 
-    def start_match(self, number_of_players):
-        return self.proxy.start_match(number_of_players)
+        def request():
+            start_status = self.proxy.start_match(number_of_players)
+            self.polling_thread.wake()
+            self.inbound.put(lambda: callback(start_status))
+        self.outbound.put(request)
 
     def send_move(self, move):
-        self.proxy.send_move(move)
+        if self.proxy.metrics is not None:
+            self.proxy.metrics.mark("send_queued")
+
+        def request():
+            self.proxy.send_move(move)
+            self.polling_thread.wake()  #   the opponent's reply is expected soon
+        self.outbound.put(request)
+
+    def process_events(self):
+        #   Must be called periodically from the player actor's thread (e.g. with Tk's after)
+        while True:
+            try:
+                event = self.inbound.get_nowait()
+            except Empty:
+                return
+            try:
+                event()
+            except Exception as error:  #   one bad message must not drop the events queued after it
+                self.player_actor.receive_error(error)
 
     def receive_start(self, start_status):
-        self.player_actor.receive_start(start_status)
+        self.inbound.put(lambda: self.player_actor.receive_start(start_status))
 
     def receive_move(self, a_move):
-        self.player_actor.receive_move(a_move)
+        self.inbound.put(lambda: self.player_actor.receive_move(a_move))
 
     def receive_withdrawal_notification(self):
-        self.player_actor.receive_withdrawal_notification()
+        self.inbound.put(lambda: self.player_actor.receive_withdrawal_notification())
+
+    def report_error(self, error):
+        #   Called by the sender and polling threads, which keep running
+        self.inbound.put(lambda: self.player_actor.receive_error(error))
@@ -0,0 +1,32 @@
+import asyncio
+from threading import Lock, Thread
+
+
+class DogEventLoop:
+    #   An asyncio event loop running in a daemon thread, shared by every AsyncDogActor of the process
+    default_loop = None
+    default_lock = Lock()
+
+    def __init__(self):
+        super().__init__()
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def get_default(cls):
+        with cls.default_lock:
+            if cls.default_loop is None:
+                cls.default_loop = DogEventLoop()
+            return cls.default_loop
+
+    def submit(self, coroutine):
+        #   Returns a concurrent.futures.Future, safe to use from any thread
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
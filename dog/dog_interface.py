@@ -10,3 +10,6 @@ class DogPlayerInterface:
 
     def receive_withdrawal_notification(self):
         print("O método receive_withdrawal_notification() precisa ser sobrescrito")
+
+    def receive_error(self, error):
+        print("Erro na comunicação com o Dog Server:", error)
@@ -1,31 +1,187 @@
-from distutils.command.config import config
+from collections import deque
 import json
-from urllib.parse import urldefrag
-import requests
+import os
+import random
+import threading
+import time
+from urllib.parse import urlencode
+from dog.move_codec import MoveDecodeError, decode_match_response, decode_move, encode_move
+from dog.move_metrics import MoveMetrics
 from dog.start_status import StartStatus
 
 
+DEFAULT_URL = "https://api-dog-server.herokuapp.com/"
+
+
 class DogProxy:
-    def __init__(self):
+    def __init__(self, connect_timeout=3.05, read_timeout=10, max_retries=3, backoff=0.5, pool_size=4, url=None, game_id=None, metrics=None):
         super().__init__()
         self.dog_actor = None
         self.player_id = 0
         self.player_name = ""
-        self.game_id = 0
+        self.game_id = game_id if game_id is not None else 0
+        self.game_id_from_config = game_id is None
         self.status = 0
         # 0 - file game.id not found; 1 - not connected to server; 2 - connected without match; 3 - waiting move (even if it's the local player's turn)
         self.move_order = 0
-        self.url = "https://api-dog-server.herokuapp.com/"
+        self.last_match_response = None
+        #   Move whose request failed, sent again on the next poll
+        self.unsent_move = None
+        #   Held while status, move_order, unsent_move and last_match_response change: the sender and polling
+        #   threads both change them. Never held during a request
+        self.lock = threading.RLock()
+        self.url = url if url is not None else self.load_url()
+        # A single keep-alive session, so polling reuses the same TCP+TLS connection
+        self.session = None
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # Latency in seconds of the last requests to each endpoint
+        self.latencies = {}
+        #   None unless metrics are enabled, every measure is skipped then
+        self.metrics = metrics if metrics is not None else self.load_metrics()
 
     def get_status(self):
         return self.status
 
+    def load_url(self):
+        #   The DOG_SERVER_URL environment variable or config/server.url point the client to another server
+        url = os.environ.get("DOG_SERVER_URL")
+        if not url:
+            try:
+                with open("config/server.url", "r") as url_file:
+                    url = url_file.read().strip()
+            except FileNotFoundError:
+                url = DEFAULT_URL
+        return url if url.endswith("/") else url + "/"
+
+    shared_metrics = None
+    shared_metrics_lock = threading.Lock()
+
+    def load_metrics(self):
+        #   The DOG_METRICS_PORT environment variable enables the metrics, served on that port
+        #   A single MoveMetrics is shared by every proxy of the process, only one can listen on the port
+        port = os.environ.get("DOG_METRICS_PORT")
+        if not port:
+            return None
+        with DogProxy.shared_metrics_lock:
+            if DogProxy.shared_metrics is None:
+                metrics = MoveMetrics()
+                metrics.serve(int(port))
+                DogProxy.shared_metrics = metrics
+        return DogProxy.shared_metrics
+
+    def get_latencies(self):
+        return {endpoint: list(latencies) for endpoint, latencies in self.latencies.items()}
+
+    def get_session(self):
+        #   requests is imported on the first request, it is the slowest import of the client
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        return self.session
+
+    def retry_delay(self, attempt):
+        #   exponential backoff with jitter, so clients that failed together do not retry together
+        return self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+    def record_latency(self, endpoint, seconds):
+        self.latencies.setdefault(endpoint, deque(maxlen=100)).append(seconds)
+        if self.metrics is not None:
+            self.metrics.record("request." + endpoint.strip("/"), seconds)
+
+    def record_transfer(self, post_data, resp):
+        #   Bytes of the request and response bodies, without the HTTP headers
+        self.metrics.count("requests")
+        self.metrics.count("bytes_sent", len(urlencode(post_data)))
+        self.metrics.count("bytes_received", len(resp.text.encode()))
+
+    def trace_move(self, a_move):
+        #   The opponent measures the transit of the move from the wall clock time it was sent
+        if self.metrics is None:
+            return a_move
+        self.metrics.measure("send_queue", "send_queued")
+        return dict(a_move, sent_at=time.time())
+
+    def trace_pickup(self, a_move):
+        sent_at = a_move.get("sent_at")
+        if isinstance(sent_at, (int, float)):
+            self.metrics.record("transit", time.time() - sent_at)
+        self.metrics.measure("move_rtt", "move_sent")
+        self.metrics.mark("picked_up")
+
+    def post(self, endpoint, post_data, idempotent=True):
+        #   Returns None if the server could not be reached after all retries
+        #   Requests that change the server state are only retried if they were never sent
+        #   Any other failure of the request is reported to the actor as an error, and None returned
+        url = self.url + endpoint
+        session = self.get_session()
+        from requests import ConnectionError, ReadTimeout, RequestException
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                time.sleep(self.retry_delay(attempt))
+            start = time.perf_counter()
+            try:
+                resp = session.post(url, data=post_data, timeout=self.timeout)
+            except (ConnectionError, ReadTimeout) as error:
+                if idempotent or self.never_sent(error):
+                    continue
+                return None  #   the server may already have handled it
+            except RequestException as error:
+                self.report_error(error)
+                return None
+            self.record_latency(endpoint, time.perf_counter() - start)
+            if self.metrics is not None:
+                self.record_transfer(post_data, resp)
+            if resp.status_code < 500 or attempt == self.max_retries:
+                return resp
+        return None
+
+    def never_sent(self, error):
+        #   The connection could not be opened, so the request never reached the server
+        from requests import ConnectTimeout
+        from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+
+        if isinstance(error, ConnectTimeout):
+            return True
+        reason = error.args[0] if error.args else None
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        #   NewConnectionError, raised when the connection is refused or the host is not found, is a ConnectTimeoutError
+        return isinstance(reason, ConnectTimeoutError)
+
+    def report_error(self, error):
+        #   DogActor passes it on to the player actor in its own thread, a player actor used directly receives it
+        if hasattr(self.dog_actor, "report_error"):
+            self.dog_actor.report_error(error)
+        elif hasattr(self.dog_actor, "receive_error"):
+            self.dog_actor.receive_error(error)
+        else:
+            print("Erro na comunicação com o Dog Server:", error)
+
     def initialize(self, a_name, an_actor):
+        message = self.load_config(a_name, an_actor)
+        if message:
+            return message
+        resp = self.register_player(self.player_name, self.player_id, self.game_id)
+        return self.handle_register_player(resp)
+
+    def load_config(self, a_name, an_actor):
+        #   Returns an error message if the game can not connect
         self.player_id = self.generate_player_id()
         self.player_name = a_name
         self.dog_actor = an_actor
         if self.player_name == "":
             self.player_name = "player" + str(self.player_id)
+        if not self.game_id_from_config:
+            return None
         try:
             config_file = open("config/game.id", "r")
             self.game_id = config_file.read()
@@ -33,107 +189,164 @@ class DogProxy:
             self.status = 0
             return "Arquivo de configuração do jogo não encontrado"
         config_file.close()
-        resp = self.register_player(self.player_name, self.player_id, self.game_id)
-        result = resp.status_code
-        if result == 200:
-            resp_json = resp.text
-            resp_dict = json.loads(resp_json)
-            resp1 = resp_dict["0"]
-            resp2 = resp_dict["1"]
-            self.status = 2
-            message = "Conectado a Dog Server"
-        else:
-            self.status = 1
-            message = "Você está sem conexão"
-        return message
+        return None
+
+    def handle_register_player(self, resp):
+        with self.lock:
+            if resp is not None and resp.status_code == 200:
+                resp_json = resp.text
+                resp_dict = json.loads(resp_json)
+                resp1 = resp_dict["0"]
+                resp2 = resp_dict["1"]
+                self.status = 2
+                message = "Conectado a Dog Server"
+            else:
+                self.status = 1
+                message = "Você está sem conexão"
+            return message
+
+    last_player_id = 0
 
     def generate_player_id(self):
         from time import time
 
         milliseconds = int(time() * 1000)
-        an_id = str(milliseconds - 1639872000000)
+        #   Unique even for several players created in the same millisecond
+        milliseconds = max(milliseconds - 1639872000000, DogProxy.last_player_id + 1)
+        DogProxy.last_player_id = milliseconds
+        an_id = str(milliseconds)
         return an_id
 
     def register_player(self, a_player_name, a_player_id, a_game_id):
-        url = self.url + "player/"
         post_data = {"player_name": a_player_name, "player_id": a_player_id, "game_id": a_game_id}
-        resp = requests.post(url, data=post_data)
+        resp = self.post("player/", post_data)
         return resp
 
     def start_match(self, number_of_players):
-        url = self.url + "start/"
         post_data = {"player_id": self.player_id, "game_id": self.game_id, "number_of_players": number_of_players}
-        resp = requests.post(url, data=post_data)
-        result = resp.status_code
-        if result == 200:
-            resp_json = resp.text
-            resp_dict = json.loads(resp_json)
-            message = resp_dict["message"]
-            code = resp_dict["code"]
-            players = resp_dict["players"]
-            start_status = StartStatus(code, message, players, self.player_id)
-            if code == "2":
-                self.status = 3
-                self.move_order = 0
-        else:
-            start_status = StartStatus("0", "Voce está offline", [], self.player_id)
-        return start_status
+        resp = self.post("start/", post_data, idempotent=False)
+        return self.handle_start_match(resp)
+
+    def handle_start_match(self, resp):
+        with self.lock:
+            if resp is not None and resp.status_code == 200:
+                resp_json = resp.text
+                resp_dict = json.loads(resp_json)
+                message = resp_dict["message"]
+                code = resp_dict["code"]
+                players = resp_dict["players"]
+                start_status = StartStatus(code, message, players, self.player_id)
+                if code == "2":
+                    self.status = 3
+                    self.move_order = 0
+                    self.last_match_response = None
+                    self.unsent_move = None
+            else:
+                start_status = StartStatus("0", "Voce está offline", [], self.player_id)
+            return start_status
 
     def start_status(self):
-        url = self.url + "started/"
+        with self.lock:
+            unsent_move = self.unsent_move
+        if unsent_move is not None:  #   the last move of the match failed, see if the server holds it
+            self.match_status()
         post_data = {"player_id": self.player_id, "game_id": self.game_id}
-        resp = requests.post(url, data=post_data)
-        result = resp.status_code
-        if result == 200 and self.status == 2:
-            resp_json = resp.text
-            resp_dict = json.loads(resp_json)
-            message = resp_dict["message"]
-            code = resp_dict["code"]
-            players = resp_dict["players"]
-            if code == "2":
-                start_status = StartStatus(code, message, players, self.player_id)
-                self.status = 3
-                self.move_order = 0
-                self.dog_actor.receive_start(start_status)
+        resp = self.post("started/", post_data)
+        self.handle_start_status(resp)
+
+    def handle_start_status(self, resp):
+        with self.lock:
+            if resp is not None and resp.status_code == 200 and self.status == 2:
+                resp_json = resp.text
+                resp_dict = json.loads(resp_json)
+                message = resp_dict["message"]
+                code = resp_dict["code"]
+                players = resp_dict["players"]
+                if code == "2":
+                    start_status = StartStatus(code, message, players, self.player_id)
+                    self.status = 3
+                    self.move_order = 0
+                    self.last_match_response = None
+                    self.unsent_move = None
+                    self.dog_actor.receive_start(start_status)
 
     def send_move(self, a_move):
-        url = self.url + "move/"
-        json_move = json.dumps(a_move)  # convert move to json
+        json_move = encode_move(self.trace_move(a_move))  # convert move to json
         post_data = {"player_id": self.player_id, "game_id": self.game_id, "move": json_move}
-        resp = requests.post(url, data=post_data)
-        if a_move["match_status"] == "next":
-            self.status = 3  #   pass the turn and start looking for a move
-        elif a_move["match_status"] == "finished":
-            self.status = 2  #   connected without match
-        return resp.text
+        resp = self.post("move/", post_data, idempotent=False)
+        if self.metrics is not None:
+            self.metrics.mark("move_sent")
+        return self.handle_send_move(a_move, resp)
+
+    def handle_send_move(self, a_move, resp):
+        with self.lock:
+            if a_move["match_status"] == "next":
+                self.status = 3  #   pass the turn and start looking for a move
+            elif a_move["match_status"] == "finished":
+                self.status = 2  #   connected without match
+            #   Moves with their ply are sent again if the request failed and the next poll shows the server
+            #   does not hold them, see settle_unsent_move
+            failed = resp is None or resp.status_code != 200
+            self.unsent_move = a_move if failed and "ply" in a_move else None
+            return resp.text if resp is not None else ""
 
     def match_status(self):
-        url = self.url + "match/"
         post_data = {"player_id": self.player_id, "game_id": self.game_id}
-        resp = requests.post(url, data=post_data)
+        resp = self.post("match/", post_data)
+        self.handle_match_status(resp)
+        with self.lock:
+            unsent_move = self.unsent_move
+        if unsent_move is not None and resp is not None and resp.status_code == 200:
+            self.send_move(unsent_move)
+
+    def settle_unsent_move(self, move_dictionary):
+        #   The server keeps only the last move of the match: once it holds the unsent move or a later one, sending
+        #   it again would replace the opponent's answer
+        ply = move_dictionary.get("ply")
+        if isinstance(ply, int) and ply >= self.unsent_move["ply"]:
+            self.unsent_move = None
+
+    def handle_match_status(self, resp):
+        with self.lock:
+            if self.metrics is None:
+                self.read_match_status(resp)
+                return
+            move_order, status = self.move_order, self.status
+            self.read_match_status(resp)
+            self.metrics.count("polls")
+            if self.move_order == move_order and self.status == status:  #   nothing was delivered
+                self.metrics.count("empty_polls")
+
+    def read_match_status(self, resp):
+        if resp is None:
+            return
         resp_json = resp.text
+        if resp_json == self.last_match_response:  #   nothing new since the last poll
+            return
+        self.last_match_response = resp_json
         try:
-            seek_result = json.loads(resp_json)
-        except:
+            seek_result = decode_match_response(resp_json)
+            #   move is contained in seek_result as a string (to be converted in dictionary)
+            move_dictionary = decode_move(seek_result["1"]) if bool(seek_result) else {}
+        except (MoveDecodeError, KeyError):
             print("Erro na leitura do JSON")
-            with open("error.json", "w") as error_file:
-                error_file.write(resp_json)
-            seek_result = {}
-        if bool(seek_result):
-            move_dictionary = eval(
-                seek_result["1"]
-            )  #   move is contained in seek_result as a string (to be converted in dictionary)
-            if bool(move_dictionary):
-                match_status = move_dictionary["match_status"]
-                if match_status == "interrupted":  #  an opponent has abandoned the match
-                    self.dog_actor.receive_withdrawal_notification()
-                    self.status = 2
-                else:
-                    move_player_id = move_dictionary["player"]
-                    move_player_order = move_dictionary["order"]
-                    if move_player_id != str(self.player_id):  #  not from the player himself
-                        if int(move_player_order) > self.move_order:  #  not an already handled move
-                            self.move_order = int(move_player_order)
-                            self.dog_actor.receive_move(move_dictionary)
-                            if move_dictionary["match_status"] == "finished":
-                                self.status = 2
+            return
+        if bool(move_dictionary) and self.unsent_move is not None:
+            self.settle_unsent_move(move_dictionary)
+        if bool(move_dictionary):
+            match_status = move_dictionary["match_status"]
+            if match_status == "interrupted":  #  an opponent has abandoned the match
+                self.dog_actor.receive_withdrawal_notification()
+                self.status = 2
+                self.unsent_move = None
+            else:
+                move_player_id = str(move_dictionary.get("player"))
+                move_player_order = str(move_dictionary.get("order"))
+                if move_player_id != str(self.player_id) and move_player_order.isdigit():  #  not from the player himself
+                    if int(move_player_order) > self.move_order:  #  not an already handled move
+                        self.move_order = int(move_player_order)
+                        if self.metrics is not None:
+                            self.trace_pickup(move_dictionary)
+                        self.dog_actor.receive_move(move_dictionary)
+                        if move_dictionary["match_status"] == "finished":
+                            self.status = 2
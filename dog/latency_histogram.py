@@ -0,0 +1,45 @@
+import bisect
+
+
+class LatencyHistogram:
+    #   Counts latencies in fixed buckets, from 1ms to 10s, so recording costs the same whatever was recorded before
+    #   Quantiles are the upper bound of the bucket they fall in
+    BOUNDS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+    def __init__(self):
+        super().__init__()
+        self.counts = [0] * (len(self.BOUNDS) + 1)  #   the last bucket holds everything above 10s
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def quantile(self, fraction):
+        if self.count == 0:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.BOUNDS[bucket] if bucket < len(self.BOUNDS) else self.maximum
+        return self.maximum
+
+    def to_dict(self):
+        buckets = {str(bound): count for bound, count in zip(self.BOUNDS, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.maximum,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
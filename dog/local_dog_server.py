@@ -0,0 +1,175 @@
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from urllib.parse import parse_qs
+
+
+class LocalDogServer(ThreadingHTTPServer):
+    #   Stand-in for the DOG server, with the same endpoints and JSON answers, to play and measure offline
+    #   GET stats/ returns the number of requests served for each endpoint
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 8080)):
+        super().__init__(address, LocalDogRequestHandler)
+        self.lock = Lock()
+        self.players = {}  #   player_id -> {"name", "game_id", "match", "started"}
+        self.matches = {}  #   match id -> {"players", "last_move", "order", "running"}
+        self.next_match_id = 0
+        self.request_counts = {}
+        self.start_time = time.monotonic()
+
+    def get_url(self):
+        host, port = self.server_address[:2]
+        return "http://" + host + ":" + str(port) + "/"
+
+    def count_request(self, endpoint):
+        with self.lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "uptime": time.monotonic() - self.start_time,
+                "requests": dict(self.request_counts),
+                "players": len(self.players),
+                "running_matches": sum(1 for match in self.matches.values() if match["running"]),
+            }
+
+    def register_player(self, player_name, player_id, game_id):
+        with self.lock:
+            self.leave_match(player_id)
+            self.players[player_id] = {"name": player_name, "game_id": game_id, "match": None, "started": None}
+            return {"0": player_id, "1": "Jogador registrado"}
+
+    def leave_match(self, player_id):
+        #   The other players of a running match are told it was interrupted
+        player = self.players.get(player_id)
+        if player is None or player["match"] is None:
+            return
+        match = self.matches[player["match"]]
+        if match["running"]:
+            match["running"] = False
+            match["order"] += 1
+            match["last_move"] = {"match_status": "interrupted", "player": player_id, "order": str(match["order"])}
+        player["match"] = None
+        player["started"] = None
+
+    def start_match(self, player_id, game_id, number_of_players):
+        with self.lock:
+            if player_id not in self.players:
+                return {"code": "0", "message": "Jogador não registrado", "players": []}
+            self.leave_match(player_id)
+            available = [
+                other_id for other_id, other in self.players.items()
+                if other_id != player_id and other["game_id"] == game_id
+                and (other["match"] is None or not self.matches[other["match"]]["running"])
+            ]
+            if len(available) < number_of_players - 1:
+                return {"code": "1", "message": "Jogadores insuficientes", "players": []}
+
+            match_players = [player_id] + random.sample(available, number_of_players - 1)
+            orders = list(range(1, number_of_players + 1))
+            random.shuffle(orders)
+            match_id = self.next_match_id
+            self.next_match_id += 1
+            self.matches[match_id] = {"players": match_players, "last_move": {}, "order": 0, "running": True}
+            for other_id in match_players:
+                other = self.players[other_id]
+                other["match"] = match_id
+                #   Each player receives the list with itself first
+                others = [[self.players[p]["name"], p, str(order)] for p, order in zip(match_players, orders) if p != other_id]
+                own = [[other["name"], other_id, str(orders[match_players.index(other_id)])]]
+                other["started"] = {"code": "2", "message": "Partida iniciada", "players": own + others}
+            started = self.players[player_id]["started"]
+            self.players[player_id]["started"] = None
+            return started
+
+    def start_status(self, player_id):
+        with self.lock:
+            player = self.players.get(player_id)
+            if player is None or player["started"] is None:
+                return {"code": "1", "message": "Aguardando partida", "players": []}
+            started = player["started"]
+            player["started"] = None
+            return started
+
+    def send_move(self, player_id, move):
+        with self.lock:
+            player = self.players.get(player_id)
+            if player is None or player["match"] is None:
+                return "Jogador sem partida"
+            match = self.matches[player["match"]]
+            match["order"] += 1
+            move = dict(move, player=player_id, order=str(match["order"]))
+            match["last_move"] = move
+            if move.get("match_status") == "finished":
+                match["running"] = False
+            return "Jogada registrada"
+
+    def match_status(self, player_id):
+        with self.lock:
+            player = self.players.get(player_id)
+            if player is None or player["match"] is None:
+                return {}
+            #   Like DOG, the move is sent back as the string of a Python dict
+            return {"0": str(self.matches[player["match"]]["order"]), "1": str(self.matches[player["match"]]["last_move"])}
+
+
+class LocalDogRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    #   Headers and body are written separately, with Nagle every keep-alive answer waited for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        endpoint = self.path.strip("/")
+        self.server.count_request(endpoint)
+        try:
+            if endpoint == "player":
+                answer = self.server.register_player(form["player_name"], form["player_id"], form["game_id"])
+            elif endpoint == "start":
+                answer = self.server.start_match(form["player_id"], form["game_id"], int(form["number_of_players"]))
+            elif endpoint == "started":
+                answer = self.server.start_status(form["player_id"])
+            elif endpoint == "move":
+                answer = self.server.send_move(form["player_id"], json.loads(form["move"]))
+            elif endpoint == "match":
+                answer = self.server.match_status(form["player_id"])
+            else:
+                self.answer(404, "Not found")
+                return
+        except (KeyError, ValueError):
+            self.answer(400, "Bad request")
+            return
+        self.answer(200, answer if isinstance(answer, str) else json.dumps(answer))
+
+    def do_GET(self):
+        if self.path.strip("/") == "stats":
+            self.answer(200, json.dumps(self.server.stats()))
+        else:
+            self.answer(404, "Not found")
+
+    def answer(self, code, text):
+        body = text.encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the DOG server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    arguments = parser.parse_args()
+    server = LocalDogServer((arguments.host, arguments.port))
+    print("DOG server em " + server.get_url())
+    server.serve_forever()
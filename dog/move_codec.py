@@ -0,0 +1,53 @@
+import ast
+import json
+
+#   Bounds on what the server may send, anything larger is rejected before parsing
+MAX_RESPONSE_SIZE = 16 * 1024
+MAX_MOVE_SIZE = 4 * 1024
+MOVE_VALUE_TYPES = (str, int, float, bool, type(None), list, tuple)
+
+
+class MoveDecodeError(ValueError):
+    pass
+
+
+def encode_move(a_move):
+    return json.dumps(a_move, separators=(",", ":"))
+
+
+def decode_match_response(resp_json):
+    #   Response of match/: a JSON object with the move as a string in "1"
+    if len(resp_json) > MAX_RESPONSE_SIZE:
+        raise MoveDecodeError("response too large")
+    try:
+        seek_result = json.loads(resp_json)
+    except ValueError as error:
+        raise MoveDecodeError(str(error)) from error
+    if not isinstance(seek_result, dict):
+        raise MoveDecodeError("response is not an object")
+    return seek_result
+
+
+def decode_move(move_string):
+    #   The server sends the move back either as JSON or as a Python dict literal
+    #   Only literals are accepted, nothing is ever evaluated
+    if isinstance(move_string, dict):
+        move_dictionary = move_string
+    else:
+        if not isinstance(move_string, str) or len(move_string) > MAX_MOVE_SIZE:
+            raise MoveDecodeError("invalid move")
+        try:
+            move_dictionary = json.loads(move_string)
+        except ValueError:
+            try:
+                move_dictionary = ast.literal_eval(move_string)
+            except (ValueError, SyntaxError, MemoryError, RecursionError) as error:
+                raise MoveDecodeError(str(error)) from error
+    if not isinstance(move_dictionary, dict):
+        raise MoveDecodeError("move is not an object")
+    for key, value in move_dictionary.items():
+        if not isinstance(key, str) or not isinstance(value, MOVE_VALUE_TYPES):
+            raise MoveDecodeError("invalid move field")
+    if move_dictionary and not isinstance(move_dictionary.get("match_status"), str):
+        raise MoveDecodeError("move without match_status")
+    return move_dictionary
@@ -0,0 +1,79 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from dog.latency_histogram import LatencyHistogram
+
+
+class MoveMetrics:
+    #   Latency of each stage of a move, from the click to the opponent's screen, and counters of the polling
+    #   Stages of a local move: make_move, local_redraw, send_queue, then request.move like every request.<endpoint>
+    #   Stages of a remote move: transit, dispatch, remote_redraw, and move_rtt from sending a move to receiving the reply
+    #   transit compares the wall clocks of both players, it is only right if they are synchronized
+    #   Nothing is measured unless DOG_METRICS_PORT is set, the proxy then has a MoveMetrics and serves GET metrics/
+    def __init__(self):
+        super().__init__()
+        self.lock = Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.marks = {}  #   monotonic time of the last occurrence of each event
+        self.start_time = time.monotonic()
+        self.server = None
+
+    def mark(self, event):
+        self.marks[event] = time.monotonic()
+
+    def measure(self, stage, since):
+        #   Records the time since the event, if it happened
+        start = self.marks.get(since)
+        if start is not None:
+            self.record(stage, time.monotonic() - start)
+
+    def record(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.record(max(seconds, 0.0))
+
+    def count(self, counter, amount=1):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "uptime": time.monotonic() - self.start_time,
+                "counters": dict(self.counters),
+                "stages": {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+            }
+
+    def serve(self, port, host="127.0.0.1"):
+        #   Answers GET metrics/ with to_dict as JSON, from a daemon thread
+        self.server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self.server.daemon_threads = True
+        self.server.metrics = self
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address[1]
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.strip("/") != "metrics":
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.metrics.to_dict()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,35 @@
+import time
+
+
+class PollingScheduler:
+    #   Decides how long the polling thread sleeps between requests:
+    #   fast right after a wake-up (a move was sent or a match started), at a fixed pace while
+    #   waiting for moves and backing off exponentially while idle without a match
+    def __init__(self, fast_interval=0.2, fast_period=5.0, move_interval=1.0,
+                 idle_interval=1.0, max_idle_interval=8.0, backoff_factor=2.0):
+        super().__init__()
+        self.fast_interval = fast_interval
+        self.fast_period = fast_period
+        self.move_interval = move_interval
+        self.idle_interval = idle_interval
+        self.max_idle_interval = max_idle_interval
+        self.backoff_factor = backoff_factor
+        self.fast_until = 0.0
+        self.current_idle_interval = idle_interval
+        self.last_status = None
+
+    def wake(self):
+        self.fast_until = time.monotonic() + self.fast_period
+        self.current_idle_interval = self.idle_interval
+
+    def next_interval(self, status):
+        if status != self.last_status:
+            self.current_idle_interval = self.idle_interval
+            self.last_status = status
+        if time.monotonic() < self.fast_until:
+            return self.fast_interval
+        if status == 3:  #   waiting remote move
+            return self.move_interval
+        interval = self.current_idle_interval
+        self.current_idle_interval = min(interval * self.backoff_factor, self.max_idle_interval)
+        return interval
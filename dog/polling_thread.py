@@ -1,17 +1,29 @@
-from threading import Thread
-import time
+from threading import Event, Thread
+from dog.polling_scheduler import PollingScheduler
 
 
 class PollingThread(Thread):
-    def __init__(self, a_proxy, daemon_value):
+    def __init__(self, a_proxy, daemon_value, a_scheduler=None, an_error_handler=print):
         Thread.__init__(self, daemon=daemon_value)
         self.proxy = a_proxy
+        self.error_handler = an_error_handler
+        self.scheduler = a_scheduler if a_scheduler is not None else PollingScheduler()
+        self.wake_event = Event()
+
+    def wake(self):
+        #   Polls right away and keeps polling fast for a while
+        self.scheduler.wake()
+        self.wake_event.set()
 
     def run(self):
         while True:
             status = self.proxy.get_status()
-            if status == 2:  #   connected without match
-                self.proxy.start_status()
-            elif status == 3:  #   waiting remote move
-                self.proxy.match_status()
-            time.sleep(1)  # Sleep for 1 second
+            try:
+                if status == 2:  #   connected without match
+                    self.proxy.start_status()
+                elif status == 3:  #   waiting remote move
+                    self.proxy.match_status()
+            except Exception as error:  #   polls again after the interval
+                self.error_handler(error)
+            self.wake_event.wait(self.scheduler.next_interval(self.proxy.get_status()))
+            self.wake_event.clear()
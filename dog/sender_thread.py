@@ -0,0 +1,17 @@
+from threading import Thread
+
+
+class SenderThread(Thread):
+    #   Runs the requests queued by the interface, so it never waits for the network
+    def __init__(self, a_queue, daemon_value, an_error_handler=print):
+        Thread.__init__(self, daemon=daemon_value)
+        self.queue = a_queue
+        self.error_handler = an_error_handler
+
+    def run(self):
+        while True:
+            request = self.queue.get()
+            try:
+                request()
+            except Exception as error:  #   a failed request must not stop the ones queued after it
+                self.error_handler(error)
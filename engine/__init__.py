@@ -0,0 +1,22 @@
+'''Hex rules without any interface or network dependency.'''
+from engine.archive import GameArchive, GameRecord, RecordError, decode_record, encode_record
+from engine.bitboard import BitBoard, BoardMasks, board_masks, lowest_bit
+from engine.disjoint_set import DisjointSet
+from engine.enums import Cell, GameState
+from engine.game import Game, dog_message
+from engine.player import Player
+from engine.snapshot import SnapshotError, decode_snapshot, encode_snapshot
+from engine.transposition import TableStats, TranspositionTable
+from engine.zobrist import zobrist_hash, zobrist_keys
+
+__all__ = [
+    "GameArchive", "GameRecord", "RecordError", "decode_record", "encode_record",
+    "BitBoard", "BoardMasks", "board_masks", "lowest_bit",
+    "DisjointSet",
+    "Cell", "GameState",
+    "Game", "dog_message",
+    "Player",
+    "SnapshotError", "decode_snapshot", "encode_snapshot",
+    "TableStats", "TranspositionTable",
+    "zobrist_hash", "zobrist_keys",
+]
@@ -0,0 +1,269 @@
+'''Iterative deepening alpha-beta player with the resistance evaluation of Hex circuits. Requires numpy.'''
+import math
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from engine.bitboard import BitBoard
+from engine.book import OpeningBook
+from engine.enums import Cell, GameState
+from engine.game import Game, dog_message
+from engine.transposition import TranspositionTable
+from engine.zobrist import zobrist_keys
+
+# Resistance of a cell with a stone of the player, of an empty cell, and of the stones of the opponent, which
+# are left out of the circuit
+STONE_RESISTANCE = 1e-3
+EMPTY_RESISTANCE = 1.0
+# Resistance between the edges when the opponent cut every path, and the value of a won position
+NO_PATH_RESISTANCE = 1e6
+WIN = 1000.0
+
+class AlphaBetaResult(NamedTuple):
+    move: tuple[int, int]
+    # Deepest iteration completed before the time ran out
+    depth: int
+    nodes: int
+    elapsed: float
+    nodes_per_second: float
+    # Evaluation for the player in turn, above 0 when the player is ahead
+    value: float
+    # Fraction of the positions found in the transposition table
+    hit_rate: float
+
+class Evaluation(NamedTuple):
+    # log(resistance of player 2 / resistance of player 1), positive when player 1 is closer to connect
+    value: float
+    # Current through each cell in the circuits of both players, the cells that matter most for the position
+    flow: np.ndarray
+
+class SearchTimeout(Exception):
+    '''The time limit was reached. Raised with the best value and move of the root moves searched in the first
+    iteration.'''
+
+@lru_cache(maxsize=None)
+def circuit(size: int) -> tuple[np.ndarray, np.ndarray, dict[Cell, tuple[np.ndarray, np.ndarray]]]:
+    '''Pairs of adjacent cells, and the cells touching the start and end edges of each player.'''
+    pairs = [(i*size + j, x*size + y) for i in range(size) for j in range(size)
+             for x, y in ((i, j+1), (i+1, j-1), (i+1, j)) if 0 <= x < size and 0 <= y < size]
+    a, b = (np.array(cells, dtype=np.intp) for cells in zip(*pairs)) if pairs else (np.empty(0, np.intp),)*2
+    line = np.arange(size)
+    edges = {
+        Cell.P1: (line*size, line*size + size-1),
+        Cell.P2: (line, (size-1)*size + line),
+    }
+    return a, b, edges
+
+def cell_mask(mask: int, cells: int) -> np.ndarray:
+    data = np.frombuffer(mask.to_bytes((cells+7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(data, bitorder='little')[:cells].astype(bool)
+
+def resistance(size: int, own: int, other: int, cell: Cell) -> tuple[float, np.ndarray]:
+    '''Resistance between the player's edges and the current through each cell, solving the Kirchhoff equations
+    with the start edge at voltage 1 and the end edge grounded.'''
+    a, b, edges = circuit(size)
+    start, end = edges[cell]
+    cells = size*size
+    bits, blocked = cell_mask(own, cells), cell_mask(other, cells)
+    cell_resistance = np.where(bits, STONE_RESISTANCE, EMPTY_RESISTANCE)
+
+    conductance = np.where(blocked[a] | blocked[b], 0.0, 1/(cell_resistance[a] + cell_resistance[b]))
+    start_conductance = np.where(blocked[start], 0.0, 1/cell_resistance[start])
+    end_conductance = np.where(blocked[end], 0.0, 1/cell_resistance[end])
+
+    laplacian = np.zeros((cells, cells))
+    laplacian[a, b] = -conductance
+    laplacian[b, a] = -conductance
+    diagonal = np.bincount(a, conductance, cells) + np.bincount(b, conductance, cells) + 0.0
+    diagonal[start] += start_conductance
+    diagonal[end] += end_conductance
+    # The small leak keeps the system solvable when some cells are cut off from both edges
+    laplacian[np.diag_indices(cells)] = diagonal + 1e-9
+    source = np.zeros(cells)
+    source[start] = start_conductance
+    voltage = np.linalg.solve(laplacian, source)
+
+    current = float(np.dot(start_conductance, 1 - voltage[start]))
+    pair_flow = conductance * np.abs(voltage[a] - voltage[b])
+    flow = np.bincount(a, pair_flow, cells) + np.bincount(b, pair_flow, cells) + 0.0
+    flow[start] += start_conductance * (1 - voltage[start])
+    flow[end] += end_conductance * voltage[end]
+    return (1/current if current > 1/NO_PATH_RESISTANCE else NO_PATH_RESISTANCE), flow
+
+def evaluate(size: int, stones: tuple[int, int]) -> Evaluation:
+    p1_resistance, p1_flow = resistance(size, stones[0], stones[1], Cell.P1)
+    p2_resistance, p2_flow = resistance(size, stones[1], stones[0], Cell.P2)
+    return Evaluation(math.log(p2_resistance / p1_resistance), p1_flow/p1_flow.sum() + p2_flow/p2_flow.sum())
+
+def connected(board: BitBoard, stones: int, cell: Cell) -> bool:
+    start, end = board.edges(cell)
+    region = stones & start
+    while region:
+        if region & end: return True
+        grown = board.dilate(region) & stones
+        if grown == region: return False
+        region = grown
+    return False
+
+class AlphaBeta:
+    '''Plays the best move of a negamax search, deepened one ply at a time until the time limit.
+
+    Inner nodes only search the `width` cells carrying the most current, the cells whose stones would change the
+    resistance of either player the most. The evaluation and best move of each position are kept in a
+    transposition table, so a position reached again by another move order or in the next iteration does not
+    solve the circuits again. Only the value and the `width` cells searched are kept, as int16, so an entry takes a
+    few hundred bytes whatever the size of the board. The table can be shared with other engines. Positions in the
+    opening book are played from it without searching.
+    '''
+    def __init__(self, time_limit: float = 1.0, max_depth: int | None = None, width: int | None = 12,
+                 table: TranspositionTable | None = None, book: OpeningBook | None = None) -> None:
+        self._time_limit: float = time_limit
+        self._max_depth: int | None = max_depth
+        self._width: int | None = width
+        self._book: OpeningBook | None = book
+        # Values are [value of Evaluation, cells to search by decreasing current, best move or None] lists
+        self._table: TranspositionTable = table if table is not None else TranspositionTable(1 << 18)
+        self._board: BitBoard | None = None
+        self._keys: tuple[tuple[int, ...], tuple[int, ...]] = ((), ())
+        self._deadline: float = math.inf
+        self._nodes: int = 0
+        self._last_result: AlphaBetaResult | None = None
+
+    def search(self, game: Game) -> AlphaBetaResult | None:
+        if game.game_state != GameState.RUNNING: return None
+        start = time.perf_counter()
+        size = game.size
+        if self._book is not None and (book_move := self._book.best_move(game)):
+            # Book moves are not evaluated
+            elapsed = time.perf_counter() - start
+            self._last_result = AlphaBetaResult(book_move.move, 0, 0, elapsed, 0.0, 0.0, 0.0)
+            return self._last_result
+        if self._board is None or self._board.size != size:
+            # The keys of another size would collide with the stored positions
+            if self._board is not None: self._table.clear()
+            self._board = BitBoard(size)
+            self._keys = zobrist_keys(size)
+        self._table.new_search()
+        stats = self._table.stats
+        stones = (game.bitboard.stones(Cell.P1), game.bitboard.stones(Cell.P2))
+        turn = 0 if game.current_cell == Cell.P1 else 1
+
+        self._deadline = start + self._time_limit
+        self._nodes = 0
+        # Every root move is searched, so the root's cells are ranked apart from the table. Until an iteration
+        # completes, the move carrying the most current is played
+        evaluation = evaluate(size, stones)
+        root_moves = self.ranked_moves(stones, evaluation.flow, None).tolist()
+        best_move, best_value, depth = root_moves[0], evaluation.value if turn == 0 else -evaluation.value, 0
+        empty_count = size*size - (stones[0] | stones[1]).bit_count()
+        max_depth = min(self._max_depth or empty_count, empty_count)
+        while depth < max_depth:
+            try:
+                value, move = self.root(stones, game.hash, turn, depth+1, root_moves, best_move)
+            except SearchTimeout as timeout:
+                if timeout.args and timeout.args[0] > -math.inf: best_value, best_move = timeout.args
+                break
+            best_move, best_value, depth = move, value, depth+1
+            # A forced result does not change with more depth
+            if abs(value) >= WIN - size*size: break
+
+        elapsed = time.perf_counter() - start
+        hits, misses = self._table.stats.hits - stats.hits, self._table.stats.misses - stats.misses
+        self._last_result = AlphaBetaResult(
+            divmod(best_move, size), depth, self._nodes, elapsed, self._nodes/elapsed if elapsed else 0.0, best_value,
+            hits/(hits + misses) if hits + misses else 0.0
+        )
+        return self._last_result
+
+    def play(self, game: Game) -> dog_message | None:
+        '''Makes the move for the local player, returning it to be sent to DOG.'''
+        if game.current_player_turn != game.local_player: return None
+        if result := self.search(game): return game.make_move(*result.move)
+        return None
+
+    def close(self) -> None:
+        self._table.clear()
+
+    def root(self, stones: tuple[int, int], key: int, turn: int, depth: int, moves: list[int],
+             previous: int) -> tuple[float, int]:
+        # Starting with the best move of the previous iteration
+        moves = list(moves)
+        moves.insert(0, moves.pop(moves.index(previous)))
+        best_value, best_move = -math.inf, moves[0]
+        alpha = -math.inf
+        for move in moves:
+            try:
+                value = -self.negamax(self.child(stones, turn, move), key ^ self._keys[turn][move], turn ^ 1,
+                                      depth-1, -math.inf, -alpha, 1)
+            except SearchTimeout:
+                # The first iteration keeps the best of the moves evaluated before the time ran out
+                if depth == 1: raise SearchTimeout(best_value, best_move) from None
+                raise
+            if value > best_value: best_value, best_move = value, move
+            alpha = max(alpha, value)
+        return best_value, best_move
+
+    def negamax(self, stones: tuple[int, int], key: int, turn: int, depth: int, alpha: float, beta: float,
+                ply: int) -> float:
+        '''Value for the player in turn, `key` being the Zobrist hash of the stones.'''
+        self._nodes += 1
+        # Checked at every node, a single evaluation of a large board takes milliseconds
+        if time.perf_counter() > self._deadline: raise SearchTimeout
+        mover = turn ^ 1
+        # Only the stone just played can have completed a chain
+        if connected(self._board, stones[mover], Cell.P1 if mover == 0 else Cell.P2): return -(WIN - ply)
+        if depth == 0:
+            value = self.entry(stones, key)[0]
+            return value if turn == 0 else -value
+
+        best_value, best_move = -math.inf, None
+        for move in self.ordered_moves(stones, key):
+            value = -self.negamax(self.child(stones, turn, move), key ^ self._keys[turn][move], turn ^ 1, depth-1,
+                                  -beta, -alpha, ply+1)
+            if value > best_value: best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta: break
+        self.entry(stones, key)[2] = best_move
+        return best_value
+
+    def ordered_moves(self, stones: tuple[int, int], key: int) -> list[int]:
+        '''The `width` empty cells carrying the most current, the best move found earlier in this position first.'''
+        _, ranked, best = self.entry(stones, key)
+        moves = ranked.tolist()
+        if best is not None:
+            if best in moves: moves.remove(best)
+            moves.insert(0, best)
+        return moves
+
+    def entry(self, stones: tuple[int, int], key: int) -> list:
+        entry = self._table.get(key)
+        if entry is None:
+            evaluation = evaluate(self._board.size, stones)
+            entry = [evaluation.value, self.ranked_moves(stones, evaluation.flow, self._width), None]
+            self._table.store(key, entry)
+        return entry
+
+    @staticmethod
+    def ranked_moves(stones: tuple[int, int], flow: np.ndarray, width: int | None) -> np.ndarray:
+        '''The first `width` empty cells by decreasing current, all of them if None.'''
+        empty = np.flatnonzero(~cell_mask(stones[0] | stones[1], flow.size))
+        return empty[np.argsort(-flow[empty], kind='stable')][:width].astype(np.int16)
+
+    @staticmethod
+    def child(stones: tuple[int, int], turn: int, move: int) -> tuple[int, int]:
+        if turn == 0: return stones[0] | 1 << move, stones[1]
+        return stones[0], stones[1] | 1 << move
+
+    @property
+    def last_result(self) -> AlphaBetaResult | None:
+        return self._last_result
+
+    @property
+    def nodes(self) -> int:
+        return self._nodes
+
+    @property
+    def table(self) -> TranspositionTable:
+        return self._table
@@ -0,0 +1,237 @@
+'''Finished games stored as compact binary records in an append only archive, read back through mmap.
+
+The archive is a single file: the records one after the other, then an index of fixed size entries with the
+offset and length of each record, so any game is found without reading the ones before it, and a footer with the
+number of entries. Records carry their own length, so an archive whose index was lost or never written, or one of
+the first version that kept the index in a separate .idx file, is indexed again by walking them.
+'''
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Iterator, NamedTuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where writers are not locked out of each other
+    fcntl = None
+
+from engine.enums import Cell, GameState
+from engine.game import Game
+from engine.player import Player
+
+DEFAULT_PATH = os.path.join("data", "games.bin")
+# Header: magic and format version, padded to 8 bytes
+MAGIC = b"HEXG"
+VERSION = 2
+HEADER_SIZE = 8
+# Size, first player, winner, name lengths, time it was played, number of moves
+RECORD_HEADER = struct.Struct("<BBBBBIH")
+# Written before the index entries, where walking the records stops, and in the footer
+INDEX_MAGIC = b"HEXI"
+# Offset and length of a record
+INDEX_ENTRY = struct.Struct("<QI")
+# Number of index entries
+FOOTER = struct.Struct("<Q4s")
+
+class RecordError(ValueError):
+    pass
+
+class GameRecord(NamedTuple):
+    size: int
+    players: tuple[str, str]
+    # Cell value (1 or 2) of the player who moved first, and of the winner, 0 if the game was abandoned
+    first: int
+    winner: int
+    # Cell indices i*size + j in the order they were played
+    moves: tuple[int, ...]
+    played_at: int = 0
+
+    @classmethod
+    def from_game(cls, game: Game) -> 'GameRecord':
+        moves = tuple(game.moves)
+        # A position restored from a snapshot or a saved game lost the moves played before it
+        if len(moves) != game.ply: raise RecordError("The game's moves are not all known")
+        # The player in turn moves next, so the first player is found by the parity of the moves played
+        current = 1 if game.current_cell == Cell.P1 else 2
+        if game.game_state == GameState.ENDED: current = 3 - current
+        first = current if len(moves) % 2 == 0 else 3 - current
+        winner = 0
+        if game.winner is not None: winner = 1 if game.winner is game.player1 else 2
+        return cls(game.size, (game.player1.name, game.player2.name), first, winner, moves, int(time.time()))
+
+    def to_game(self, moves: int | None = None, player_class: type[Player] = Player,
+                hues: tuple[float, float] = (-1, -1)) -> Game:
+        '''The game after its first `moves` moves, all of them by default.'''
+        game = Game(self.size)
+        game.player1 = player_class(self.players[0], hues[0])
+        game.player2 = player_class(self.players[1], hues[1])
+        game.current_player_turn = game.player1 if self.first == 1 else game.player2
+        game.game_state = GameState.RUNNING
+        for cell in self.moves[:moves]: game.apply_move(*divmod(cell, self.size))
+        return game
+
+def encode_record(record: GameRecord) -> bytes:
+    names = [name.encode("utf-8")[:255] for name in record.players]
+    # One byte per move up to 16x16 boards, two above
+    moves = array("B" if record.size*record.size <= 256 else "H", record.moves)
+    if sys.byteorder == "big": moves.byteswap()
+    header = RECORD_HEADER.pack(record.size, record.first, record.winner, len(names[0]), len(names[1]),
+                                record.played_at & 0xFFFFFFFF, len(record.moves))
+    return header + names[0] + names[1] + moves.tobytes()
+
+def decode_record(data: bytes) -> GameRecord:
+    if len(data) < RECORD_HEADER.size: raise RecordError("Truncated game record")
+    size, first, winner, name1, name2, played_at, count = RECORD_HEADER.unpack_from(data)
+    offset = RECORD_HEADER.size
+    moves = array("B" if size*size <= 256 else "H")
+    if len(data) != offset + name1 + name2 + count*moves.itemsize: raise RecordError("Game record of the wrong length")
+    players = (data[offset:offset + name1].decode("utf-8", "replace"),
+               data[offset + name1:offset + name1 + name2].decode("utf-8", "replace"))
+    moves.frombytes(data[offset + name1 + name2:])
+    if sys.byteorder == "big": moves.byteswap()
+    return GameRecord(size, players, first, winner, tuple(moves), played_at)
+
+def record_length(data: bytes, offset: int) -> int:
+    '''Length of the record at `offset`, 0 if no whole record starts there.'''
+    if offset + RECORD_HEADER.size > len(data): return 0
+    size, first, winner, name1, name2, _, count = RECORD_HEADER.unpack_from(data, offset)
+    if not size or first not in (1, 2) or winner not in (0, 1, 2) or count > size*size: return 0
+    length = RECORD_HEADER.size + name1 + name2 + count*(1 if size*size <= 256 else 2)
+    return length if offset + length <= len(data) else 0
+
+class GameArchive:
+    '''Appends records to the file at `path` and reads them back through mmap. Each record is written as it is
+    appended, the index and footer only by flush and close, so appending costs the same however many games the
+    archive holds. An archive that was not closed is indexed again by walking its records on the next open.
+
+    The file is locked while it is written, where the system supports it: a second writer waits, then reads the
+    index again, so it never appends from a stale end.'''
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self._path: str = path
+        self._file = None
+        self._mmap: mmap.mmap | None = None
+        # Opened by the first append and kept open, with the lock, until close
+        self._writer = None
+        # Whether the index and footer written by flush follow the records, cut by the next append
+        self._indexed: bool = False
+        # Packed INDEX_ENTRY of every record, and the end of the records where the next one is written
+        self._index: bytearray = bytearray()
+        self._end: int = HEADER_SIZE
+        self._count: int | None = None
+
+    def append(self, record: GameRecord) -> int:
+        '''Stores the record and returns its position in the archive.'''
+        if self._writer is None: self.open_writer()
+        data = encode_record(record)
+        if self._indexed:
+            # Files can't be cut while they are mapped on every system
+            self.unmap()
+            self._writer.truncate(self._end)
+            self._writer.seek(self._end)
+            self._indexed = False
+        self._writer.write(data)
+        self._index += INDEX_ENTRY.pack(self._end, len(data))
+        self._end += len(data)
+        self._count += 1
+        return self._count - 1
+
+    def open_writer(self) -> None:
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        writer = open(self._path, "r+b" if os.path.exists(self._path) else "w+b")
+        try:
+            if fcntl is not None: fcntl.flock(writer.fileno(), fcntl.LOCK_EX)
+            # Read under the lock, another writer may have appended since
+            self.open()
+            self.unmap()
+            # Also upgrades an archive of the first version, whose records are the same
+            writer.write(MAGIC + bytes((VERSION, 0, 0, 0)))
+            # The old index is cut first: a crash before close loses at most a record cut short, and the index is
+            # found again by walking the records
+            writer.truncate(self._end)
+            writer.seek(self._end)
+        except BaseException:
+            writer.close()
+            raise
+        self._writer = writer
+
+    def flush(self) -> None:
+        '''Writes the index and footer after the records, so the next open finds them without walking.'''
+        if self._writer is None or self._indexed: return
+        self._writer.write(INDEX_MAGIC + self._index + FOOTER.pack(self._count, INDEX_MAGIC))
+        self._writer.flush()
+        self._indexed = True
+
+    def __len__(self) -> int:
+        if self._count is None: self.open()
+        return self._count
+
+    def __getitem__(self, position: int) -> GameRecord:
+        count = len(self)
+        if position < 0: position += count
+        if not 0 <= position < count: raise IndexError("game archive index out of range")
+        offset, length = INDEX_ENTRY.unpack_from(self._index, position*INDEX_ENTRY.size)
+        # Records appended since the file was mapped
+        if self._mmap is None or offset + length > len(self._mmap): self.map()
+        return decode_record(self._mmap[offset:offset + length])
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for position in range(len(self)): yield self[position]
+
+    def open(self) -> None:
+        self.unmap()
+        self._count, self._index, self._end = 0, bytearray(), HEADER_SIZE
+        if not os.path.exists(self._path) or os.path.getsize(self._path) <= HEADER_SIZE: return
+        self.map()
+        if self._mmap[:len(MAGIC)] != MAGIC or self._mmap[len(MAGIC)] not in (1, VERSION):
+            self.close()
+            raise RecordError(f"{self._path} is not a game archive")
+        index, self._end = self.read_index()
+        self._index = bytearray(index)
+        self._count = len(self._index) // INDEX_ENTRY.size
+
+    def map(self) -> None:
+        '''Maps the whole file, again after records were appended.'''
+        if self._writer is not None: self._writer.flush()
+        self.unmap()
+        self._file = open(self._path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_index(self) -> tuple[bytes, int]:
+        '''The index of the footer if it is whole, otherwise the one found by walking the records.'''
+        data = self._mmap
+        if data[len(MAGIC)] == VERSION and len(data) >= HEADER_SIZE + len(INDEX_MAGIC) + FOOTER.size:
+            count, magic = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+            start = len(data) - FOOTER.size - count*INDEX_ENTRY.size
+            end = start - len(INDEX_MAGIC)
+            if magic == INDEX_MAGIC and end >= HEADER_SIZE and data[end:start] == INDEX_MAGIC:
+                index = data[start:len(data) - FOOTER.size]
+                last = INDEX_ENTRY.unpack_from(index, len(index) - INDEX_ENTRY.size) if count else (HEADER_SIZE, 0)
+                if sum(last) == end: return index, end
+        entries, offset = [], HEADER_SIZE
+        while length := record_length(data, offset):
+            entries.append(INDEX_ENTRY.pack(offset, length))
+            offset += length
+        return b"".join(entries), offset
+
+    def close(self) -> None:
+        '''Writes the index and releases the file.'''
+        if self._writer is not None:
+            self.flush()
+            # Closing the file releases the lock
+            self._writer.close()
+            self._writer, self._indexed = None, False
+        self.unmap()
+        self._count = None
+
+    def unmap(self) -> None:
+        for resource in (self._mmap, self._file):
+            if resource is not None: resource.close()
+        self._mmap = self._file = None
+
+    @property
+    def path(self) -> str:
+        return self._path
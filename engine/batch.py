@@ -0,0 +1,142 @@
+'''Plays thousands of games at once on NumPy arrays, to generate training data and evaluate openings. Requires numpy.'''
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from engine.enums import Cell, GameState
+from engine.game import Game
+from engine.player import Player
+
+# Receives the boards (batch, size, size) with Cell values and the Cell value to play in each game,
+# returns a score for every cell (batch, size*size), the best scored empty cell is played
+Policy = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+class BatchResult(NamedTuple):
+    size: int
+    # Cell indices i*size + j in the order they were played, -1 after the winning move
+    moves: np.ndarray
+    # Number of moves of each game, up to and including the winning move
+    lengths: np.ndarray
+    # Cell value (1 or 2) of the winner and of the first player of each game
+    winners: np.ndarray
+    first_players: np.ndarray
+
+    def game_moves(self, game: int) -> list[tuple[int, int]]:
+        return [divmod(int(cell), self.size) for cell in self.moves[game, :self.lengths[game]]]
+
+    def replay(self, game: int) -> Game:
+        '''Plays the game again through Game, with player1 and player2 named "P1" and "P2".'''
+        replayed = Game(self.size)
+        replayed.player1, replayed.player2 = Player("P1"), Player("P2")
+        replayed.current_player_turn = replayed.player1 if self.first_players[game] == Cell.P1.value else replayed.player2
+        replayed.game_state = GameState.RUNNING
+        for i, j in self.game_moves(game): replayed.apply_move(i, j)
+        return replayed
+
+def relax(reached: np.ndarray, neighbor: np.ndarray, stone_times: np.ndarray) -> None:
+    '''Lowers in place the labels of the cells reachable through their neighbor: a chain reaching the neighbor at
+    its label extends to the cell once its stone is placed.'''
+    np.maximum(np.minimum(reached, neighbor, out=reached), stone_times, out=reached)
+
+def connection_times(boards: np.ndarray, times: np.ndarray, cell: Cell) -> np.ndarray:
+    '''Move number at which the player first connected its edges in each game, or size*size if it never did.
+
+    A chain is complete when its last stone is placed, so the answer is the smallest, over all chains between
+    the edges, of the largest placement time along the chain. It is found by propagating labels until they settle,
+    dropping from the batch the games that already settled. Each pass sweeps the labels across the board along
+    the columns and then along the rows in both directions, so a chain of any length along a line settles in a
+    single pass; about 10 passes settle an 11x11 board.
+    '''
+    size = boards.shape[1]
+    never = size*size
+    dtype = np.uint8 if never < 256 else times.dtype
+    # Indexed [i, j, game], so the sweeps work on contiguous rows of games. The rows of player 2 are the columns
+    # of player 1
+    stone_times = np.where(boards == cell.value, times, never).astype(dtype)
+    stone_times = np.ascontiguousarray(stone_times.transpose((1, 2, 0) if cell == Cell.P1 else (2, 1, 0)))
+    reached = np.full_like(stone_times, never)
+    reached[:, 0] = stone_times[:, 0]
+
+    result = np.empty(len(boards), dtype=times.dtype)
+    active = np.arange(len(boards))
+    previous = np.empty_like(reached)
+    while active.size:
+        np.copyto(previous, reached)
+        for j in range(1, size): relax(reached[:, j], reached[:, j-1], stone_times[:, j])
+        for j in range(size-2, -1, -1): relax(reached[:, j], reached[:, j+1], stone_times[:, j])
+        # Rows carry their neighbors above and below: (i-1, j) and (i-1, j+1), then (i+1, j) and (i+1, j-1)
+        for i in range(1, size):
+            relax(reached[i], reached[i-1], stone_times[i])
+            relax(reached[i, :-1], reached[i-1, 1:], stone_times[i, :-1])
+        for i in range(size-2, -1, -1):
+            relax(reached[i], reached[i+1], stone_times[i])
+            relax(reached[i, 1:], reached[i+1, :-1], stone_times[i, 1:])
+        changed = (reached != previous).any(axis=(0, 1))
+        if changed.all(): continue
+        result[active[~changed]] = reached[:, -1, ~changed].min(axis=0)
+        # compress keeps the games contiguous, fancy indexing of the last axis would not
+        reached, stone_times = np.compress(changed, reached, axis=2), np.compress(changed, stone_times, axis=2)
+        active = active[changed]
+        previous = np.empty_like(reached)
+    return result
+
+class BatchSimulator:
+    '''Plays `batch` games of a board size in lockstep. Without a policy the moves are uniformly random.'''
+    def __init__(self, size: int, batch: int, seed: int | None = None) -> None:
+        self._size: int = size
+        self._batch: int = batch
+        self._rng: np.random.Generator = np.random.default_rng(seed)
+
+    def play(self, policy: Policy | None = None, first_players: np.ndarray | None = None) -> BatchResult:
+        size, batch, cells = self._size, self._batch, self._size*self._size
+        if first_players is None: first_players = np.full(batch, Cell.P1.value, dtype=np.int8)
+        first_players = np.asarray(first_players, dtype=np.int8)
+        second_players = (3 - first_players).astype(np.int8)
+
+        # Every game is played until the board is full, a full Hex board always has exactly one winner,
+        # then the moves after the one that connected the winner's edges are dropped
+        if policy is None:
+            moves = np.argsort(self._rng.random((batch, cells)), axis=1)
+        else:
+            moves = self.play_policy(policy, first_players, second_players)
+
+        rows = np.arange(batch)[:, None]
+        steps = np.arange(cells)
+        times = np.empty((batch, cells), dtype=np.int16 if cells < 2**15 else np.int32)
+        times[rows, moves] = steps
+        boards = np.where(steps % 2 == 0, first_players[:, None], second_players[:, None]).astype(np.int8)
+        boards = np.take_along_axis(boards, times, axis=1).reshape(batch, size, size)
+        times = times.reshape(batch, size, size)
+
+        # Only the games player 1 did not win need to be checked for player 2
+        end_times = connection_times(boards, times, Cell.P1)
+        p2_wins = end_times == cells
+        end_times[p2_wins] = connection_times(boards[p2_wins], times[p2_wins], Cell.P2)
+        winners = np.where(p2_wins, Cell.P2.value, Cell.P1.value).astype(np.int8)
+        lengths = end_times.astype(np.int64) + 1
+        moves = np.where(steps < lengths[:, None], moves, -1)
+        return BatchResult(size, moves, lengths, winners, first_players)
+
+    def play_policy(self, policy: Policy, first_players: np.ndarray, second_players: np.ndarray) -> np.ndarray:
+        size, batch, cells = self._size, self._batch, self._size*self._size
+        boards = np.zeros((batch, cells), dtype=np.int8)
+        moves = np.empty((batch, cells), dtype=np.int64)
+        rows = np.arange(batch)
+        for step in range(cells):
+            to_play = first_players if step % 2 == 0 else second_players
+            scores = np.asarray(policy(boards.reshape(batch, size, size), to_play), dtype=np.float64)
+            # Random tie breaking, and occupied cells are never chosen
+            scores = scores + self._rng.random((batch, cells)) * 1e-9
+            scores[boards != 0] = -np.inf
+            move = scores.argmax(axis=1)
+            boards[rows, move] = to_play
+            moves[:, step] = move
+        return moves
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def batch(self) -> int:
+        return self._batch
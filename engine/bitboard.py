@@ -0,0 +1,132 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+from engine.enums import Cell
+
+class BoardMasks(NamedTuple):
+    full: int
+    first_column: int
+    last_column: int
+    first_row: int
+    last_row: int
+    neighbors: tuple[int, ...]
+    neighbor_cells: tuple[tuple[tuple[int, int], ...], ...]
+
+@lru_cache(maxsize=None)
+def board_masks(size: int) -> BoardMasks:
+    '''Bit masks for a board size, computed once and shared by every board of that size.'''
+    first_column = sum(1 << i*size for i in range(size))
+    first_row = (1 << size) - 1
+    neighbor_cells = []
+    for i in range(size):
+        for j in range(size):
+            neighbor_cells.append(tuple(
+                (i+x, j+y) for x, y in ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0))
+                if 0 <= i+x < size and 0 <= j+y < size
+            ))
+    neighbors = tuple(sum(1 << x*size + y for x, y in cells) for cells in neighbor_cells)
+    return BoardMasks(
+        full=(1 << size*size) - 1,
+        first_column=first_column,
+        last_column=first_column << (size-1),
+        first_row=first_row,
+        last_row=first_row << size*(size-1),
+        neighbors=neighbors,
+        neighbor_cells=tuple(neighbor_cells)
+    )
+
+def lowest_bit(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+class BitBoard:
+    '''Board with the stones of each player stored as an integer bitset, cell (i, j) being bit i*size + j.'''
+    __slots__ = ('_size', '_masks', '_stones')
+
+    def __init__(self, size: int, stones: tuple[int, int] = (0, 0)) -> None:
+        self._size: int = size
+        self._masks: BoardMasks = board_masks(size)
+        self._stones: list[int] = list(stones)
+
+    @classmethod
+    def from_grid(cls, grid: list[list[Cell]]) -> 'BitBoard':
+        board = cls(len(grid))
+        for i, row in enumerate(grid):
+            for j, cell in enumerate(row):
+                if cell != Cell.EMPTY: board.place(i, j, cell)
+        return board
+
+    def copy(self) -> 'BitBoard':
+        return BitBoard(self._size, self._stones)
+
+    def to_grid(self) -> list[list[Cell]]:
+        return [[self.get(i, j) for j in range(self._size)] for i in range(self._size)]
+
+    def get(self, i: int, j: int) -> Cell:
+        bit = 1 << i*self._size + j
+        if self._stones[0] & bit: return Cell.P1
+        if self._stones[1] & bit: return Cell.P2
+        return Cell.EMPTY
+
+    def is_empty(self, i: int, j: int) -> bool:
+        return not self.occupied >> i*self._size + j & 1
+
+    def place(self, i: int, j: int, cell: Cell) -> None:
+        self._stones[cell.value-1] |= 1 << i*self._size + j
+
+    def stones(self, cell: Cell) -> int:
+        return self._stones[cell.value-1]
+
+    def edges(self, cell: Cell) -> tuple[int, int]:
+        '''Start and end edges the player must connect.'''
+        if cell == Cell.P1: return self._masks.first_column, self._masks.last_column
+        return self._masks.first_row, self._masks.last_row
+
+    def dilate(self, mask: int) -> int:
+        '''Adds every cell adjacent to the mask.'''
+        n, masks = self._size, self._masks
+        return masks.full & (
+            mask
+            | (mask << n) | (mask >> n)
+            | ((mask << 1) & ~masks.first_column) | ((mask >> 1) & ~masks.last_column)
+            | ((mask >> (n-1)) & ~masks.first_column) | ((mask << (n-1)) & ~masks.last_column)
+        )
+
+    def flood_fill(self, seed: int, cell: Cell) -> int:
+        '''Every stone of the player connected to the seed mask.'''
+        stones = self.stones(cell)
+        region = seed & stones
+        while (grown := self.dilate(region) & stones) != region: region = grown
+        return region
+
+    def shortest_path(self, cell: Cell) -> list[tuple[int, int]] | None:
+        '''Shortest chain of the player's stones between its edges, from the end edge to the start edge.'''
+        stones = self.stones(cell)
+        start, goal = self.edges(cell)
+        frontier = visited = stones & start
+        layers = []
+        while frontier:
+            layers.append(frontier)
+            if frontier & goal: break
+            frontier = self.dilate(frontier) & stones & ~visited
+            visited |= frontier
+        else:
+            return None
+
+        current = lowest_bit(layers[-1] & goal)
+        path = [current]
+        for layer in reversed(layers[:-1]):
+            current = lowest_bit(self._masks.neighbors[current] & layer)
+            path.append(current)
+        return [divmod(k, self._size) for k in path]
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def occupied(self) -> int:
+        return self._stones[0] | self._stones[1]
+
+    @property
+    def masks(self) -> BoardMasks:
+        return self._masks
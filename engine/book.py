@@ -0,0 +1,174 @@
+'''Opening book: the moves played from each early position and how often they won, in a sorted file read with mmap.
+
+    python -m engine.book --size 11 --plies 12
+'''
+import argparse
+import mmap
+import os
+import random
+import struct
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+from engine.archive import DEFAULT_PATH as ARCHIVE_PATH, GameArchive, GameRecord
+from engine.enums import Cell, GameState
+from engine.game import Game
+from engine.position_key import canonical_key, key_length
+
+DEFAULT_DIRECTORY = "data"
+MAGIC = b"HEXB"
+VERSION = 1
+HEADER_SIZE = 8
+# Move in the canonical orientation, games it was played in and games won by the player who played it
+ENTRY = struct.Struct(">HII")
+
+class BookMove(NamedTuple):
+    move: tuple[int, int]
+    games: int
+    wins: int
+
+    @property
+    def score(self) -> float:
+        # Smoothed, so a single won game doesn't beat a move won 90 times out of 100
+        return (self.wins + 1) / (self.games + 2)
+
+class BookBuilder:
+    '''Counts the moves of many games, position by position, up to `plies` moves into each game.'''
+    def __init__(self, size: int, plies: int = 12) -> None:
+        self._size: int = size
+        self._plies: int = plies
+        self._counts: dict[tuple[bytes, int], list[int]] = defaultdict(lambda: [0, 0])
+
+    def add_record(self, record: GameRecord) -> None:
+        '''Adds a finished game, abandoned games and other board sizes are skipped.'''
+        if record.size != self._size or not record.winner: return
+        cells = self._size*self._size
+        stones, turn = [0, 0], record.first - 1
+        for move in record.moves[:self._plies]:
+            key, rotated = canonical_key(self._size, (stones[0], stones[1]), turn)
+            counts = self._counts[key, cells-1-move if rotated else move]
+            counts[0] += 1
+            if record.winner - 1 == turn: counts[1] += 1
+            stones[turn] |= 1 << move
+            turn ^= 1
+
+    def add_records(self, records: Iterable[GameRecord]) -> None:
+        for record in records: self.add_record(record)
+
+    def write(self, path: str) -> int:
+        '''Writes the book sorted by key and move, returning the number of entries.'''
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(MAGIC + bytes((VERSION, self._size, key_length(self._size), 0)))
+            for (key, move), (games, wins) in sorted(self._counts.items()):
+                file.write(key + ENTRY.pack(move, games, wins))
+        os.replace(temporary, path)
+        return len(self._counts)
+
+class OpeningBook:
+    '''Looks positions up by binary search over the mapped file, opened on the first lookup.'''
+    def __init__(self, size: int, path: str | None = None, min_games: int = 2) -> None:
+        self._size: int = size
+        self._path: str = path or os.path.join(DEFAULT_DIRECTORY, f"book-{size}.bin")
+        # Moves played fewer times are not trusted by best_move
+        self._min_games: int = min_games
+        self._key_length: int = key_length(size)
+        self._record: int = self._key_length + ENTRY.size
+        self._file = None
+        self._mmap: mmap.mmap | None = None
+        self._entries: int = 0
+        self._loaded: bool = False
+
+    def moves(self, game: Game) -> list[BookMove]:
+        '''Book moves of the position, the best scored first.'''
+        if game.game_state != GameState.RUNNING or game.size != self._size: return []
+        if not self._loaded: self.load()
+        if self._mmap is None: return []
+        turn = 0 if game.current_cell == Cell.P1 else 1
+        key, rotated = canonical_key(self._size, (game.bitboard.stones(Cell.P1), game.bitboard.stones(Cell.P2)), turn)
+
+        # Lower bound of the key, then every entry with it
+        low, high = 0, self._entries
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER_SIZE + middle*self._record
+            if self._mmap[offset:offset + self._key_length] < key: low = middle + 1
+            else: high = middle
+        cells = self._size*self._size
+        moves = []
+        offset = HEADER_SIZE + low*self._record
+        while offset < len(self._mmap) and self._mmap[offset:offset + self._key_length] == key:
+            move, games, wins = ENTRY.unpack_from(self._mmap, offset + self._key_length)
+            if rotated: move = cells-1-move
+            moves.append(BookMove(divmod(move, self._size), games, wins))
+            offset += self._record
+        moves.sort(key=lambda book_move: (-book_move.score, -book_move.games))
+        return moves
+
+    def best_move(self, game: Game) -> BookMove | None:
+        moves = [book_move for book_move in self.moves(game) if book_move.games >= self._min_games]
+        return moves[0] if moves else None
+
+    def load(self) -> None:
+        self._loaded = True
+        if not os.path.exists(self._path) or os.path.getsize(self._path) <= HEADER_SIZE: return
+        self._file = open(self._path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._mmap[:HEADER_SIZE]
+        if header[:4] != MAGIC or header[4] != VERSION or header[5] != self._size or header[6] != self._key_length:
+            self.close()
+            raise ValueError(f"{self._path} is not an opening book for {self._size}x{self._size}")
+        self._entries = (len(self._mmap) - HEADER_SIZE) // self._record
+
+    def close(self) -> None:
+        if self._mmap is not None: self._mmap.close()
+        if self._file is not None: self._file.close()
+        self._mmap, self._file, self._entries, self._loaded = None, None, 0, False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __len__(self) -> int:
+        if not self._loaded: self.load()
+        return self._entries
+
+def engine_games(size: int, games: int, time_limit: float, plies: int) -> Iterable[GameRecord]:
+    '''Games of the alpha-beta engine against itself, from a random first move so the lines differ.'''
+    from engine.alphabeta import AlphaBeta
+    from engine.player import Player
+
+    engine = AlphaBeta(time_limit)
+    for _ in range(games):
+        game = Game(size)
+        game.player1, game.player2 = Player("P1"), Player("P2")
+        game.current_player_turn = game.player1
+        game.game_state = GameState.RUNNING
+        game.apply_move(*random.choice(game.legal_moves()))
+        # Past the book depth the game is finished quickly, only its result matters
+        while game.game_state == GameState.RUNNING:
+            if len(game.moves) >= plies: game.apply_move(*random.choice(game.legal_moves()))
+            else: game.apply_move(*engine.search(game).move)
+        yield GameRecord.from_game(game)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds the opening book from archived and engine games")
+    parser.add_argument("--size", type=int, default=11)
+    parser.add_argument("--plies", type=int, default=12, help="moves of each game added to the book")
+    parser.add_argument("--archive", default=ARCHIVE_PATH, help="game archive file")
+    parser.add_argument("--engine-games", type=int, default=0, help="also play games of the alpha-beta engine")
+    parser.add_argument("--time", type=float, default=0.5, help="seconds per move of the engine games")
+    parser.add_argument("--path", help=f"book file, {DEFAULT_DIRECTORY}/book-<size>.bin by default")
+    arguments = parser.parse_args()
+
+    builder = BookBuilder(arguments.size, arguments.plies)
+    builder.add_records(GameArchive(arguments.archive))
+    if arguments.engine_games:
+        builder.add_records(engine_games(arguments.size, arguments.engine_games, arguments.time, arguments.plies))
+    path = arguments.path or os.path.join(DEFAULT_DIRECTORY, f"book-{arguments.size}.bin")
+    print(f"{builder.write(path)} entries in {path}")
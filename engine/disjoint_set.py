@@ -0,0 +1,29 @@
+class DisjointSet:
+    '''Union-find over the cells of a board plus two virtual nodes for the player's edges.'''
+    def __init__(self, size: int) -> None:
+        self._parent: list[int] = list(range(size))
+        self._rank: list[int] = [0] * size
+
+    def find(self, x: int) -> int:
+        parent = self._parent
+        while parent[x] != x:
+            # Path halving
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b: return
+        if self._rank[a] < self._rank[b]: a, b = b, a
+        self._parent[b] = a
+        if self._rank[a] == self._rank[b]: self._rank[a] += 1
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+    def copy(self) -> 'DisjointSet':
+        other = DisjointSet.__new__(DisjointSet)
+        other._parent = self._parent.copy()
+        other._rank = self._rank.copy()
+        return other
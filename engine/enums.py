@@ -0,0 +1,12 @@
+from enum import Enum
+
+class GameState(Enum):
+    WAITING = 0
+    RUNNING = 1
+    ENDED = 2
+    WITHDRAWN = 3
+
+class Cell(Enum):
+    EMPTY = 0
+    P1 = 1
+    P2 = 2
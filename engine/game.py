@@ -0,0 +1,343 @@
+from typing import NotRequired, TypedDict
+
+from engine.bitboard import BitBoard, lowest_bit
+from engine.disjoint_set import DisjointSet
+from engine.enums import Cell, GameState
+from engine.player import Player
+from engine.snapshot import SnapshotError, decode_snapshot, encode_snapshot
+from engine.zobrist import zobrist_hash, zobrist_keys
+
+class dog_message(TypedDict):
+    match_status: str
+    # Index i*size + j of the marked cell, the receiver finds the winning path by itself
+    cell: int
+    # Position after the move: Game.state_hash, the stones on the board, and the snapshot taken by a receiver whose
+    # hash differs and who has fewer stones
+    hash: NotRequired[str]
+    ply: NotRequired[int]
+    board: NotRequired[str]
+
+class Game:
+    def __init__(self, size: int) -> None:
+        self._size: int = size
+        self._local_player: Player = None
+        # Equivalent to restarting the game
+        self._bitboard: BitBoard = BitBoard(size)
+        # Zobrist hash of the stones, updated by place_stone
+        self._zobrist_keys: tuple[tuple[int, ...], tuple[int, ...]] = zobrist_keys(size)
+        self._hash: int = 0
+        # Cell indices of the stones placed since the board was last set, in order
+        self._moves: list[int] = []
+        # Grid of Cells built on demand from the bitboard for the UI
+        self._board_view: list[list[Cell]] | None = None
+        self._player1: Player = None
+        self._player2: Player = None
+        self._current_player_turn: Player = None
+        self._winner: Player = None
+        self._game_state: GameState = GameState.WAITING
+        self._winning_path: list[tuple[int, int]] = None
+        # Cells size*size and size*size+1 are the virtual start and end edges of each player
+        self._connections: dict[Cell, DisjointSet] = self.empty_connections()
+
+    def make_move(self, i: int, j: int) -> dog_message | None:
+        if self.current_player_turn != self.local_player: return None
+        if move := self.apply_move(i, j):
+            move['hash'] = self.state_hash
+            move['ply'] = self.ply
+            move['board'] = self.snapshot()
+        return move
+
+    def apply_move(self, i: int, j: int) -> dog_message | None:
+        '''Marks the cell for the player in turn, whoever it is, and returns the move to be sent.'''
+        if self.game_state != GameState.RUNNING: return None
+        if not self._bitboard.is_empty(i, j): return None
+        
+        self.place_stone(i, j)
+
+        move = {'cell': i*self.size + j}
+        if winning_path := self.check_winner():
+            self.game_state = GameState.ENDED
+            self.winning_path = winning_path
+            self.winner = self.current_player_turn
+            move['match_status'] = 'finished'    
+        else:
+            self.switch_player_turn()
+            move['match_status'] = 'next'
+        
+        return move
+
+    def receive_move(self, a_move: dog_message) -> bool:
+        '''Applies the opponent's move, and returns True if the position had diverged from the opponent's and was
+        taken from the move's snapshot instead. Only a position with more stones than ours is taken, so a move
+        received twice or late never rolls back the moves played after it.'''
+        if 'cell' not in a_move:
+            # Moves sent by older clients, with the coordinates and the whole winning path. Malformed ones are
+            # ignored like the cells off the board below
+            if self.game_state != GameState.RUNNING: return False
+            if a_move.get('match_status') == 'finished':
+                path = a_move.get('winning_path')
+                if not isinstance(path, (list, tuple)) or not path: return False
+                winning_path = [self.board_cell(cell) for cell in path]
+                if None in winning_path: return False
+                self.game_state = GameState.ENDED
+                self.winning_path = winning_path
+                self.winner = self.current_player_turn
+            elif (cell := self.board_cell(a_move.get('marked_cell'))) and self._bitboard.is_empty(*cell):
+                self.place_stone(*cell)
+                self.switch_player_turn()
+            return False
+
+        cell = a_move['cell']
+        if isinstance(cell, int) and 0 <= cell < self.size*self.size: self.apply_move(*divmod(cell, self.size))
+        if 'board' not in a_move or a_move.get('hash') == self.state_hash: return False
+        if self.game_state not in (GameState.RUNNING, GameState.ENDED): return False
+        ply = a_move.get('ply')
+        if not isinstance(ply, int) or ply <= self.ply: return False
+        try: self.restore(a_move['board'], ply)
+        except SnapshotError: return False
+        return True
+
+    def board_cell(self, cell: object) -> tuple[int, int] | None:
+        '''Coordinates of a cell received as a pair, None unless it is on the board.'''
+        if not isinstance(cell, (list, tuple)) or len(cell) != 2: return None
+        i, j = cell
+        if not isinstance(i, int) or not isinstance(j, int): return None
+        return (i, j) if 0 <= i < self.size and 0 <= j < self.size else None
+
+    def snapshot(self) -> str:
+        turn = self.current_cell.value if self.game_state == GameState.RUNNING else 0
+        return encode_snapshot(self.size, (self._bitboard.stones(Cell.P1), self._bitboard.stones(Cell.P2)), turn)
+
+    def restore(self, snapshot: str, ply: int | None = None) -> None:
+        '''Takes the position of a snapshot, checked to hold `ply` stones if given. The moves played before it are
+        forgotten, so `moves` no longer holds the whole game.'''
+        stones, turn = decode_snapshot(self.size, snapshot)
+        if ply is not None and (stones[0] | stones[1]).bit_count() != ply:
+            raise SnapshotError(f"Snapshot does not hold {ply} stones")
+        bitboard = BitBoard(self.size, stones)
+        winning_path = None
+        if not turn:
+            winning_path = bitboard.shortest_path(Cell.P1) or bitboard.shortest_path(Cell.P2)
+            if not winning_path: raise SnapshotError("Snapshot of an ended game without a winner")
+            turn = bitboard.get(*winning_path[0]).value
+        self.bitboard = bitboard
+        self.current_player_turn = self.player1 if turn == Cell.P1.value else self.player2
+        self.winner = self.current_player_turn if winning_path else None
+        self.winning_path = winning_path
+        self.game_state = GameState.ENDED if winning_path else GameState.RUNNING
+
+    def legal_moves(self) -> list[tuple[int, int]]:
+        if self.game_state != GameState.RUNNING: return []
+        empty = self._bitboard.masks.full & ~self._bitboard.occupied
+        moves = []
+        while empty:
+            moves.append(divmod(lowest_bit(empty), self.size))
+            empty &= empty - 1
+        return moves
+
+    def clone(self) -> 'Game':
+        '''Independent copy of the position, sharing the Player objects.'''
+        game = Game.__new__(Game)
+        game.__dict__.update(self.__dict__)
+        game._bitboard = self._bitboard.copy()
+        game._board_view = None
+        game._connections = {cell: connections.copy() for cell, connections in self._connections.items()}
+        game._moves = list(self._moves)
+        game._winning_path = list(self._winning_path) if self._winning_path else self._winning_path
+        return game
+
+    def serialize(self) -> dict:
+        players = [self.player1, self.player2]
+
+        def player_number(player: Player | None) -> int:
+            return next((k+1 for k, p in enumerate(players) if p is not None and p is player), 0)
+
+        return {
+            'size': self.size,
+            'stones': [self._bitboard.stones(Cell.P1), self._bitboard.stones(Cell.P2)],
+            'state': self.game_state.value,
+            'players': [[p.name, p.hue] if p is not None else None for p in players],
+            'turn': player_number(self.current_player_turn),
+            'local': player_number(self.local_player),
+            'winner': player_number(self.winner),
+        }
+
+    @classmethod
+    def deserialize(cls, data: dict, player_class: type[Player] = Player) -> 'Game':
+        game = cls(data['size'])
+        game.bitboard = BitBoard(data['size'], tuple(data['stones']))
+        players = [player_class(*p) if p is not None else None for p in data['players']]
+        game.player1, game.player2 = players
+        game.current_player_turn = players[data['turn']-1] if data['turn'] else None
+        game.local_player = players[data['local']-1] if data['local'] else None
+        game.winner = players[data['winner']-1] if data['winner'] else None
+        game.game_state = GameState(data['state'])
+        if game.winner is not None:
+            game.winning_path = game.bitboard.shortest_path(Cell.P1 if game.winner is game.player1 else Cell.P2)
+        return game
+
+    def receive_withdraw(self) -> None:
+        self.game_state = GameState.WITHDRAWN
+        self.winner = None
+
+    def place_stone(self, i: int, j: int) -> None:
+        '''Marks the cell for the current player and merges it with its neighboring stones.'''
+        cell = self.current_cell
+        self._bitboard.place(i, j, cell)
+        if self._board_view is not None: self._board_view[i][j] = cell
+        index = i*self.size + j
+        self._hash ^= self._zobrist_keys[cell.value-1][index]
+        self._moves.append(index)
+
+        connections = self._connections[cell]
+        same_color = self._bitboard.masks.neighbors[index] & self._bitboard.stones(cell)
+        while same_color:
+            connections.union(index, lowest_bit(same_color))
+            same_color &= same_color - 1
+
+        # Player 1 connects the first and last columns, player 2 the first and last rows
+        edge = j if cell == Cell.P1 else i
+        if edge == 0: connections.union(index, self.size*self.size)
+        if edge == self.size-1: connections.union(index, self.size*self.size + 1)
+
+    def check_winner(self):
+        cell = self.current_cell
+        if not self._connections[cell].connected(self.size*self.size, self.size*self.size + 1): return None
+        return self._bitboard.shortest_path(cell)
+
+    def cell_neighbors(self, i, j) -> tuple[tuple[int, int], ...]:
+        return self._bitboard.masks.neighbor_cells[i*self.size + j]
+
+    def restart(self):
+        self.bitboard = BitBoard(self.size)
+        self.player1 = None
+        self.player2 = None
+        self.current_player_turn = None
+        self.winner = None
+        self.game_state = GameState.WAITING
+        self.winning_path = None
+
+    def empty_connections(self) -> dict[Cell, DisjointSet]:
+        return {cell: DisjointSet(self.size*self.size + 2) for cell in (Cell.P1, Cell.P2)}
+
+    def switch_player_turn(self):
+        self.current_player_turn = self.player1 if self.current_player_turn == self.player2 else self.player2
+
+    @property
+    def size(self) -> int:
+        return self._size
+    
+    @property
+    def local_player(self) -> Player:
+        return self._local_player
+
+    @property
+    def current_cell(self) -> Cell:
+        '''Cell marked by the player in turn.'''
+        return Cell.P1 if self.current_player_turn == self.player1 else Cell.P2
+
+    @property
+    def board(self) -> list[list[Cell]]:
+        if self._board_view is None: self._board_view = self._bitboard.to_grid()
+        return self._board_view
+
+    @property
+    def bitboard(self) -> BitBoard:
+        return self._bitboard
+
+    @property
+    def moves(self) -> list[int]:
+        return self._moves
+
+    @property
+    def ply(self) -> int:
+        '''Stones on the board, which only grows during a game.'''
+        return self._bitboard.occupied.bit_count()
+
+    @property
+    def hash(self) -> int:
+        '''Zobrist hash of the stones on the board, the same for equal positions whatever the move order.'''
+        return self._hash
+
+    @property
+    def state_hash(self) -> str:
+        '''The hash as sent with each move.'''
+        return format(self._hash, '016x')
+    
+    @property
+    def player1(self) -> Player:
+        return self._player1
+
+    @property
+    def player2(self) -> Player:
+        return self._player2
+    
+    @property
+    def current_player_turn(self) -> Player | None:
+        return self._current_player_turn
+
+    @property
+    def winner(self) -> Player | None:
+        return self._winner
+
+    @property
+    def game_state(self) -> GameState:
+        return self._game_state
+
+    @property
+    def winning_path(self) -> list[tuple[int, int]]:
+        return self._winning_path
+
+    @local_player.setter
+    def local_player(self, player: Player) -> None:
+        self._local_player = player
+
+    @board.setter
+    def board(self, board: list[list[Cell]]) -> None:
+        self.bitboard = BitBoard.from_grid(board)
+
+    @bitboard.setter
+    def bitboard(self, bitboard: BitBoard) -> None:
+        self._bitboard = bitboard
+        self._board_view = None
+        self._hash = zobrist_hash(self.size, (bitboard.stones(Cell.P1), bitboard.stones(Cell.P2)))
+        self._moves = []
+        # Rebuild the connections for the new position
+        self._connections = self.empty_connections()
+        for cell in (Cell.P1, Cell.P2):
+            connections, stones = self._connections[cell], bitboard.stones(cell)
+            start, end = bitboard.edges(cell)
+            remaining = stones
+            while remaining:
+                index = lowest_bit(remaining)
+                remaining &= remaining - 1
+                same_color = bitboard.masks.neighbors[index] & stones
+                while same_color:
+                    connections.union(index, lowest_bit(same_color))
+                    same_color &= same_color - 1
+                if start >> index & 1: connections.union(index, self.size*self.size)
+                if end >> index & 1: connections.union(index, self.size*self.size + 1)
+    
+    @player1.setter
+    def player1(self, player: Player) -> None:
+        self._player1 = player
+
+    @player2.setter
+    def player2(self, player: Player) -> None:
+        self._player2 = player
+
+    @current_player_turn.setter
+    def current_player_turn(self, player: Player) -> None:
+        self._current_player_turn = player
+
+    @winner.setter
+    def winner(self, player: Player) -> None:
+        self._winner = player
+
+    @game_state.setter
+    def game_state(self, game_state: GameState) -> None:
+        self._game_state = game_state
+
+    @winning_path.setter
+    def winning_path(self, path: list[tuple[int, int]]) -> None:
+        self._winning_path = path
@@ -0,0 +1,171 @@
+'''Monte Carlo Tree Search player, with root parallel searches on a process pool.'''
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from engine.bitboard import BitBoard, board_masks, lowest_bit
+from engine.book import OpeningBook
+from engine.enums import Cell, GameState
+from engine.game import Game, dog_message
+
+class SearchResult(NamedTuple):
+    move: tuple[int, int]
+    playouts: int
+    elapsed: float
+    playouts_per_second: float
+    # Estimated probability of winning for the player in turn
+    value: float
+
+class Node:
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move: int | None, parent: 'Node | None', untried: list[int]) -> None:
+        self.move: int | None = move
+        self.parent: Node | None = parent
+        self.children: list[Node] = []
+        self.untried: list[int] = untried
+        self.visits: int = 0
+        # Wins of the player who made the move leading to this node
+        self.wins: int = 0
+
+def bits(mask: int) -> list[int]:
+    cells = []
+    while mask:
+        cells.append(lowest_bit(mask))
+        mask &= mask - 1
+    return cells
+
+def first_player_wins(board: BitBoard, stones: int) -> bool:
+    '''On a full board exactly one player is connected, so only the first one needs to be checked.'''
+    start, end = board.edges(Cell.P1)
+    region = stones & start
+    while region:
+        if region & end: return True
+        grown = board.dilate(region) & stones
+        if grown == region: return False
+        region = grown
+    return False
+
+def run_search(size: int, stones: tuple[int, int], turn: int, time_limit: float | None, playouts: int | None,
+               exploration: float, seed: int | None) -> tuple[dict[int, tuple[int, int]], int]:
+    '''Searches from a position with `turn` (0 or 1) to play, returns the visits and wins of each root move.'''
+    rng = random.Random(seed)
+    masks = board_masks(size)
+    board = BitBoard(size)
+    empty = masks.full & ~(stones[0] | stones[1])
+    root = Node(None, None, bits(empty))
+    rng.shuffle(root.untried)
+
+    deadline = time.perf_counter() + time_limit if time_limit is not None else math.inf
+    count = 0
+    while (playouts is None or count < playouts) and (count % 64 or time.perf_counter() < deadline):
+        node, current, player = root, list(stones), turn
+        # Selection
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(
+                node.children,
+                key=lambda child: child.wins/child.visits + exploration*math.sqrt(log_visits/child.visits)
+            )
+            current[player] |= 1 << node.move
+            player ^= 1
+        # Expansion
+        if node.untried:
+            move = node.untried.pop()
+            current[player] |= 1 << move
+            player ^= 1
+            child = Node(move, node, bits(masks.full & ~(current[0] | current[1])))
+            rng.shuffle(child.untried)
+            node.children.append(child)
+            node = child
+        # Playout, filling the rest of the board at random
+        remaining = bits(masks.full & ~(current[0] | current[1]))
+        rng.shuffle(remaining)
+        first = current[0]
+        for k in (remaining[0::2] if player == 0 else remaining[1::2]): first |= 1 << k
+        winner = 0 if first_player_wins(board, first) else 1
+        # Backpropagation, each node is scored for the player who moved into it
+        mover = player ^ 1
+        while node is not None:
+            node.visits += 1
+            if winner == mover: node.wins += 1
+            mover ^= 1
+            node = node.parent
+        count += 1
+    return {child.move: (child.visits, child.wins) for child in root.children}, count
+
+class MCTS:
+    '''Plays the move most visited by `workers` independent searches, each limited by time and/or playouts.
+    Positions in the opening book are played from it without searching.'''
+    def __init__(self, time_limit: float | None = 1.0, playouts: int | None = None, workers: int | None = None,
+                 exploration: float = 1.4, book: OpeningBook | None = None) -> None:
+        if time_limit is None and playouts is None: raise ValueError("MCTS needs a time limit or a number of playouts")
+        self._time_limit: float | None = time_limit
+        self._playouts: int | None = playouts
+        self._workers: int = workers or os.cpu_count() or 1
+        self._exploration: float = exploration
+        self._book: OpeningBook | None = book
+        self._pool: ProcessPoolExecutor | None = None
+        self._last_result: SearchResult | None = None
+
+    def search(self, game: Game) -> SearchResult | None:
+        if game.game_state != GameState.RUNNING: return None
+        start = time.perf_counter()
+        size = game.size
+        if self._book is not None and (book_move := self._book.best_move(game)):
+            elapsed = time.perf_counter() - start
+            self._last_result = SearchResult(book_move.move, 0, elapsed, 0.0, book_move.score)
+            return self._last_result
+        stones = (game.bitboard.stones(Cell.P1), game.bitboard.stones(Cell.P2))
+        turn = 0 if game.current_cell == Cell.P1 else 1
+
+        empty = bits(game.bitboard.masks.full & ~game.bitboard.occupied)
+        if len(empty) == 1:
+            self._last_result = SearchResult(divmod(empty[0], size), 0, 0.0, 0.0, 1.0)
+            return self._last_result
+
+        # Every worker gets the whole budget, they run at the same time
+        playouts = self._playouts
+        arguments = (size, stones, turn, self._time_limit, playouts, self._exploration)
+        if self._workers == 1:
+            results = [run_search(*arguments, None)]
+        else:
+            if self._pool is None: self._pool = ProcessPoolExecutor(self._workers)
+            seeds = [random.getrandbits(64) for _ in range(self._workers)]
+            results = list(self._pool.map(run_search, *zip(*[arguments + (seed,) for seed in seeds])))
+
+        visits: dict[int, list[int]] = {}
+        total = 0
+        for children, count in results:
+            total += count
+            for move, (move_visits, move_wins) in children.items():
+                merged = visits.setdefault(move, [0, 0])
+                merged[0] += move_visits
+                merged[1] += move_wins
+        move, (move_visits, move_wins) = max(visits.items(), key=lambda item: item[1][0])
+        elapsed = time.perf_counter() - start
+        self._last_result = SearchResult(
+            divmod(move, size), total, elapsed, total/elapsed if elapsed else 0.0, move_wins/move_visits
+        )
+        return self._last_result
+
+    def play(self, game: Game) -> dog_message | None:
+        '''Makes the move for the local player, returning it to be sent to DOG.'''
+        if game.current_player_turn != game.local_player: return None
+        if result := self.search(game): return game.make_move(*result.move)
+        return None
+
+    def close(self) -> None:
+        if self._pool is not None: self._pool.shutdown()
+        self._pool = None
+
+    @property
+    def last_result(self) -> SearchResult | None:
+        return self._last_result
+
+    @property
+    def workers(self) -> int:
+        return self._workers
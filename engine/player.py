@@ -0,0 +1,20 @@
+class Player:
+    def __init__(self, name, hue=-1) -> None:
+        self._name: str = name
+        self._hue: float = hue
+
+    @property
+    def name(self):
+        return self._name
+    
+    @property
+    def hue(self):
+        return self._hue
+    
+    @name.setter
+    def name(self, name):
+        self._name = name
+
+    @hue.setter
+    def hue(self, hue):
+        self._hue = hue
@@ -0,0 +1,17 @@
+'''Keys of positions in the tables kept on disk: a position and its 180° rotation share the key.'''
+
+def key_length(size: int) -> int:
+    '''Bytes of a key: the stones of both players and the player in turn.'''
+    return (2*size*size + 1 + 7) // 8
+
+def rotate(mask: int, cells: int) -> int:
+    '''180° rotation, cell k goes to cells-1-k. Each player keeps its edges, only swapped.'''
+    return int(format(mask, f"0{cells}b")[::-1], 2) if mask else 0
+
+def canonical_key(size: int, stones: tuple[int, int], turn: int) -> tuple[bytes, bool]:
+    '''The smaller key of the position and its rotation, big endian so bytes compare like the numbers, and whether
+    it is the rotation's. The moves leading to a position in any order, or to its rotation, share the key.'''
+    cells = size*size
+    key = (stones[0] << cells | stones[1]) << 1 | turn
+    rotated = (rotate(stones[0], cells) << cells | rotate(stones[1], cells)) << 1 | turn
+    return min(key, rotated).to_bytes(key_length(size), "big"), rotated < key
@@ -0,0 +1,27 @@
+'''Compact snapshot of a position, sent with every move so a client that missed moves catches up from one message:
+the cell value of the player in turn (0 once the game ended) followed by both players' stones in base64.'''
+import base64
+import binascii
+
+class SnapshotError(ValueError):
+    pass
+
+def snapshot_length(size: int) -> int:
+    '''Bytes of the stones of one player.'''
+    return (size*size + 7) // 8
+
+def encode_snapshot(size: int, stones: tuple[int, int], turn: int) -> str:
+    length = snapshot_length(size)
+    data = stones[0].to_bytes(length, "big") + stones[1].to_bytes(length, "big")
+    return str(turn) + base64.b64encode(data).decode("ascii")
+
+def decode_snapshot(size: int, snapshot: str) -> tuple[tuple[int, int], int]:
+    '''Stones of each player and the cell value of the player in turn, checked to be a position of the board.'''
+    if not isinstance(snapshot, str) or not snapshot or snapshot[0] not in "012": raise SnapshotError("Invalid snapshot")
+    try: data = base64.b64decode(snapshot[1:], validate=True)
+    except (binascii.Error, ValueError) as error: raise SnapshotError(str(error)) from error
+    length = snapshot_length(size)
+    if len(data) != 2*length: raise SnapshotError(f"Snapshot is not of a {size}x{size} board")
+    stones = int.from_bytes(data[:length], "big"), int.from_bytes(data[length:], "big")
+    if stones[0] & stones[1] or (stones[0] | stones[1]) >> size*size: raise SnapshotError("Snapshot has invalid stones")
+    return stones, int(snapshot[0])
@@ -0,0 +1,244 @@
+'''Exact solver for small boards, with the solved positions kept in a sorted file read through mmap.
+
+    python -m engine.solver --size 4
+'''
+import argparse
+import heapq
+import mmap
+import os
+import time
+from functools import lru_cache
+
+from engine.bitboard import BitBoard
+from engine.enums import Cell, GameState
+from engine.game import Game
+from engine.player import Player
+from engine.position_key import canonical_key, key_length
+
+MAX_SIZE = 5
+DEFAULT_DIRECTORY = "data"
+# Header: magic, format version, board size, key length and the number of sorted records. Then the records of key
+# bytes and one result byte: the sorted ones, followed by the ones appended by later saves in any order
+MAGIC = b"HEXS"
+VERSION = 2
+HEADER_SIZE = 16
+# Appended records are merged into the sorted ones once they reach this fraction of them
+COMPACT_FRACTION = 0.25
+
+class SolverLimit(Exception):
+    '''The node limit was reached before the position was solved.'''
+
+@lru_cache(maxsize=None)
+def move_order(size: int) -> tuple[int, ...]:
+    '''Cells from the center outwards, central moves decide most positions.'''
+    center = (size-1) / 2
+    return tuple(sorted(range(size*size), key=lambda k: abs(k//size - center) + abs(k % size - center)))
+
+def chain(board: BitBoard, seed: int, stones: int) -> int:
+    region = seed & stones
+    while (grown := board.dilate(region) & stones) != region: region = grown
+    return region
+
+def winning_cells(board: BitBoard, own: int, cell: Cell, empty: int) -> int:
+    '''Empty cells that connect the player's edges at once: touching both the chains of the start and end edges.'''
+    start, end = board.edges(cell)
+    return empty & (board.dilate(chain(board, start, own)) | start) & (board.dilate(chain(board, end, own)) | end)
+
+class Solver:
+    '''Solves positions of one board size by negamax over every reply, stopping as soon as a win is found.
+
+    Cutoffs: a player with a move that connects its edges wins, a player facing two such moves of the opponent
+    loses, and a player facing one can only block it. Results are kept by canonical key, so a position and its
+    180° rotation are solved once, and save adds them to the file for the next runs.
+    '''
+    def __init__(self, size: int, path: str | None = None, node_limit: int | None = None) -> None:
+        if size > MAX_SIZE: raise ValueError(f"Solver supports boards up to {MAX_SIZE}x{MAX_SIZE}")
+        self._size: int = size
+        self._path: str = path or os.path.join(DEFAULT_DIRECTORY, f"solved-{size}.bin")
+        self._node_limit: int | None = node_limit
+        self._board: BitBoard = BitBoard(size)
+        self._key_length: int = key_length(size)
+        # Results solved since the file was written
+        self._results: dict[bytes, bool] = {}
+        # Opened on the first lookup, so creating a Solver costs nothing
+        self._file = None
+        self._mmap: mmap.mmap | None = None
+        self._records: int = 0
+        # Records after the sorted ones, read at once
+        self._appended: dict[bytes, bool] = {}
+        self._loaded: bool = False
+        self._nodes: int = 0
+
+    def wins(self, game: Game) -> bool | None:
+        '''Whether the player in turn wins with perfect play, None if the node limit was reached.'''
+        if game.game_state != GameState.RUNNING or game.size != self._size: return None
+        self._nodes = 0
+        try: return self.solve(self.position(game), self.turn(game))
+        except SolverLimit: return None
+
+    def winning_moves(self, game: Game) -> list[tuple[int, int]] | None:
+        '''Every move that keeps a won position won, or None if the node limit was reached. Empty when the
+        player in turn loses whatever it plays.'''
+        if game.game_state != GameState.RUNNING or game.size != self._size: return None
+        stones, turn = self.position(game), self.turn(game)
+        cell = Cell.P1 if turn == 0 else Cell.P2
+        self._nodes = 0
+        moves = []
+        try:
+            empty = self._board.masks.full & ~(stones[0] | stones[1])
+            immediate = winning_cells(self._board, stones[turn], cell, empty)
+            for move in move_order(self._size):
+                if not empty >> move & 1: continue
+                if immediate >> move & 1 or not self.solve(self.child(stones, turn, move), turn ^ 1):
+                    moves.append(divmod(move, self._size))
+        except SolverLimit:
+            return None
+        return moves
+
+    def solve(self, stones: tuple[int, int], turn: int) -> bool:
+        key, _ = canonical_key(self._size, stones, turn)
+        result = self.lookup(key)
+        if result is None:
+            result = self.search(stones, turn)
+            self._results[key] = result
+        return result
+
+    def search(self, stones: tuple[int, int], turn: int) -> bool:
+        self._nodes += 1
+        if self._node_limit is not None and self._nodes > self._node_limit: raise SolverLimit
+        board = self._board
+        empty = board.masks.full & ~(stones[0] | stones[1])
+        own_cell, other_cell = (Cell.P1, Cell.P2) if turn == 0 else (Cell.P2, Cell.P1)
+        if winning_cells(board, stones[turn], own_cell, empty): return True
+
+        threats = winning_cells(board, stones[turn ^ 1], other_cell, empty)
+        if threats & (threats - 1): return False
+        # A single threat must be blocked
+        candidates = threats or empty
+        for move in move_order(self._size):
+            if candidates >> move & 1 and not self.solve(self.child(stones, turn, move), turn ^ 1): return True
+        return False
+
+    def lookup(self, key: bytes) -> bool | None:
+        if key in self._results: return self._results[key]
+        if not self._loaded: self.load()
+        if key in self._appended: return self._appended[key]
+        if self._mmap is None: return None
+        # Binary search over the sorted records
+        record = self._key_length + 1
+        low, high = 0, self._records
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER_SIZE + middle*record
+            stored = self._mmap[offset:offset + self._key_length]
+            if stored == key: return self._mmap[offset + self._key_length] == 1
+            if stored < key: low = middle + 1
+            else: high = middle
+        return None
+
+    def load(self) -> None:
+        self._loaded = True
+        if not os.path.exists(self._path) or os.path.getsize(self._path) <= HEADER_SIZE: return
+        self._file = open(self._path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._mmap[:HEADER_SIZE]
+        record = self._key_length + 1
+        # A save cut short leaves a partial record at the end, ignored
+        end = HEADER_SIZE + (len(self._mmap) - HEADER_SIZE) // record * record
+        self._records = int.from_bytes(header[8:], "big")
+        if header[:4] != MAGIC or header[4] != VERSION or header[5] != self._size or header[6] != self._key_length \
+                or HEADER_SIZE + self._records*record > end:
+            self.close()
+            raise ValueError(f"{self._path} is not a table of solved {self._size}x{self._size} positions")
+        for offset in range(HEADER_SIZE + self._records*record, end, record):
+            self._appended[self._mmap[offset:offset + self._key_length]] = self._mmap[offset + self._key_length] == 1
+
+    def save(self) -> None:
+        '''Appends the new results to the file. Once the appended records are COMPACT_FRACTION of the sorted ones,
+        merges them all into a new sorted file instead, written aside and then renamed over it.'''
+        if not self._results: return
+        if not self._loaded: self.load()
+        record = self._key_length + 1
+        if self._mmap is not None and len(self._appended) + len(self._results) < COMPACT_FRACTION*self._records:
+            with open(self._path, "r+b") as file:
+                file.seek(HEADER_SIZE + (self._records + len(self._appended))*record)
+                file.truncate()
+                file.write(b"".join(key + bytes((result,)) for key, result in self._results.items()))
+            self._appended.update(self._results)
+            self._results.clear()
+            return
+        stored = (
+            (self._mmap[offset:offset + self._key_length], self._mmap[offset + self._key_length])
+            for offset in range(HEADER_SIZE, HEADER_SIZE + self._records*record, record)
+        ) if self._mmap is not None else iter(())
+        new = sorted((key, int(result)) for key, result in (self._appended | self._results).items())
+
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        temporary = self._path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(MAGIC + bytes((VERSION, self._size, self._key_length, 0)) + bytes(8))
+            previous, records = None, 0
+            for key, result in heapq.merge(stored, new):
+                if key == previous: continue
+                file.write(key + bytes((result,)))
+                previous, records = key, records + 1
+            file.seek(8)
+            file.write(records.to_bytes(8, "big"))
+        self.close()
+        os.replace(temporary, self._path)
+        self._results.clear()
+
+    def close(self) -> None:
+        if self._mmap is not None: self._mmap.close()
+        if self._file is not None: self._file.close()
+        self._mmap, self._file, self._records, self._loaded = None, None, 0, False
+        self._appended = {}
+
+    def position(self, game: Game) -> tuple[int, int]:
+        return game.bitboard.stones(Cell.P1), game.bitboard.stones(Cell.P2)
+
+    @staticmethod
+    def turn(game: Game) -> int:
+        return 0 if game.current_cell == Cell.P1 else 1
+
+    @staticmethod
+    def child(stones: tuple[int, int], turn: int, move: int) -> tuple[int, int]:
+        if turn == 0: return stones[0] | 1 << move, stones[1]
+        return stones[0], stones[1] | 1 << move
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def nodes(self) -> int:
+        return self._nodes
+
+    @property
+    def solved(self) -> int:
+        '''Positions in the file and solved since, without the duplicates.'''
+        if not self._loaded: self.load()
+        return self._records + len(self._appended) + len(self._results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solves every position reachable from the empty board")
+    parser.add_argument("--size", type=int, default=4)
+    parser.add_argument("--path", help=f"table file, {DEFAULT_DIRECTORY}/solved-<size>.bin by default")
+    arguments = parser.parse_args()
+
+    solver = Solver(arguments.size, arguments.path)
+    game = Game(arguments.size)
+    # Either player may start, the position is the same apart from the turn
+    game.player1, game.player2 = Player("P1"), Player("P2")
+    game.game_state = GameState.RUNNING
+    start = time.perf_counter()
+    for first in (game.player1, game.player2):
+        game.current_player_turn = first
+        moves = solver.winning_moves(game)
+        print(f"{'Player 1' if first is game.player1 else 'Player 2'} starting wins with {moves}")
+    solver.save()
+    print(f"{solver.solved} positions in {solver.path}, {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,98 @@
+'''Fixed size table of search results keyed by Zobrist hash, shared by the engines.'''
+from typing import Any, NamedTuple
+
+class TableStats(NamedTuple):
+    hits: int
+    misses: int
+    stores: int
+    # Stores that replaced an entry of another position, and stores refused to keep a more valuable entry
+    replacements: int
+    rejections: int
+    used: int
+    capacity: int
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+class TranspositionTable:
+    '''Each key has a single slot, chosen by its low bits, so the memory used never grows past the capacity.
+
+    An entry of another position in the slot is replaced when it was stored in an older search, see new_search,
+    or when it was searched no deeper than the new entry. Otherwise the new entry is dropped.
+    '''
+    __slots__ = ('_mask', '_keys', '_values', '_depths', '_generations', '_generation',
+                 '_hits', '_misses', '_stores', '_replacements', '_rejections', '_used')
+
+    def __init__(self, capacity: int = 1 << 20) -> None:
+        # Rounded up to a power of 2 so the slot is found with a mask
+        capacity = 1 << max(0, capacity-1).bit_length()
+        self._mask: int = capacity - 1
+        self._keys: list[int | None] = [None] * capacity
+        self._values: list[Any] = [None] * capacity
+        self._depths: list[int] = [0] * capacity
+        self._generations: list[int] = [0] * capacity
+        self._generation: int = 0
+        self._hits: int = 0
+        self._misses: int = 0
+        self._stores: int = 0
+        self._replacements: int = 0
+        self._rejections: int = 0
+        self._used: int = 0
+
+    def get(self, key: int, depth: int = 0) -> Any:
+        '''Value stored for the key with at least `depth`, or None.'''
+        slot = key & self._mask
+        if self._keys[slot] == key and self._depths[slot] >= depth:
+            self._hits += 1
+            return self._values[slot]
+        self._misses += 1
+        return None
+
+    def store(self, key: int, value: Any, depth: int = 0) -> bool:
+        '''Returns False if a more valuable entry kept the slot.'''
+        slot = key & self._mask
+        stored = self._keys[slot]
+        if stored is None:
+            self._used += 1
+        elif stored != key:
+            if self._generations[slot] == self._generation and self._depths[slot] > depth:
+                self._rejections += 1
+                return False
+            self._replacements += 1
+        elif self._depths[slot] > depth and self._generations[slot] == self._generation:
+            # The same position already searched deeper
+            return False
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._depths[slot] = depth
+        self._generations[slot] = self._generation
+        self._stores += 1
+        return True
+
+    def new_search(self) -> None:
+        '''Entries stored before are kept, but any new entry can replace them.'''
+        self._generation += 1
+
+    def clear(self) -> None:
+        capacity = self._mask + 1
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._depths = [0] * capacity
+        self._generations = [0] * capacity
+        self._used = 0
+
+    def reset_stats(self) -> None:
+        self._hits = self._misses = self._stores = self._replacements = self._rejections = 0
+
+    @property
+    def stats(self) -> TableStats:
+        return TableStats(self._hits, self._misses, self._stores, self._replacements, self._rejections,
+                          self._used, self._mask + 1)
+
+    @property
+    def capacity(self) -> int:
+        return self._mask + 1
+
+    def __len__(self) -> int:
+        return self._used
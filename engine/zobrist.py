@@ -0,0 +1,18 @@
+'''Zobrist hashing, a 64 bit key of a position that is updated with one xor per stone.'''
+import random
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size: int) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    '''Random key of each cell for player 1 and player 2. Seeded by the size, so every process and run agrees.'''
+    rng = random.Random(f"hex-zobrist-{size}")
+    return tuple(tuple(rng.getrandbits(64) for _ in range(size*size)) for _ in range(2))
+
+def zobrist_hash(size: int, stones: tuple[int, int]) -> int:
+    keys = zobrist_keys(size)
+    result = 0
+    for player, mask in enumerate(stones):
+        while mask:
+            result ^= keys[player][(mask & -mask).bit_length() - 1]
+            mask &= mask - 1
+    return result
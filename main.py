@@ -1,36 +1,26 @@
-from enum import Enum
-from typing import TypedDict, Optional
-
+import math
+import os
+import threading
+import time
 import tkinter as tk
+from collections import deque
 from tkinter import simpledialog
 from themes import *
 from colorsys import hsv_to_rgb
 from dog.dog_interface import DogPlayerInterface
 from dog.dog_actor import DogActor
 from dog.start_status import StartStatus
+import engine
+from engine import Cell, Game, GameArchive, GameRecord, GameState, RecordError, dog_message, lowest_bit
+from engine.book import OpeningBook
+from engine.solver import MAX_SIZE as SOLVER_MAX_SIZE, Solver
 
 theme = Theme()
 
-class dog_message(TypedDict):
-    match_status: str
-    marked_cell: tuple[int, int]
-    winning_path: Optional[list[tuple[int, int]]]
-
-class GameState(Enum):
-    WAITING = 0
-    RUNNING = 1
-    ENDED = 2
-    WITHDRAWN = 3
-
-class Cell(Enum):
-    EMPTY = 0
-    P1 = 1
-    P2 = 2
-
-class Player:
+class Player(engine.Player):
+    '''Player with the colors used to draw its stones and borders.'''
     def __init__(self, name, hue=-1) -> None:
-        self._name: str = name
-        self._hue: float = hue
+        super().__init__(name, hue)
         self._color, self._piece_color = self.calculate_colors()
 
     def calculate_colors(self) -> tuple[str, str]:
@@ -48,10 +38,6 @@ class Player:
         self._color, self._piece_color =  "#" + r1 + g1 + b1, "#" + r + g + b
         return self._color, self._piece_color
 
-    @property
-    def name(self):
-        return self._name
-    
     @property
     def color(self):
         return self._color
@@ -59,195 +45,234 @@ class Player:
     @property
     def piece_color(self):
         return self._piece_color
-    
-    @property
-    def hue(self):
-        return self._hue
-    
-    @name.setter
-    def name(self, name):
-        self._name = name
 
-    @hue.setter
+    @engine.Player.hue.setter
     def hue(self, hue):
         self._hue = hue
         self.calculate_colors()
 
-class Game:
-    def __init__(self, size: int) -> None:
+class BoardGeometry:
+    '''Canvas coordinates of every hexagon and border of a board, computed once per board size.'''
+    def __init__(self, size: int, side: float = theme.HEX_SIDE_SIZE, side_root_3: float = theme.HEX_SIDE_SIZE_ROOT_3,
+                 canvas_height: float = theme.CANVAS_SIZE_Y, padding: float = theme.CANVAS_PADDING) -> None:
         self._size: int = size
-        self._local_player: Player = None
-        # Equivalent to restarting the game
-        self._board: list[list[Cell]] = [[Cell.EMPTY for _ in range(size)] for _ in range(size)]
-        self._player1: Player = None
-        self._player2: Player = None
-        self._current_player_turn: Player = None
-        self._winner: Player = None
-        self._game_state: GameState = GameState.WAITING
-        self._winning_path: list[tuple[int, int]] = None
-
-    def make_move(self, i: int, j: int) -> dog_message | None:
-        if self.game_state != GameState.RUNNING: return None
-        if self.current_player_turn != self.local_player: return None
-        if self.board[i][j] != Cell.EMPTY: return None
-        
-        self.board[i][j] = Cell.P1 if self.current_player_turn == self.player1 else Cell.P2
-
-        move = {}
-        if winning_path := self.check_winner():
-            self.game_state = GameState.ENDED
-            self.winning_path = winning_path
-            self.winner = self.local_player
-            move['winning_path'] = winning_path
-            move['match_status'] = 'finished'    
-        else:
-            self.switch_player_turn()
-            move['marked_cell'] = (i, j)
-            move['match_status'] = 'next'
-        
-        return move
+        self._side: float = side
+        self._side_root_3: float = side_root_3
+        self._canvas_height: float = canvas_height
+        self._padding: float = padding
 
-    def receive_move(self, a_move: dog_message) -> None:
-        if a_move['match_status'] == 'finished':
-            self.game_state = GameState.ENDED
-            self.winning_path = a_move['winning_path']
-            self.winner = self.current_player_turn
-        else:
-            i, j = a_move['marked_cell']
-            self.board[i][j] = Cell.P1 if self.current_player_turn == self.player1 else Cell.P2
-            self.switch_player_turn()
-
-    def receive_withdraw(self) -> None:
-        self.game_state = GameState.WITHDRAWN
-        self.winner = None
-
-    def check_winner(self):
-        queue, goal, cell = [], [], None
-        if self.current_player_turn == self.player1:
-            cell = Cell.P1
-            for i in range(self.size):
-                if self.board[i][0] == cell: queue.append((i, 0))
-                if self.board[i][self.size-1] == cell: goal.append((i, self.size-1))
-        else:
-            cell = Cell.P2
-            for i in range(self.size):
-                if self.board[0][i] == cell: queue.append((0, i))
-                if self.board[self.size-1][i] == cell: goal.append((self.size-1, i))
-
-        if not queue or not goal: return None
-
-        current_cell = None
-        bfs_visited = set(queue)
-        bfs_tree = {}
-
-        while queue:
-            current_cell = queue.pop(0)
-            if current_cell in goal: break
-
-            for neighbor in self.cell_neighbors(*current_cell):
-                if (neighbor not in bfs_visited) and self._board[neighbor[0]][neighbor[1]] == cell:
-                    bfs_tree[neighbor] = current_cell
-                    queue.append(neighbor)
-                    bfs_visited.add(neighbor)
-        else:
-            return None
-        # Use the bfs tree to find the path from start to end
-        path = [current_cell]
-        while path[-1] in bfs_tree: path.append(bfs_tree[path[-1]])
-
-        return path
-
-    def cell_neighbors(self, i, j) -> set[tuple[int, int]]:
-        neighbors = set()
-        for x in range(-1, 2):
-            for y in range(-1, 2):
-                if (x == y == 0) or (x == -1 and y == -1) or (x == 1 and y == 1): continue
-                if x+i < 0 or x+i >= self.size or y+j < 0 or y+j >= self.size: continue
-                neighbors.add((x+i, y+j))
-
-        return neighbors
-
-    def restart(self):
-        self.board = [[Cell.EMPTY for _ in range(self.size)] for _ in range(self.size)]
-        self.player1 = None
-        self.player2 = None
-        self.current_player_turn = None
-        self.winner = None
-        self.game_state = GameState.WAITING
-        self.winning_path = None
-
-    def switch_player_turn(self):
-        self.current_player_turn = self.player1 if self.current_player_turn == self.player2 else self.player2
+        self._starting_points: list[tuple[float, float]] = [
+            self.compute_starting_point(i, j) for i in range(size) for j in range(size)
+        ]
+        self._hexagons: list[tuple[float, ...]] = [self.compute_hexagon(x, y) for x, y in self._starting_points]
+        self._player1_border, self._player2_border = self.compute_borders()
+
+    def convert_ij(self, i: int, j: int) -> tuple[int, int]:
+        '''Board coordinates to (column, position in column) of the drawn, tilted board.'''
+        return i + j, (i if i + j < self._size else self._size - 1 - j)
+
+    def compute_starting_point(self, i: int, j: int) -> tuple[float, float]:
+        i, j = self.convert_ij(i, j)
+
+        n = self._size - abs(i+1-self._size)
+
+        x = i*1.5*self._side
+        y = (self._canvas_height - n*self._side_root_3)/2
+
+        y += j*self._side_root_3
+        x += self._padding
+
+        return x, y
+
+    def compute_hexagon(self, x: float, y: float) -> tuple[float, ...]:
+        side, side_root_3 = self._side, self._side_root_3
+        return (
+            x, self.fix_y(y + side_root_3/2),
+            x + 0.5*side, self.fix_y(y + side_root_3),
+            x + 1.5*side, self.fix_y(y + side_root_3),
+            x + 2.0*side, self.fix_y(y + side_root_3/2),
+            x + 1.5*side, self.fix_y(y),
+            x + 0.5*side, self.fix_y(y),
+        )
+
+    def compute_borders(self) -> tuple[tuple[float, ...], tuple[float, ...]]:
+        start_coords = (
+            self.starting_point(0, 0),
+            self.starting_point(0, self._size-1),
+            self.starting_point(self._size-1, 0),
+            self.starting_point(self._size-1, self._size-1)
+        )
+
+        offsets = (
+            (-self._side, self._side_root_3/2),
+            (self._side, -self._side_root_3*1/6),
+            (1*self._side, self._side_root_3*7/6),
+            (3*self._side, self._side_root_3/2)
+        )
+        coords = [[x+y for x, y in zip(start, offset)] for start, offset in zip(start_coords, offsets)]
+
+        player1_border = (*coords[0], *coords[1], *coords[2], *coords[3])
+        player2_border = (*coords[1], *coords[3], *coords[0], *coords[2])
+        return player1_border, player2_border
+
+    def fix_y(self, y: float) -> float:
+        return self._canvas_height - y
+
+    def cell_at(self, x: float, y: float) -> tuple[int, int] | None:
+        '''Board cell under a canvas point, or None outside the board.'''
+        # Hexagon centers are at x = padding + side + 1.5*side*(i+j) and y = (height - side_root_3*(i-j))/2,
+        # which are axial coordinates (q, r) = (i+j, -j) of a flat topped hexagonal grid
+        q = (x - self._padding - self._side) / (1.5*self._side)
+        r = -(q - (self._canvas_height - 2*y) / self._side_root_3) / 2
+        s = -q - r
+        rq, rr, rs = round(q), round(r), round(s)
+        dq, dr, ds = abs(rq - q), abs(rr - r), abs(rs - s)
+        if dq > dr and dq > ds: rq = -rr - rs
+        elif dr > ds: rr = -rq - rs
+
+        i, j = rq + rr, -rr
+        if 0 <= i < self._size and 0 <= j < self._size: return i, j
+        return None
+
+    def center(self, i: int, j: int) -> tuple[float, float]:
+        x, y = self.starting_point(i, j)
+        return x + self._side, self.fix_y(y + self._side_root_3/2)
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        '''Smallest rectangle around the hexagons, the borders stick out of it. The corner cells reach every side.'''
+        last = self._size - 1
+        corners = [self.hexagon(i, j) for i, j in ((0, 0), (0, last), (last, 0), (last, last))]
+        xs = [x for hexagon in corners for x in hexagon[::2]]
+        ys = [y for hexagon in corners for y in hexagon[1::2]]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def cells_in(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        '''Indices of the cells with any part inside the rectangle, found from its corners without visiting the others.'''
+        # Columns of the drawn board are q = i+j and rows d = i-j, from the centers used by cell_at
+        first = self._padding + self._side
+        q_range = range(max(0, math.floor((x0 - first - self._side) / (1.5*self._side))),
+                        min(2*self._size - 2, math.ceil((x1 - first + self._side) / (1.5*self._side))) + 1)
+        d_low = math.floor((self._canvas_height - 2*y1 - self._side_root_3) / self._side_root_3)
+        d_high = math.ceil((self._canvas_height - 2*y0 + self._side_root_3) / self._side_root_3)
+        cells = []
+        last = 2*self._size - 2
+        for q in q_range:
+            low, high = max(d_low, -q, q - last), min(d_high, q, last - q)
+            # i and j are whole numbers only when q and d have the same parity
+            low += (low - q) % 2
+            cells.extend((q + d)//2*self._size + (q - d)//2 for d in range(low, high + 1, 2))
+        return cells
+
+    def brick(self, i: int, j: int) -> tuple[float, float, float, float]:
+        '''Rectangle standing for the cell when the board is too small for hexagons. The rectangles of a column
+        touch, and each column is shifted half a cell from the next, so they tile the board like the hexagons.'''
+        x, y = self.center(i, j)
+        return x - 0.75*self._side, y - self._side_root_3/2, x + 0.75*self._side, y + self._side_root_3/2
+
+    def starting_point(self, i: int, j: int) -> tuple[float, float]:
+        return self._starting_points[i*self._size + j]
+
+    def hexagon(self, i: int, j: int) -> tuple[float, ...]:
+        return self._hexagons[i*self._size + j]
 
     @property
     def size(self) -> int:
         return self._size
-    
-    @property
-    def local_player(self) -> Player:
-        return self._local_player
 
     @property
-    def board(self) -> list[list[Cell]]:
-        return self._board
-    
-    @property
-    def player1(self) -> Player:
-        return self._player1
+    def side(self) -> float:
+        return self._side
 
     @property
-    def player2(self) -> Player:
-        return self._player2
-    
-    @property
-    def current_player_turn(self) -> Player | None:
-        return self._current_player_turn
+    def player1_border(self) -> tuple[float, ...]:
+        return self._player1_border
 
     @property
-    def winner(self) -> Player | None:
-        return self._winner
+    def player2_border(self) -> tuple[float, ...]:
+        return self._player2_border
+
+class Viewport:
+    '''Zoom and pan of the canvas: a point (x, y) of BoardGeometry is drawn at (x*zoom + dx, y*zoom + dy).'''
+    def __init__(self, width: float, height: float) -> None:
+        self._width: float = width
+        self._height: float = height
+        self._zoom: float = 1.0
+        self._offset: tuple[float, float] = (0.0, 0.0)
+        self._min_zoom: float = 1.0
+        self._max_zoom: float = 1.0
+
+    def fit(self, bounds: tuple[float, float, float, float], side: float) -> None:
+        '''Shows the whole board, as large as it fits but no larger than the theme draws it, and lets zooming in
+        until a hexagon side reaches Theme.MAX_HEX_SIDE_SIZE.'''
+        x0, y0, x1, y1 = bounds
+        self._zoom = min(1.0, self._width / (x1 - x0), self._height / (y1 - y0))
+        # At the theme's size the board is where it was always drawn, smaller it is centered
+        if self._zoom == 1.0: self._offset = (0.0, 0.0)
+        else: self._offset = ((self._width - (x0 + x1)*self._zoom) / 2, (self._height - (y0 + y1)*self._zoom) / 2)
+        self._min_zoom = self._zoom
+        self._max_zoom = max(self._zoom, theme.MAX_HEX_SIDE_SIZE / side)
+
+    def zoom_at(self, factor: float, x: float, y: float) -> bool:
+        '''Zooms keeping the canvas point (x, y) over the same place of the board, False if already at the limit.'''
+        zoom = min(self._max_zoom, max(self._min_zoom, self._zoom*factor))
+        if zoom == self._zoom: return False
+        world_x, world_y = self.to_world(x, y)
+        self._zoom = zoom
+        self._offset = (x - world_x*zoom, y - world_y*zoom)
+        return True
+
+    def pan(self, dx: float, dy: float) -> None:
+        self._offset = (self._offset[0] + dx, self._offset[1] + dy)
+
+    def to_screen(self, x: float, y: float) -> tuple[float, float]:
+        return x*self._zoom + self._offset[0], y*self._zoom + self._offset[1]
+
+    def to_world(self, x: float, y: float) -> tuple[float, float]:
+        return (x - self._offset[0]) / self._zoom, (y - self._offset[1]) / self._zoom
+
+    def transform(self, coords: tuple[float, ...]) -> tuple[float, ...]:
+        '''Canvas coordinates of a flat sequence x0, y0, x1, y1, ... of BoardGeometry.'''
+        zoom, (dx, dy) = self._zoom, self._offset
+        return tuple(value*zoom + (dy if index & 1 else dx) for index, value in enumerate(coords))
+
+    def visible(self) -> tuple[float, float, float, float]:
+        '''Rectangle of BoardGeometry shown on the canvas.'''
+        return (*self.to_world(0, 0), *self.to_world(self._width, self._height))
 
     @property
-    def game_state(self) -> GameState:
-        return self._game_state
+    def zoom(self) -> float:
+        return self._zoom
 
-    @property
-    def winning_path(self) -> list[tuple[int, int]]:
-        return self._winning_path
-
-    @local_player.setter
-    def local_player(self, player: Player) -> None:
-        self._local_player = player
+class FrameTimer:
+    '''Durations of the last redraws, from the first change to the canvas until Tk finished drawing it.'''
+    def __init__(self, frames: int = 300) -> None:
+        self._times: deque[float] = deque(maxlen=frames)
 
-    @board.setter
-    def board(self, board: list[list[Cell]]) -> None:
-        self._board = board
-    
-    @player1.setter
-    def player1(self, player: Player) -> None:
-        self._player1 = player
+    def record(self, seconds: float) -> None:
+        self._times.append(seconds)
 
-    @player2.setter
-    def player2(self, player: Player) -> None:
-        self._player2 = player
-
-    @current_player_turn.setter
-    def current_player_turn(self, player: Player) -> None:
-        self._current_player_turn = player
-
-    @winner.setter
-    def winner(self, player: Player) -> None:
-        self._winner = player
+    @property
+    def last(self) -> float:
+        return self._times[-1] if self._times else 0.0
 
-    @game_state.setter
-    def game_state(self, game_state: GameState) -> None:
-        self._game_state = game_state
+    @property
+    def mean(self) -> float:
+        return sum(self._times) / len(self._times) if self._times else 0.0
 
-    @winning_path.setter
-    def winning_path(self, path: list[tuple[int, int]]) -> None:
-        self._winning_path = path
+    @property
+    def p99(self) -> float:
+        if not self._times: return 0.0
+        times = sorted(self._times)
+        return times[min(len(times) - 1, int(0.99*len(times)))]
 
 class HexInterface(DogPlayerInterface):
+    # Milliseconds between checks for events from DOG
+    DOG_EVENTS_INTERVAL = 50
+    # Positions the solver can't finish within this many nodes, about 20 s in its own thread, get no hint
+    HINT_NODE_LIMIT = 500_000
+    # Milliseconds between checks for the solver's answer
+    HINT_CHECK_INTERVAL = 100
+
     # Initialize
     def __init__(self) -> None:
         # DogPlayerInterface
@@ -257,6 +282,12 @@ class HexInterface(DogPlayerInterface):
         # Screen and game info
         self._root = tk.Tk()
         self._game = Game(theme.GAME_SIZE)
+        # Finished matches are appended to the archive, and can be replayed while no match is running
+        self._archive = GameArchive()
+        self._replay: GameRecord | None = None
+        self._replay_position: int = 0
+        self._replay_game: Game | None = None
+        self._geometry = BoardGeometry(self.game.size)
 
         ### Screen components
         # Labels
@@ -271,19 +302,64 @@ class HexInterface(DogPlayerInterface):
 
         # Canva
         self.__canvas = tk.Canvas(self.root, width=theme.CANVAS_SIZE_X, height=theme.CANVAS_SIZE_Y)
+        # Zoom and pan, reset to the whole board by create_board
+        self._viewport = Viewport(theme.CANVAS_SIZE_X, theme.CANVAS_SIZE_Y)
+        self._pan_start: tuple[int, int] | None = None
+        # Canvas items, the borders created once per board by create_board and the hexagons of the visible cells only
+        self._board_size: int = 0
+        self._borders: tuple[int, int] = ()
+        self._hexagons: dict[int, int] = {}
+        # Zoomed out so far that hexagons would be a few pixels, the board is a single image of part of it
+        self._raster: tk.PhotoImage | None = None
+        self._raster_item: int | None = None
+        self._raster_bounds: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
+        self._raster_zoom: float = 0.0
+        self._drawn_stones: tuple[int, int] = (0, 0)
+        self._drawn_winning_path: list[tuple[int, int]] = []
+        self._hovered_cell: tuple[int, int] | None = None
+        self._hinted_cells: list[tuple[int, int]] = []
+        # Created on the first hint, the opening book and the table of solved positions are only read then
+        self._book: OpeningBook | None = None
+        self._solver: Solver | None = None
+        # Thread solving the position of the last hint, hash and turn of that position, and the answer
+        self._hint_thread: threading.Thread | None = None
+        self._hint_position: tuple[int, Cell] | None = None
+        self._hint_moves: list[tuple[int, int]] | None = None
+        # Debug overlay (F3) and profiler (F4), nothing is timed while both are off
+        self._frame_timer: FrameTimer | None = None
+        self._frame_start: float | None = None
+        self._overlay: int | None = None
+        self._profile = None
 
         # Initialize screen
         self.build_screen()
 
-        # Register local player and conect to DOG
+        self.update_screen()
+
+        # The window is drawn before the name is asked, and DOG answers in dog_connected while it stays responsive
+        self.root.after(0, self.register_player)
+        self.root.after(self.DOG_EVENTS_INTERVAL, self.process_dog_events)
+
+    def register_player(self):
+        '''Asks the local player's name and connects to DOG in the background.'''
+        self.root.update_idletasks()
         self.game.local_player = Player(simpledialog.askstring(title="Apelido de jogador", prompt="Qual o seu nome?"))
-        dog_connection_message = self.dog_server_interface.initialize(self.game.local_player.name, self)
+        self.__notification_label.configure(text="Conectando ao DOG Server...")
+        self.dog_server_interface.initialize(self.game.local_player.name, self, self.dog_connected)
+        self.update_screen()
+
+    def dog_connected(self, dog_connection_message: str):
         self.__notification_label.configure(text=dog_connection_message)
         self.connected_dog = dog_connection_message.lower() == "conectado a dog server"
         self.update_screen()
 
+    def process_dog_events(self):
+        '''Handles, in the Tk thread, the events received by DOG's threads.'''
+        # Rescheduled whatever happens, or no move, start or withdrawal would be received again
+        try: self.dog_server_interface.process_events()
+        finally: self.root.after(self.DOG_EVENTS_INTERVAL, self.process_dog_events)
+
     def update_screen(self):
-        self.__canvas.delete("all")
         self.draw_board()
         p1 = p1c = p2 = p2c = current = currentc = action = action_message = None
         if self.connected_dog is False:  # Distinguir is False de None
@@ -295,6 +371,15 @@ class HexInterface(DogPlayerInterface):
             currentc = theme.TEXT_COLOR
             action = self._root.quit
             action_message = "Sair"
+        elif self._replay is not None:
+            p1 = self.game.player1.name
+            p1c = self.game.player1.color
+            p2 = self.game.player2.name
+            p2c = self.game.player2.color
+            current = f"Jogada {len(self.game.moves)} de {len(self._replay.moves)}"
+            currentc = self.game.current_player_turn.color
+            action = self.stop_replay
+            action_message = "Voltar"
         elif self.game.game_state == GameState.WAITING:
             p1 = self.game.local_player.name if self.game.local_player else "Esperando"
             p1c = theme.TEXT_COLOR
@@ -304,6 +389,10 @@ class HexInterface(DogPlayerInterface):
             currentc = theme.TEXT_COLOR
             action = self.start_match
             action_message = "Começar"
+            if self.connected_dog is None:
+                # Still registering, there is no match to start yet
+                action = ""
+                action_message = "Conectando..."
         elif self.game.game_state == GameState.RUNNING:
             p1 = self.game.player1.name
             p1c = self.game.player1.color
@@ -339,28 +428,293 @@ class HexInterface(DogPlayerInterface):
         self.__action_button.configure(text=action_message, command=action)
 
 
+    def create_board(self):
+        '''Creates the canvas items of the board once, later redraws only reconfigure them.'''
+        self.__canvas.delete("all")
+        # Borders are created first so they stay below the hexagons
+        self._borders = (
+            self.__canvas.create_polygon(*self.geometry.player1_border, state="hidden", tags="border"),
+            self.__canvas.create_polygon(*self.geometry.player2_border, state="hidden", tags="border")
+        )
+        self._board_size = self.game.size
+        self._hexagons = {}
+        self._raster = self._raster_item = None
+        self._drawn_stones = (0, 0)
+        self._drawn_winning_path = []
+        self._hovered_cell = None
+        self._hinted_cells = []
+        self._overlay = None
+        self._viewport.fit(self.geometry.bounds(), self.geometry.side)
+        self.render_view()
+
+    def render_view(self):
+        '''Draws the part of the board in the viewport: a hexagon per visible cell, or the raster when hexagons
+        would be too small to tell apart. Hexagons already on the canvas are kept.'''
+        for border, coords in zip(self._borders, (self.geometry.player1_border, self.geometry.player2_border)):
+            self.__canvas.coords(border, *self._viewport.transform(coords))
+        visible = self._viewport.visible()
+        if self.geometry.side*self._viewport.zoom < theme.LOD_HEX_SIDE_SIZE:
+            if self._hexagons: self.__canvas.delete("hexagon")
+            self._hexagons = {}
+            x0, y0, x1, y1 = self._raster_bounds
+            if (self._raster is None or self._raster_zoom != self._viewport.zoom
+                    or visible[0] < x0 or visible[1] < y0 or visible[2] > x1 or visible[3] > y1):
+                self.create_raster(visible)
+            self.__canvas.coords(self._raster_item, *self._viewport.to_screen(*self._raster_bounds[:2]))
+        else:
+            if self._raster_item is not None: self.__canvas.delete(self._raster_item)
+            self._raster = self._raster_item = None
+            cells = set(self.geometry.cells_in(*visible))
+            for cell in [cell for cell in self._hexagons if cell not in cells]:
+                self.__canvas.delete(self._hexagons.pop(cell))
+            for cell in cells:
+                if cell not in self._hexagons: self._hexagons[cell] = self.draw_hexagon(*divmod(cell, self.game.size))
+        if self._overlay is not None: self.__canvas.tag_raise(self._overlay)
+
+    def create_raster(self, visible: tuple[float, float, float, float]):
+        '''Paints the cells around the visible ones in an image, so panning a little only moves it.'''
+        x0, y0, x1, y1 = visible
+        margin_x, margin_y = (x1 - x0) / 2, (y1 - y0) / 2
+        bx0, by0, bx1, by1 = self.geometry.bounds()
+        self._raster_bounds = (max(bx0, x0 - margin_x), max(by0, y0 - margin_y), min(bx1, x1 + margin_x), min(by1, y1 + margin_y))
+        self._raster_zoom = zoom = self._viewport.zoom
+        width = max(1, math.ceil((self._raster_bounds[2] - self._raster_bounds[0])*zoom))
+        height = max(1, math.ceil((self._raster_bounds[3] - self._raster_bounds[1])*zoom))
+        self._raster = tk.PhotoImage(width=width, height=height)
+        for cell in self.geometry.cells_in(*self._raster_bounds):
+            i, j = divmod(cell, self.game.size)
+            color = theme.HINT_COLOR if (i, j) in self._hinted_cells else self.cell_color(i, j)
+            self.paint_raster_cell(i, j, color, theme.HEXAGON_BORDER_COLOR)
+        if self._raster_item is None:
+            self._raster_item = self.__canvas.create_image(0, 0, image=self._raster, anchor="nw", tags="raster")
+        else:
+            self.__canvas.itemconfig(self._raster_item, image=self._raster)
+
+    def paint_raster_cell(self, i: int, j: int, color: str, edgecolor: str | None = None):
+        '''Fills the cell's rectangle in the raster, and with edgecolor a line of a pixel around it.'''
+        zoom, (x0, y0) = self._raster_zoom, self._raster_bounds[:2]
+        left, top, right, bottom = self.geometry.brick(i, j)
+        left, top = max(0, round((left - x0)*zoom)), max(0, round((top - y0)*zoom))
+        right = min(self._raster.width(), round((right - x0)*zoom))
+        bottom = min(self._raster.height(), round((bottom - y0)*zoom))
+        if right <= left or bottom <= top: return
+        if edgecolor is not None: self._raster.put(edgecolor, to=(left, top, right, bottom))
+        # The line is left out when a cell is only a few pixels wide
+        inset = 1 if right - left > 3 and bottom - top > 3 else 0
+        self._raster.put(color, to=(left + inset, top + inset, right, bottom))
+
+    def zoom(self, factor: float, x: float | None = None, y: float | None = None):
+        '''Zooms around the canvas point (x, y), its center by default.'''
+        if x is None or y is None: x, y = theme.CANVAS_SIZE_X / 2, theme.CANVAS_SIZE_Y / 2
+        if not self._viewport.zoom_at(factor, x, y): return
+        # Hexagons are created again at the new size, the raster is painted again by render_view
+        self.__canvas.delete("hexagon")
+        self._hexagons = {}
+        self.render_view()
+
+    def pan(self, dx: float, dy: float):
+        self._viewport.pan(dx, dy)
+        self.__canvas.move("hexagon", dx, dy)
+        self.render_view()
+
+    def reset_view(self, event: tk.Event | None = None):
+        self.create_board()
+        self.draw_board()
+
     def draw_board(self):
-        def handle_mouse_move(hexagon, out):
-            if self.game.game_state != GameState.RUNNING: return
-            if self.game.current_player_turn != self.game.local_player: return
-            self.__canvas.itemconfig(hexagon, fill=theme.BACKGROUND_COLOR if out else self.game.current_player_turn.piece_color)
+        if self._frame_timer is not None and self._frame_start is None:
+            # end_frame runs once the changes of this frame are made, and draws the canvas before it stops the clock
+            self._frame_start = time.perf_counter()
+            self.root.after_idle(self.end_frame)
+        if self._board_size != self.game.size: self.create_board()
+        self.clear_hint()
+
         if self.game.game_state != GameState.WAITING:
             self.draw_borders(self.game.player1)
             self.draw_borders(self.game.player2)
-        for i in range(self.game.size):
-            for j in range(self.game.size):
-                if self.game.board[i][j] == Cell.EMPTY:
-                    hexagon = self.draw_hexagon(i, j, theme.BACKGROUND_COLOR)
-                    self.__canvas.tag_bind(hexagon, "<Button-1>", lambda e, i=i, j=j: self.choose_cell(i, j))
-                    self.__canvas.tag_bind(hexagon, "<Enter>", lambda e, hexagon=hexagon: handle_mouse_move(hexagon, False))
-                    self.__canvas.tag_bind(hexagon, "<Leave>", lambda e, hexagon=hexagon: handle_mouse_move(hexagon, True))
-                elif self.game.board[i][j] == Cell.P1:
-                    self.draw_hexagon(i, j, self.game.player1.piece_color)
-                else:
-                    self.draw_hexagon(i, j, self.game.player2.piece_color)
-        if self.game.game_state == GameState.ENDED:
+        else:
+            for border in self._borders: self.__canvas.itemconfig(border, state="hidden")
+
+        # Clear the winning path of a finished game
+        if self._drawn_winning_path and (
+            self.game.game_state != GameState.ENDED or self._drawn_winning_path != self.game.winning_path
+        ):
+            path, self._drawn_winning_path = self._drawn_winning_path, []
+            for i, j in path: self.draw_cell(i, j)
+
+        # Only the cells whose stones changed since the last redraw are reconfigured
+        stones = (self.game.bitboard.stones(Cell.P1), self.game.bitboard.stones(Cell.P2))
+        changed = (stones[0] ^ self._drawn_stones[0]) | (stones[1] ^ self._drawn_stones[1])
+        while changed:
+            self.draw_cell(*divmod(lowest_bit(changed), self.game.size))
+            changed &= changed - 1
+        self._drawn_stones = stones
+
+        if self.game.game_state == GameState.ENDED and not self._drawn_winning_path:
             self.draw_winning_path(self.game.winning_path)
 
+        self.hover_cell(self._hovered_cell)
+
+    def cell_color(self, i: int, j: int) -> str:
+        '''Fill of a cell from its stone, the winning path and the cell under the mouse.'''
+        if self._drawn_winning_path and (i, j) in self._drawn_winning_path: return self.game.current_player_turn.color
+        cell = self.game.bitboard.get(i, j)
+        if cell == Cell.P1: return self.game.player1.piece_color
+        if cell == Cell.P2: return self.game.player2.piece_color
+        # The cell under the mouse shows the stone the local player would mark
+        if (i, j) == self._hovered_cell and self.game.game_state == GameState.RUNNING \
+                and self.game.current_player_turn == self.game.local_player:
+            return self.game.current_player_turn.piece_color
+        return theme.BACKGROUND_COLOR
+
+    def draw_cell(self, i: int, j: int):
+        '''Repaints a cell if it is on the canvas, a cell out of view is painted when it comes into view.'''
+        hinted = (i, j) in self._hinted_cells
+        if (hexagon := self._hexagons.get(i*self.game.size + j)) is not None:
+            self.__canvas.itemconfig(hexagon, fill=self.cell_color(i, j),
+                                     outline=theme.HINT_COLOR if hinted else theme.HEXAGON_BORDER_COLOR)
+        elif self._raster is not None:
+            self.paint_raster_cell(i, j, theme.HINT_COLOR if hinted else self.cell_color(i, j))
+
+    def hover_cell(self, cell: tuple[int, int] | None):
+        '''Highlights the cell under the mouse if the local player could mark it.'''
+        previous, self._hovered_cell = self._hovered_cell, cell
+        if previous not in (None, cell): self.draw_cell(*previous)
+        if cell is not None: self.draw_cell(*cell)
+
+    def show_hint(self, event: tk.Event | None = None):
+        '''Outlines the best moves of the opening book or, on boards small enough to be solved, the moves that win
+        against perfect play.'''
+        if self.game.game_state != GameState.RUNNING or self.game.current_player_turn != self.game.local_player: return
+        if self._book is None or self._book.size != self.game.size: self._book = OpeningBook(self.game.size)
+        if book_moves := self._book.moves(self.game):
+            best = book_moves[0].score
+            self.outline_hint([book_move.move for book_move in book_moves if book_move.score >= best - 0.05])
+            self.__notification_label.configure(
+                text=f"Livro de aberturas: {best:.0%} de vitórias em {book_moves[0].games} partidas"
+            )
+            return
+        if self.game.size > SOLVER_MAX_SIZE:
+            self.__notification_label.configure(text=f"Dicas só em tabuleiros até {SOLVER_MAX_SIZE}x{SOLVER_MAX_SIZE}")
+            return
+        if self._hint_thread is not None: return
+        if self._solver is None or self._solver.size != self.game.size:
+            self._solver = Solver(self.game.size, node_limit=self.HINT_NODE_LIMIT)
+        self.__notification_label.configure(text="Calculando dica...")
+        self._hint_position = (self.game.hash, self.game.current_cell)
+        self._hint_moves = None
+        self._hint_thread = threading.Thread(target=self.solve_hint, args=(self._solver, self.game.clone()),
+                                             daemon=True)
+        self._hint_thread.start()
+        self.root.after(self.HINT_CHECK_INTERVAL, self.finish_hint)
+
+    def solve_hint(self, solver: Solver, game: Game):
+        '''Runs in the hint thread, the only one using the solver until finish_hint sees it ended.'''
+        self._hint_moves = solver.winning_moves(game)
+        # Only the new results are appended to the file
+        try: solver.save()
+        except OSError: pass
+
+    def finish_hint(self):
+        if self._hint_thread.is_alive():
+            self.root.after(self.HINT_CHECK_INTERVAL, self.finish_hint)
+            return
+        self._hint_thread = None
+        moves = self._hint_moves
+        if self.game.game_state != GameState.RUNNING or (self.game.hash, self.game.current_cell) != self._hint_position:
+            # A move was played while solving, the answer is of a position already left
+            self.__notification_label.configure(text="")
+        elif moves is None:
+            self.__notification_label.configure(text="Posição difícil demais para uma dica")
+        elif not moves:
+            self.__notification_label.configure(text="Nenhuma jogada vence contra um jogo perfeito")
+        else:
+            self.outline_hint(moves)
+            self.__notification_label.configure(text="Jogadas vencedoras destacadas")
+
+    def outline_hint(self, cells: list[tuple[int, int]]):
+        self.clear_hint()
+        self._hinted_cells = cells
+        for i, j in cells: self.draw_cell(i, j)
+
+    def clear_hint(self):
+        cells, self._hinted_cells = self._hinted_cells, []
+        for i, j in cells: self.draw_cell(i, j)
+
+    def end_frame(self):
+        if self._frame_timer is None or self._frame_start is None: return
+        # The canvas redraws itself in an idle handler queued by the first change of the frame, after this one
+        self.root.update_idletasks()
+        self._frame_timer.record(time.perf_counter() - self._frame_start)
+        self._frame_start = None
+        self.draw_overlay()
+
+    def draw_overlay(self):
+        if self._overlay is None:
+            self._overlay = self.__canvas.create_text(
+                theme.CANVAS_PADDING, theme.CANVAS_PADDING, anchor="nw", fill=theme.OVERLAY_COLOR,
+                font=(theme.TEXT_FONT, 10), tags="overlay"
+            )
+        timer = self._frame_timer
+        self.__canvas.itemconfig(self._overlay, text=(
+            f"quadro {timer.last*1000:.1f}ms  média {timer.mean*1000:.1f}ms  p99 {timer.p99*1000:.1f}ms\n"
+            f"{len(self.__canvas.find_all())} itens no canvas"
+        ))
+
+    def toggle_overlay(self, event: tk.Event | None = None):
+        '''Shows or hides the redraw times and the number of canvas items.'''
+        if self._frame_timer is None:
+            self._frame_timer = FrameTimer()
+            self.draw_board()
+            return
+        self._frame_timer = self._frame_start = None
+        if self._overlay is not None: self.__canvas.delete(self._overlay)
+        self._overlay = None
+
+    def toggle_profile(self, event: tk.Event | None = None):
+        '''Starts profiling the Tk thread, and on the next call writes the statistics to data/, for pstats or snakeviz.'''
+        import cProfile
+
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+            self.__notification_label.configure(text="Perfilando... (F4 para parar)")
+            return
+        self._profile.disable()
+        path = os.path.join("data", f"profile-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        try:
+            os.makedirs("data", exist_ok=True)
+            self._profile.dump_stats(path)
+            self.__notification_label.configure(text=f"Perfil salvo em {path}")
+        except OSError as error:
+            self.__notification_label.configure(text=f"Perfil não foi salvo: {error.strerror}")
+        self._profile = None
+
+    # Canvas events
+    def handle_mouse_move(self, event: tk.Event):
+        cell = self.geometry.cell_at(*self._viewport.to_world(event.x, event.y))
+        if cell != self._hovered_cell: self.hover_cell(cell)
+
+    def handle_mouse_leave(self, event: tk.Event):
+        self.hover_cell(None)
+
+    def handle_click(self, event: tk.Event):
+        if cell := self.geometry.cell_at(*self._viewport.to_world(event.x, event.y)): self.choose_cell(*cell)
+
+    def handle_wheel(self, event: tk.Event):
+        # Windows and macOS report the wheel in delta, X11 as the buttons 4 and 5
+        zoom_in = event.delta > 0 if event.num not in (4, 5) else event.num == 4
+        self.zoom(theme.ZOOM_STEP if zoom_in else 1 / theme.ZOOM_STEP, event.x, event.y)
+
+    def handle_pan_start(self, event: tk.Event):
+        self._pan_start = (event.x, event.y)
+
+    def handle_pan(self, event: tk.Event):
+        if self._pan_start is None: return
+        dx, dy = event.x - self._pan_start[0], event.y - self._pan_start[1]
+        self._pan_start = (event.x, event.y)
+        self.pan(dx, dy)
+
     def build_screen(self):
         '''Configures the default styling and layout of the screen components.'''
         # Window assets
@@ -377,6 +731,31 @@ class HexInterface(DogPlayerInterface):
         self.__action_button.configure(**theme.DEFAULT_BUTTON)
         self.__canvas.configure(bg=theme.BACKGROUND_COLOR, highlightthickness=0)
 
+        # A single set of handlers for the whole board, cells are found from the mouse position
+        self.__canvas.bind("<Motion>", self.handle_mouse_move)
+        self.__canvas.bind("<Leave>", self.handle_mouse_leave)
+        self.__canvas.bind("<Button-1>", self.handle_click)
+        # Zoom with the wheel or + and -, pan dragging with the right or middle button, 0 shows the whole board
+        self.__canvas.bind("<MouseWheel>", self.handle_wheel)
+        self.__canvas.bind("<Button-4>", self.handle_wheel)
+        self.__canvas.bind("<Button-5>", self.handle_wheel)
+        for button in (2, 3):
+            self.__canvas.bind(f"<ButtonPress-{button}>", self.handle_pan_start)
+            self.__canvas.bind(f"<B{button}-Motion>", self.handle_pan)
+        self.root.bind("<KeyPress-plus>", lambda event: self.zoom(theme.ZOOM_STEP))
+        self.root.bind("<KeyPress-equal>", lambda event: self.zoom(theme.ZOOM_STEP))
+        self.root.bind("<KeyPress-minus>", lambda event: self.zoom(1 / theme.ZOOM_STEP))
+        self.root.bind("<KeyPress-0>", self.reset_view)
+        self.root.bind("<KeyPress-h>", self.show_hint)
+        self.root.bind("<KeyPress-r>", self.start_replay)
+        self.root.bind("<Left>", lambda event: self.step_replay(-1))
+        self.root.bind("<Right>", lambda event: self.step_replay(1))
+        self.root.bind("<Up>", lambda event: self.open_replay(self._replay_position - 1))
+        self.root.bind("<Down>", lambda event: self.open_replay(self._replay_position + 1))
+        self.root.bind("<Escape>", self.stop_replay)
+        self.root.bind("<F3>", self.toggle_overlay)
+        self.root.bind("<F4>", self.toggle_profile)
+
         # Layout
         self.__game_title_label.grid(row=0, column=1)
         self.__notification_label.grid(row=1, column=1)
@@ -393,102 +772,38 @@ class HexInterface(DogPlayerInterface):
         self.update_screen()
 
     # Draw Board
-    def draw_hexagon(self, i: int, j: int, color, edgecolor=theme.HEXAGON_BORDER_COLOR) -> int:
-        x, y = self.hex_starting_point(i, j)
-
+    def draw_hexagon(self, i: int, j: int) -> int:
         hexagon = self.__canvas.create_polygon(
-            x, self.fix_y(y + theme.HEX_SIDE_SIZE_ROOT_3/2),
-            x + 0.5*theme.HEX_SIDE_SIZE, self.fix_y(y + theme.HEX_SIDE_SIZE_ROOT_3),
-            x + 1.5*theme.HEX_SIDE_SIZE, self.fix_y(y + theme.HEX_SIDE_SIZE_ROOT_3),
-            x + 2.0*theme.HEX_SIDE_SIZE, self.fix_y(y + theme.HEX_SIDE_SIZE_ROOT_3/2),
-            x + 1.5*theme.HEX_SIDE_SIZE, self.fix_y(y),
-            x + 0.5*theme.HEX_SIDE_SIZE, self.fix_y(y),
-
-            width=theme.HEXAGON_BORDER_WIDTH,
-            fill=color,
-            outline=edgecolor,
+            *self._viewport.transform(self.geometry.hexagon(i, j)),
+            width=max(1, round(theme.HEXAGON_BORDER_WIDTH*self._viewport.zoom)),
+            fill=self.cell_color(i, j),
+            outline=theme.HINT_COLOR if (i, j) in self._hinted_cells else theme.HEXAGON_BORDER_COLOR,
             tags="hexagon"
         )
         return hexagon
 
-    def hex_starting_point(self, i: int, j: int) -> tuple[int, int]:
-        i, j = self.convert_ij(i, j)
-
-        n = self.game.size - abs(i+1-self.game.size)
-
-        x = i*1.5*theme.HEX_SIDE_SIZE
-        y = (theme.CANVAS_SIZE_Y - n*theme.HEX_SIDE_SIZE_ROOT_3)/2
-
-        y += j*theme.HEX_SIDE_SIZE_ROOT_3
-        x += theme.CANVAS_PADDING
-
-        return x, y
+    def hex_starting_point(self, i: int, j: int) -> tuple[float, float]:
+        return self.geometry.starting_point(i, j)
 
     def convert_ij(self, i: int, j: int) -> tuple[int, int]:
-        m = [[(x, y) for y in range(self.game.size)] for x in range(self.game.size)]
-        tilt = []
-
-        for x in range(self.game.size):
-            tilt.append([m[i-x][self.game.size-i-1] for i in range(self.game.size) if i>=x])
-            tilt.append([m[i][self.game.size-i+x-1] for i in range(self.game.size) if i>=x])        
-        tilt = sorted(tilt[1:])
-        for x, diagonal in enumerate(tilt):
-            for y, cell in enumerate(diagonal):
-                if cell == (i, j):
-                    return x, y
-        return -1, -1
+        return self.geometry.convert_ij(i, j)
 
     def draw_borders(self, player: Player):
-        start_coords = (
-            self.hex_starting_point(0, 0),
-            self.hex_starting_point(0, self.game.size-1),
-            self.hex_starting_point(self.game.size-1, 0),
-            self.hex_starting_point(self.game.size-1, self.game.size-1)
-        )
-                
-        offsets = (
-            (-theme.HEX_SIDE_SIZE, theme.HEX_SIDE_SIZE_ROOT_3/2),
-            (theme.HEX_SIDE_SIZE, -theme.HEX_SIDE_SIZE_ROOT_3*1/6),
-            (1*theme.HEX_SIDE_SIZE, theme.HEX_SIDE_SIZE_ROOT_3*7/6),
-            (3*theme.HEX_SIDE_SIZE, theme.HEX_SIDE_SIZE_ROOT_3/2)
-        )
-        coords = [
-            [x+y for x, y in zip(start_coords[0], offsets[0])],
-            [x+y for x, y in zip(start_coords[1], offsets[1])],
-            [x+y for x, y in zip(start_coords[2], offsets[2])],
-            [x+y for x, y in zip(start_coords[3], offsets[3])]
-        ]
-
-        if player == self.game.player1:
-            self.__canvas.create_polygon(
-                *(coords[0]),
-                *(coords[1]),
-                *(coords[2]),
-                *(coords[3]),
-                fill=player.color,
-                tags="border"
-            )
-        else:
-            self.__canvas.create_polygon(
-                *(coords[1]),
-                *(coords[3]),
-                *(coords[0]),
-                *(coords[2]),
-                fill=player.color,
-                tags="border"
-            )
-        self.__canvas.tag_raise("hexagon")
+        border = self._borders[0] if player == self.game.player1 else self._borders[1]
+        self.__canvas.itemconfig(border, fill=player.color, state="normal")
 
     def draw_winning_path(self, path: list[tuple[int, int]]):
-        for i, j in path:
-            self.draw_hexagon(i, j, self.game.current_player_turn.color)
+        self._drawn_winning_path = list(path)
+        for i, j in path: self.draw_cell(i, j)
 
     def fix_y(self, y: int) -> int:
-        return theme.CANVAS_SIZE_Y - y
+        return self.geometry.fix_y(y)
 
     # StartMatch
     def start_match(self):
-        start_status = self.dog_server_interface.start_match(2)
+        self.dog_server_interface.start_match(2, self.match_started)
+
+    def match_started(self, start_status: StartStatus):
         if str(start_status.get_code()) in '01': self.__notification_label.configure(text=start_status.get_message())
         else: self.start_game(start_status)
 
@@ -524,23 +839,97 @@ class HexInterface(DogPlayerInterface):
         self.update_screen()
 
     def restore_inital_state(self):
+        self.stop_replay()
         self.game.restart()
         self.update_screen()
 
     # ChooseCell
     def choose_cell(self, i, j):
+        # None unless DOG_METRICS_PORT is set, then each stage of the move is timed
+        metrics = self.dog_server_interface.proxy.metrics
+        if metrics is not None: metrics.mark("choose_cell")
         if move := self.game.make_move(i, j):
+            if metrics is not None:
+                metrics.measure("make_move", "choose_cell")
+                metrics.mark("made_move")
+            if self.game.game_state == GameState.ENDED: self.archive_game()
             self.update_screen()
+            if metrics is not None: metrics.measure("local_redraw", "made_move")
             self.dog_server_interface.send_move(move)
 
     # ReceiveMove
     def receive_move(self, a_move: dog_message):
-        self.game.receive_move(a_move)
+        metrics = self.dog_server_interface.proxy.metrics
+        if metrics is not None:
+            metrics.measure("dispatch", "picked_up")
+            metrics.mark("received")
+        # A move received twice must not archive the game twice
+        ended = self.game.game_state == GameState.ENDED
+        if self.game.receive_move(a_move): self.__notification_label.configure(text="Tabuleiro sincronizado com o adversário")
+        if self.game.game_state == GameState.ENDED and not ended: self.archive_game()
         self.update_screen()
+        if metrics is not None: metrics.measure("remote_redraw", "received")
 
     # ReceiveLeave
     def receive_withdrawal_notification(self):
+        # Before the match started there is nothing to withdraw from, and ended matches were archived as they ended
+        if self.game.game_state == GameState.WAITING: return
+        running = self.game.game_state == GameState.RUNNING
         self.game.receive_withdraw()
+        if running: self.archive_game()
+        self.update_screen()
+
+    def receive_error(self, error: Exception):
+        self.__notification_label.configure(text=f"Erro na comunicação com o DOG: {error}")
+        # A registration that failed leaves the window disconnected instead of connecting forever
+        if self.connected_dog is None: self.connected_dog = False
+        self.update_screen()
+
+    # Archive and replay
+    def archive_game(self):
+        # Closed at once, so the index is written and another window can append to the same archive
+        try:
+            self._archive.append(GameRecord.from_game(self.game))
+            self._archive.close()
+        except RecordError: self.__notification_label.configure(text="Partida não foi salva: jogadas anteriores à sincronização perdidas")
+        except OSError as error: self.__notification_label.configure(text=f"Partida não foi salva: {error.strerror}")
+
+    def start_replay(self, event: tk.Event | None = None):
+        '''Replays the last archived game, unless a match is running.'''
+        if self._replay is None: self.open_replay(len(self._archive) - 1)
+
+    def open_replay(self, position: int):
+        if self._game.game_state == GameState.RUNNING: return
+        if not 0 <= position < len(self._archive):
+            if not len(self._archive): self.__notification_label.configure(text="Nenhuma partida salva")
+            return
+        self._replay = self._archive[position]
+        self._replay_position = position
+        self._replay_game = self.replay_game(0)
+        self.__notification_label.configure(
+            text=f"Partida {position+1} de {len(self._archive)}: ←/→ jogadas, ↑/↓ partidas, Esc sai"
+        )
+        self.update_screen()
+
+    def step_replay(self, step: int):
+        if self._replay is None: return
+        moves = max(0, min(len(self._replay.moves), len(self._replay_game.moves) + step))
+        if moves == len(self._replay_game.moves) + 1:
+            self._replay_game.apply_move(*divmod(self._replay.moves[moves-1], self._replay.size))
+        else:
+            # Going back replays the game from the start, a few hundred moves at most
+            self._replay_game = self.replay_game(moves)
+        self.update_screen()
+
+    def replay_game(self, moves: int) -> Game:
+        '''The replayed game after its first moves, in the colors its players had during the match.'''
+        return self._replay.to_game(moves, Player, self.calculate_player_colors(*self._replay.players))
+
+    def stop_replay(self, event: tk.Event | None = None):
+        if self._replay is None: return
+        self._replay = None
+        self._replay_game = None
+        self.__notification_label.configure(text="")
         self.update_screen()
 
     # Auxiliars
@@ -556,7 +945,14 @@ class HexInterface(DogPlayerInterface):
     
     @property
     def game(self):
-        return self._game
+        # The replayed game is drawn instead of the match while replaying
+        return self._replay_game if self._replay_game is not None else self._game
+
+    @property
+    def geometry(self) -> BoardGeometry:
+        # Rebuilt only when the board size changes
+        if self._geometry.size != self.game.size: self._geometry = BoardGeometry(self.game.size)
+        return self._geometry
 
     @property
     def dog_server_interface(self):
@@ -0,0 +1,17 @@
+import pytest
+
+from engine.enums import GameState
+from engine.game import Game
+from engine.player import Player
+
+
+@pytest.fixture
+def new_game():
+    '''Running game of the given size, player 1 to move.'''
+    def make(size: int) -> Game:
+        game = Game(size)
+        game.player1, game.player2 = Player("P1"), Player("P2")
+        game.current_player_turn = game.player1
+        game.game_state = GameState.RUNNING
+        return game
+    return make
@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from engine.alphabeta import AlphaBeta
+from engine.enums import GameState
+
+
+@pytest.mark.parametrize("size, time_limit", [(7, 0.1), (19, 0.2), (25, 0.1)])
+def test_time_limit_is_respected(new_game, size, time_limit):
+    game = new_game(size)
+    game.apply_move(size // 2, size // 2)
+    start = time.perf_counter()
+    result = AlphaBeta(time_limit).search(game)
+    # The root's own evaluation and the check between nodes are all that may run past the limit
+    assert time.perf_counter() - start < time_limit + 0.15
+    assert game.bitboard.is_empty(*result.move)
+
+
+def test_winning_move_is_played(new_game):
+    game = new_game(3)
+    for cell in (0, 3, 1, 4): game.apply_move(*divmod(cell, 3))
+    result = AlphaBeta(1.0).search(game)
+    assert result.move == (0, 2)
+    game.apply_move(*result.move)
+    assert game.game_state == GameState.ENDED
@@ -0,0 +1,117 @@
+import pytest
+
+from engine.archive import FOOTER, HEADER_SIZE, MAGIC, GameArchive, GameRecord, RecordError, decode_record, encode_record
+from engine.enums import GameState
+
+
+def finished_record(new_game) -> GameRecord:
+    game = new_game(3)
+    for cell in (0, 3, 1, 4, 2): game.apply_move(*divmod(cell, 3))
+    assert game.game_state == GameState.ENDED
+    return GameRecord.from_game(game)
+
+
+def test_record_round_trip(new_game):
+    record = finished_record(new_game)
+    assert record.first == 1 and record.winner == 1 and record.moves == (0, 3, 1, 4, 2)
+    assert decode_record(encode_record(record)) == record
+    # Two bytes per move above 16x16
+    large = GameRecord(17, ("Ana", "Bruno"), 2, 0, (0, 288, 17), 1234)
+    assert decode_record(encode_record(large)) == large
+    with pytest.raises(RecordError): decode_record(encode_record(record)[:-1])
+
+
+def test_record_replays_the_game(new_game):
+    record = finished_record(new_game)
+    game = record.to_game()
+    assert game.game_state == GameState.ENDED and game.winner is game.player1
+    assert record.to_game(2).moves == [0, 3]
+
+
+def test_restored_game_is_not_recorded(new_game):
+    game = new_game(3)
+    game.restore(finished_record(new_game).to_game(2).snapshot(), 2)
+    with pytest.raises(RecordError): GameRecord.from_game(game)
+
+
+def test_archive_append_and_read(new_game, tmp_path):
+    path = str(tmp_path / "games.bin")
+    records = [finished_record(new_game), GameRecord(11, ("a", "b"), 2, 0, (60, 61), 7)]
+    archive = GameArchive(path)
+    assert len(archive) == 0
+    assert [archive.append(record) for record in records] == [0, 1]
+    assert list(archive) == records
+    archive.close()
+
+    reloaded = GameArchive(path)
+    assert len(reloaded) == 2 and reloaded[-1] == records[1]
+    with pytest.raises(IndexError): reloaded[2]
+    reloaded.close()
+
+
+def test_archive_index_is_rebuilt(new_game, tmp_path):
+    path = str(tmp_path / "games.bin")
+    record = finished_record(new_game)
+    archive = GameArchive(path)
+    archive.append(record)
+    archive.append(record)
+    archive.close()
+    with open(path, "rb") as file: data = file.read()
+    records_end = data.rindex(b"HEXI", 0, len(data) - FOOTER.size)
+
+    # Footer lost and a record cut short: the whole records are found by walking them
+    with open(path, "wb") as file: file.write(data[:records_end] + encode_record(record)[:-2])
+    archive = GameArchive(path)
+    assert list(archive) == [record, record]
+    # The next append writes over the partial record
+    archive.append(record)
+    archive.close()
+    assert list(GameArchive(path)) == [record]*3
+
+
+def test_first_version_is_upgraded(new_game, tmp_path):
+    path = str(tmp_path / "games.bin")
+    record = finished_record(new_game)
+    with open(path, "wb") as file: file.write(MAGIC + bytes((1, 0, 0, 0)) + encode_record(record))
+    archive = GameArchive(path)
+    assert list(archive) == [record]
+    archive.append(record)
+    archive.close()
+    with open(path, "rb") as file: assert file.read(HEADER_SIZE)[len(MAGIC)] == 2
+    assert list(GameArchive(path)) == [record, record]
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "games.bin"
+    path.write_bytes(b"not an archive")
+    with pytest.raises(RecordError): len(GameArchive(str(path)))
+
+
+def test_many_records_round_trip(tmp_path):
+    path = str(tmp_path / "games.bin")
+    records = [GameRecord(11, (f"p{k}", "b"), 1 + k % 2, k % 3, tuple(range(k % 50)), k) for k in range(20000)]
+    archive = GameArchive(path)
+    for position, record in enumerate(records): assert archive.append(record) == position
+    # Records are read back before the index is written
+    assert archive[12345] == records[12345]
+    archive.close()
+
+    reloaded = GameArchive(path)
+    assert len(reloaded) == len(records)
+    assert list(reloaded) == records
+    reloaded.append(records[0])
+    reloaded.close()
+    assert len(GameArchive(path)) == len(records) + 1
+
+
+def test_writers_append_after_each_other(new_game, tmp_path):
+    path = str(tmp_path / "games.bin")
+    record = finished_record(new_game)
+    first, second = GameArchive(path), GameArchive(path)
+    assert len(first) == len(second) == 0
+    first.append(record)
+    first.close()
+    # The second archive read the file before the first append, and still appends after it
+    second.append(record._replace(players=("c", "d")))
+    second.close()
+    assert [stored.players for stored in GameArchive(path)] == [("P1", "P2"), ("c", "d")]
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from engine.bitboard import BitBoard, board_masks, lowest_bit
+from engine.enums import Cell
+
+SIZES = [1, 2, 3, 4, 7, 11, 16, 17]
+
+
+def cells(mask: int, size: int) -> set[tuple[int, int]]:
+    return {divmod(k, size) for k in range(size*size) if mask >> k & 1}
+
+
+def board(size: int, p1: tuple[tuple[int, int], ...] = (), p2: tuple[tuple[int, int], ...] = ()) -> BitBoard:
+    board = BitBoard(size)
+    for i, j in p1: board.place(i, j, Cell.P1)
+    for i, j in p2: board.place(i, j, Cell.P2)
+    return board
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_edge_masks(size):
+    masks = board_masks(size)
+    last = size-1
+    assert cells(masks.first_column, size) == {(i, 0) for i in range(size)}
+    assert cells(masks.last_column, size) == {(i, last) for i in range(size)}
+    assert cells(masks.first_row, size) == {(0, j) for j in range(size)}
+    assert cells(masks.last_row, size) == {(last, j) for j in range(size)}
+    assert masks.full == (1 << size*size) - 1
+
+
+@pytest.mark.parametrize("size", [size for size in SIZES if size > 2])
+def test_corner_and_edge_neighbors(size):
+    masks, last = board_masks(size), size-1
+    expected = {
+        (0, 0): {(0, 1), (1, 0)},
+        (0, last): {(0, last-1), (1, last-1), (1, last)},
+        (last, 0): {(last-1, 0), (last-1, 1), (last, 1)},
+        (last, last): {(last-1, last), (last, last-1)},
+        (0, 1): {(0, 0), (0, 2), (1, 0), (1, 1)},
+        (1, 0): {(0, 0), (0, 1), (1, 1), (2, 0)},
+        (1, last): {(0, last), (1, last-1), (2, last-1), (2, last)},
+        (last, 1): {(last-1, 1), (last-1, 2), (last, 0), (last, 2)},
+    }
+    for (i, j), neighbors in expected.items():
+        assert cells(masks.neighbors[i*size + j], size) == neighbors
+        assert set(masks.neighbor_cells[i*size + j]) == neighbors
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_dilate_matches_the_neighbors(size):
+    masks, bitboard = board_masks(size), BitBoard(size)
+    for k in range(size*size):
+        neighbors = {(i+x, j+y) for i, j in [divmod(k, size)]
+                     for x, y in ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0))
+                     if 0 <= i+x < size and 0 <= j+y < size}
+        assert cells(masks.neighbors[k], size) == neighbors
+        assert bitboard.dilate(1 << k) == masks.neighbors[k] | 1 << k
+    rng = random.Random(size)
+    for _ in range(20):
+        mask = rng.getrandbits(size*size)
+        expected, remaining = mask, mask
+        while remaining:
+            expected |= masks.neighbors[lowest_bit(remaining)]
+            remaining &= remaining - 1
+        assert bitboard.dilate(mask) == expected
+    assert bitboard.dilate(masks.full) == masks.full
+
+
+def test_shortest_path_of_a_row():
+    bitboard = board(3, p1=((1, 0), (1, 1), (1, 2)))
+    assert bitboard.shortest_path(Cell.P1) == [(1, 2), (1, 1), (1, 0)]
+    assert bitboard.shortest_path(Cell.P2) is None
+
+
+def test_shortest_path_of_a_diagonal():
+    bitboard = board(4, p2=((0, 3), (1, 2), (2, 1), (3, 0)))
+    assert bitboard.shortest_path(Cell.P2) == [(3, 0), (2, 1), (1, 2), (0, 3)]
+    # The other diagonal is not connected
+    assert board(4, p2=((0, 0), (1, 1), (2, 2), (3, 3))).shortest_path(Cell.P2) is None
+
+
+def test_shortest_path_skips_the_detour():
+    # A winding chain through the top rows and a straight one on the last row
+    detour = ((0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 3), (2, 4))
+    straight = ((4, 0), (4, 1), (4, 2), (4, 3), (4, 4))
+    bitboard = board(5, p1=detour + straight)
+    assert bitboard.shortest_path(Cell.P1) == [(4, 4), (4, 3), (4, 2), (4, 1), (4, 0)]
+    # Stones of the opponent don't connect
+    assert board(5, p1=((2, 0), (2, 1), (2, 3), (2, 4)), p2=((2, 2),)).shortest_path(Cell.P1) is None
@@ -0,0 +1,50 @@
+import pytest
+
+from engine.archive import GameRecord
+from engine.book import BookBuilder, OpeningBook
+from engine.position_key import canonical_key, key_length, rotate
+
+
+def test_canonical_key_is_shared_by_the_rotation():
+    cells = 25
+    stones = (1 << 0 | 1 << 7, 1 << 12)
+    rotated = (rotate(stones[0], cells), rotate(stones[1], cells))
+    key, was_rotated = canonical_key(5, stones, 1)
+    other, other_rotated = canonical_key(5, rotated, 1)
+    assert key == other and was_rotated != other_rotated
+    assert len(key) == key_length(5)
+    assert canonical_key(5, stones, 0)[0] != key
+
+
+def test_book_round_trip(new_game, tmp_path):
+    path = str(tmp_path / "book-5.bin")
+    builder = BookBuilder(5, plies=2)
+    # The abandoned game is skipped
+    builder.add_records([
+        GameRecord(5, ("a", "b"), 1, 1, (12, 6, 7)),
+        GameRecord(5, ("a", "b"), 1, 2, (12, 18, 7)),
+        GameRecord(5, ("a", "b"), 1, 2, (0, 1)),
+        GameRecord(5, ("a", "b"), 1, 1, (24, 23)),
+        GameRecord(5, ("a", "b"), 1, 0, (0, 1)),
+    ])
+    assert builder.write(path) == 6
+
+    book = OpeningBook(5, path)
+    assert len(book) == 6
+    game = new_game(5)
+    assert [tuple(move) for move in book.moves(game)] == [((4, 4), 1, 1), ((2, 2), 2, 1), ((0, 0), 1, 0)]
+    assert book.best_move(game).move == (2, 2)
+    # The openings in opposite corners are each other's rotation, so their replies are counted together
+    for opening, reply in (((0, 0), (0, 1)), ((4, 4), (4, 3))):
+        game = new_game(5)
+        game.apply_move(*opening)
+        assert [tuple(move) for move in book.moves(game)] == [(reply, 2, 1)]
+    book.close()
+
+
+def test_other_files_are_rejected(new_game, tmp_path):
+    path = str(tmp_path / "book-5.bin")
+    builder = BookBuilder(5)
+    builder.add_record(GameRecord(5, ("a", "b"), 1, 1, (12,)))
+    builder.write(path)
+    with pytest.raises(ValueError): OpeningBook(7, path).moves(new_game(7))
@@ -0,0 +1,17 @@
+from types import SimpleNamespace
+
+from dog.dog_actor import DogActor
+from dog.dog_proxy import DogProxy
+
+
+def test_bad_event_does_not_drop_the_queue(monkeypatch):
+    monkeypatch.delenv("DOG_METRICS_PORT", raising=False)
+    errors, moves = [], []
+    actor = DogActor(DogProxy(url="http://127.0.0.1:1/", game_id="1"))
+    actor.player_actor = SimpleNamespace(receive_error=errors.append, receive_move=lambda move: moves.append(move["cell"]))
+    actor.receive_move({})
+    actor.receive_move({"cell": 3})
+    actor.process_events()
+    assert moves == [3]
+    assert len(errors) == 1 and isinstance(errors[0], KeyError)
+    assert actor.inbound.empty()
@@ -0,0 +1,57 @@
+import socket
+import threading
+
+import pytest
+import requests
+
+from dog.dog_proxy import DogProxy
+
+
+@pytest.fixture
+def hanging_up_server():
+    '''Reads each request and closes the connection without answering, the failure of a request already sent.'''
+    listener = socket.create_server(("127.0.0.1", 0))
+    requests_read = []
+
+    def serve():
+        while True:
+            try: connection, _ = listener.accept()
+            except OSError: return
+            with connection:
+                requests_read.append(connection.recv(65536))
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"http://127.0.0.1:{listener.getsockname()[1]}/", requests_read
+    listener.close()
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    monkeypatch.delenv("DOG_METRICS_PORT", raising=False)
+    errors = []
+    proxy = DogProxy(url="http://127.0.0.1:1/", game_id="1", max_retries=2, backoff=0)
+    proxy.dog_actor = type("Actor", (), {"report_error": staticmethod(errors.append)})()
+    proxy.errors = errors
+    return proxy
+
+
+def test_request_sent_is_only_retried_if_idempotent(proxy, hanging_up_server):
+    proxy.url, requests_read = hanging_up_server
+    assert proxy.post("move/", {"move": "{}"}, idempotent=False) is None
+    assert len(requests_read) == 1
+    assert proxy.post("match/", {"player_id": "1"}) is None
+    assert len(requests_read) == 1 + 3
+    assert proxy.errors == []
+
+
+def test_refused_connection_is_retried(proxy):
+    with pytest.raises(requests.ConnectionError) as refused: requests.post(proxy.url, timeout=1)
+    assert proxy.never_sent(refused.value)
+    assert proxy.post("move/", {"move": "{}"}, idempotent=False) is None
+    assert proxy.errors == []
+
+
+def test_other_failures_are_reported(proxy):
+    proxy.url = "http:///"
+    assert proxy.post("move/", {"move": "{}"}, idempotent=False) is None
+    assert len(proxy.errors) == 1 and isinstance(proxy.errors[0], requests.RequestException)
@@ -0,0 +1,127 @@
+import json
+import random
+from collections import deque
+
+import pytest
+
+from engine.disjoint_set import DisjointSet
+from engine.enums import Cell, GameState
+from engine.game import Game
+from engine.zobrist import zobrist_hash
+
+
+def reference_path(board: list[list[Cell]], cell: Cell) -> list[tuple[int, int]] | None:
+    '''Breadth first search over the grid, as the rules did before the bitboards: player 1 connects the first and
+    last columns, player 2 the first and last rows.'''
+    size = len(board)
+    at = (lambda i, j: (i, j)) if cell == Cell.P1 else (lambda i, j: (j, i))
+    queue = deque(at(k, 0) for k in range(size) if board[at(k, 0)[0]][at(k, 0)[1]] == cell)
+    parents = dict.fromkeys(queue)
+    while queue:
+        i, j = queue.popleft()
+        if (j if cell == Cell.P1 else i) == size-1:
+            path = [(i, j)]
+            while parents[path[-1]] is not None: path.append(parents[path[-1]])
+            return path
+        for di, dj in ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0)):
+            neighbor = i+di, j+dj
+            if 0 <= neighbor[0] < size and 0 <= neighbor[1] < size and neighbor not in parents \
+                    and board[neighbor[0]][neighbor[1]] == cell:
+                parents[neighbor] = (i, j)
+                queue.append(neighbor)
+    return None
+
+
+def assert_valid_path(game: Game, path: list[tuple[int, int]], cell: Cell):
+    size = game.size
+    assert all(game.board[i][j] == cell for i, j in path)
+    assert all(b in game.cell_neighbors(*a) for a, b in zip(path, path[1:]))
+    edge = (lambda i, j: j) if cell == Cell.P1 else (lambda i, j: i)
+    assert edge(*path[0]) == size-1 and edge(*path[-1]) == 0
+
+
+def random_game(new_game, size: int, rng: random.Random, moves: int | None = None) -> Game:
+    game = new_game(size)
+    while game.game_state == GameState.RUNNING and moves != len(game.moves):
+        game.apply_move(*rng.choice(game.legal_moves()))
+    return game
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 11])
+def test_winner_matches_breadth_first_search(new_game, size):
+    rng = random.Random(size)
+    for _ in range(30):
+        game = new_game(size)
+        while game.game_state == GameState.RUNNING:
+            cell = game.current_cell
+            game.apply_move(*rng.choice(game.legal_moves()))
+            reference = reference_path(game.board, cell)
+            assert (game.game_state == GameState.ENDED) == (reference is not None)
+            assert reference_path(game.board, Cell.P2 if cell == Cell.P1 else Cell.P1) is None
+            assert game.hash == zobrist_hash(size, (game.bitboard.stones(Cell.P1), game.bitboard.stones(Cell.P2)))
+        # Both searches find a shortest chain, maybe another one of the same length
+        assert len(game.winning_path) == len(reference)
+        assert_valid_path(game, game.winning_path, cell)
+        assert game.winner is (game.player1 if cell == Cell.P1 else game.player2)
+
+
+def test_hash_does_not_depend_on_move_order(new_game):
+    first, second = new_game(5), new_game(5)
+    for cell in (0, 7, 12, 3): first.apply_move(*divmod(cell, 5))
+    for cell in (12, 3, 0, 7): second.apply_move(*divmod(cell, 5))
+    assert first.hash == second.hash and first.state_hash == second.state_hash
+    second.apply_move(4, 4)
+    assert first.hash != second.hash
+
+
+def test_clone_is_independent(new_game):
+    rng = random.Random(1)
+    game = random_game(new_game, 7, rng, moves=10)
+    clone = game.clone()
+    assert clone.hash == game.hash and clone.moves == game.moves
+    position = game.hash, list(game.moves), game.bitboard.stones(Cell.P1)
+    while clone.game_state == GameState.RUNNING: clone.apply_move(*rng.choice(clone.legal_moves()))
+    assert (game.hash, game.moves, game.bitboard.stones(Cell.P1)) == position
+    assert game.game_state == GameState.RUNNING
+
+
+@pytest.mark.parametrize("moves", [0, 6, None])
+def test_serialize_round_trip(new_game, moves):
+    rng = random.Random(moves)
+    game = random_game(new_game, 6, rng, moves)
+    game.local_player = game.player2
+    copy = Game.deserialize(json.loads(json.dumps(game.serialize())))
+    assert copy.hash == game.hash and copy.game_state == game.game_state
+    assert copy.current_cell == game.current_cell and copy.local_player is copy.player2
+    assert (copy.winner is None) == (game.winner is None)
+    if game.winning_path: assert len(copy.winning_path) == len(game.winning_path)
+    # The connections are rebuilt, so the copy finds the same winner as the game from then on
+    while game.game_state == GameState.RUNNING:
+        move = rng.choice(game.legal_moves())
+        game.apply_move(*move)
+        copy.apply_move(*move)
+        assert copy.hash == game.hash and copy.game_state == game.game_state
+
+
+def test_snapshot_round_trip(new_game):
+    rng = random.Random(2)
+    for moves in (1, 9, 20):
+        game = random_game(new_game, 6, rng, moves)
+        copy = new_game(6)
+        copy.restore(game.snapshot(), game.ply)
+        assert copy.hash == game.hash and copy.current_cell == game.current_cell
+        while game.game_state == GameState.RUNNING:
+            move = rng.choice(game.legal_moves())
+            game.apply_move(*move)
+            copy.apply_move(*move)
+            assert copy.hash == game.hash and copy.game_state == game.game_state
+
+
+def test_disjoint_set():
+    sets = DisjointSet(6)
+    sets.union(0, 1)
+    sets.union(2, 3)
+    copy = sets.copy()
+    sets.union(1, 3)
+    assert sets.connected(0, 2) and not sets.connected(0, 4)
+    assert not copy.connected(0, 2) and copy.connected(2, 3)
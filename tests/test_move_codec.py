@@ -0,0 +1,98 @@
+import pytest
+
+from dog.move_codec import MAX_MOVE_SIZE, MoveDecodeError, decode_match_response, decode_move, encode_move
+from engine.enums import GameState
+from engine.snapshot import SnapshotError, decode_snapshot, encode_snapshot
+
+
+def test_move_round_trip(new_game):
+    sender, receiver = new_game(5), new_game(5)
+    sender.local_player = sender.player1
+    move = sender.make_move(1, 2)
+    assert move["cell"] == 7 and move["ply"] == 1 and move["hash"] == sender.state_hash
+    assert decode_move(encode_move(move)) == move
+    # The server may send it back as a Python literal
+    assert decode_move(repr(move)) == move
+    assert decode_move({**move, "cell": [1, 2]})["cell"] == [1, 2]
+
+    assert receiver.receive_move(decode_move(encode_move(move))) is False
+    assert receiver.state_hash == sender.state_hash and receiver.current_player_turn is receiver.player2
+
+
+@pytest.mark.parametrize("move_string", [
+    "__import__('os').getcwd()",
+    "[1, 2]",
+    '{"cell": 7}',
+    '{"match_status": "next", "cell": {"nested": 1}}',
+    '{"match_status": "next", "cell": "' + "x"*MAX_MOVE_SIZE + '"}',
+    None,
+])
+def test_invalid_moves_are_rejected(move_string):
+    with pytest.raises(MoveDecodeError): decode_move(move_string)
+
+
+def test_match_response():
+    assert decode_match_response('{"0": "1", "1": "{}"}') == {"0": "1", "1": "{}"}
+    for response in ("[]", "{", "x"*(20*1024)):
+        with pytest.raises(MoveDecodeError): decode_match_response(response)
+
+
+def test_snapshot_round_trip(new_game):
+    for size in (3, 11, 17):
+        stones = (1 << 0 | 1 << size*size - 1, 1 << size)
+        assert decode_snapshot(size, encode_snapshot(size, stones, 2)) == (stones, 2)
+
+    game = new_game(5)
+    for cell in (12, 6, 7): game.apply_move(*divmod(cell, 5))
+    copy = new_game(5)
+    copy.restore(game.snapshot(), 3)
+    assert copy.state_hash == game.state_hash and copy.current_player_turn is copy.player2
+    assert copy.ply == 3 and copy.moves == []
+
+
+def test_ended_game_snapshot(new_game):
+    game = new_game(3)
+    for cell in (0, 3, 1, 4, 2): game.apply_move(*divmod(cell, 3))
+    copy = new_game(3)
+    copy.restore(game.snapshot())
+    assert copy.game_state == GameState.ENDED and copy.winner is copy.player1
+    assert copy.winning_path == game.winning_path
+
+
+@pytest.mark.parametrize("snapshot", ["", "3AAAA", "1!!!!", "1" + encode_snapshot(5, (0, 0), 1)[1:-4]])
+def test_invalid_snapshots_are_rejected(snapshot):
+    with pytest.raises(SnapshotError): decode_snapshot(5, snapshot)
+
+
+def test_snapshot_with_overlapping_stones_is_rejected(new_game):
+    with pytest.raises(SnapshotError): decode_snapshot(3, encode_snapshot(3, (1, 1), 1))
+    with pytest.raises(SnapshotError): new_game(3).restore(encode_snapshot(3, (1, 2), 1), 3)
+
+
+def test_legacy_moves(new_game):
+    game = new_game(3)
+    assert game.receive_move(decode_move('{"match_status": "next", "marked_cell": [1, 2]}')) is False
+    assert game.moves == [5] and game.current_player_turn is game.player2
+    assert game.receive_move(decode_move('{"match_status": "finished", "winning_path": [[0, 0], [1, 0], [2, 0]]}')) is False
+    assert game.game_state == GameState.ENDED and game.winner is game.player2
+    assert game.winning_path == [(0, 0), (1, 0), (2, 0)]
+
+
+@pytest.mark.parametrize("move_string", [
+    '{"match_status": "next"}',
+    '{"match_status": "next", "marked_cell": [1]}',
+    '{"match_status": "next", "marked_cell": [3, 0]}',
+    '{"match_status": "next", "marked_cell": [-1, 0]}',
+    '{"match_status": "next", "marked_cell": ["1", 0]}',
+    '{"match_status": "next", "marked_cell": [0, 0]}',
+    '{"match_status": "finished"}',
+    '{"match_status": "finished", "winning_path": []}',
+    '{"match_status": "finished", "winning_path": [[0, 0], [0, 5]]}',
+])
+def test_malformed_legacy_moves_are_ignored(new_game, move_string):
+    game = new_game(3)
+    game.apply_move(0, 0)
+    position = game.state_hash
+    assert game.receive_move(decode_move(move_string)) is False
+    assert game.state_hash == position and game.moves == [0]
+    assert game.game_state == GameState.RUNNING and game.current_player_turn is game.player2
@@ -0,0 +1,56 @@
+import json
+from types import SimpleNamespace
+
+from dog.dog_proxy import DogProxy
+from dog.move_codec import encode_move
+
+
+def test_stale_snapshot_does_not_roll_back(new_game):
+    sender, receiver = new_game(5), new_game(5)
+    sender.local_player, receiver.local_player = sender.player1, receiver.player2
+    first = sender.make_move(2, 2)
+    assert receiver.receive_move(first) is False
+    reply = receiver.make_move(1, 1)
+    position = receiver.state_hash
+
+    # The first move delivered again: its snapshot holds fewer stones and is ignored
+    assert receiver.receive_move(first) is False
+    assert receiver.state_hash == position and receiver.ply == 2
+    assert receiver.current_player_turn is receiver.player1
+
+    assert sender.receive_move(reply) is False
+    assert sender.state_hash == position
+
+
+def test_lost_moves_are_restored(new_game):
+    sender, receiver = new_game(5), new_game(5)
+    sender.local_player = sender.player1
+    sender.apply_move(2, 2)
+    sender.apply_move(1, 1)
+    # The receiver missed the first two moves and catches up from the snapshot of the third
+    assert receiver.receive_move(sender.make_move(3, 3)) is True
+    assert receiver.state_hash == sender.state_hash and receiver.ply == 3
+    assert receiver.current_player_turn is receiver.player2
+
+
+def test_unsent_move_is_not_sent_over_the_answer(monkeypatch):
+    monkeypatch.delenv("DOG_METRICS_PORT", raising=False)
+    received = []
+    proxy = DogProxy(url="http://127.0.0.1:1/", game_id="1")
+    proxy.player_id, proxy.status = "1", 3
+    proxy.dog_actor = SimpleNamespace(receive_move=received.append)
+    unsent = {"match_status": "next", "cell": 12, "ply": 1}
+
+    def poll(move, order):
+        response = {"0": "1", "1": encode_move({**move, "player": move.get("player", "1"), "order": str(order)})}
+        proxy.read_match_status(SimpleNamespace(text=json.dumps(response), status_code=200))
+
+    # The server still holds an older move: the unsent one must be sent again
+    proxy.unsent_move = unsent
+    poll({"match_status": "next", "cell": 3, "ply": 0}, 1)
+    assert proxy.unsent_move is unsent
+
+    # The request failed after the server stored the move, and the opponent already answered it
+    poll({"match_status": "next", "cell": 6, "ply": 2, "player": "2"}, 2)
+    assert proxy.unsent_move is None
+    assert [move["cell"] for move in received] == [6]
@@ -0,0 +1,68 @@
+import os
+
+import engine.solver as solver_module
+from engine.solver import HEADER_SIZE, Solver
+
+
+def play(game, *cells):
+    for cell in cells: game.apply_move(*divmod(cell, game.size))
+    return game
+
+
+def test_table_round_trip(new_game, tmp_path):
+    path = str(tmp_path / "solved-3.bin")
+    solver = Solver(3, path)
+    game = new_game(3)
+    moves = solver.winning_moves(game)
+    assert (1, 1) in moves
+    solver.save()
+    solved = solver.solved
+    solver.close()
+
+    reloaded = Solver(3, path, node_limit=0)
+    assert reloaded.solved == solved
+    # Every answer comes from the file, a single searched node would exceed the limit
+    assert reloaded.wins(play(game, 4)) is False
+
+
+def test_appended_records_and_compaction(new_game, tmp_path):
+    path = str(tmp_path / "solved-3.bin")
+    solver = Solver(3, path)
+    solver.winning_moves(new_game(3))
+    solver.save()
+    sorted_size = os.path.getsize(path)
+    records = solver.solved
+    solver.close()
+
+    # A position far from the first one adds a few records after the sorted ones
+    solver = Solver(3, path)
+    answer = solver.wins(play(new_game(3), 0, 8))
+    solver.save()
+    assert os.path.getsize(path) > sorted_size
+    with open(path, "rb") as file: assert int.from_bytes(file.read(HEADER_SIZE)[8:], "big") == records
+    appended = solver.solved
+    solver.close()
+
+    # A save cut short leaves a partial record at the end, ignored on load
+    with open(path, "ab") as file: file.write(b"\x01")
+    reloaded = Solver(3, path, node_limit=0)
+    assert reloaded.solved == appended
+    assert reloaded.wins(play(new_game(3), 0, 8)) == answer
+    reloaded.close()
+
+
+def test_compaction_merges_every_record(new_game, tmp_path, monkeypatch):
+    # Every save merges the new records into the sorted ones
+    monkeypatch.setattr(solver_module, "COMPACT_FRACTION", 0)
+    path = str(tmp_path / "solved-3.bin")
+    for cells in ((0,), (8,), (2, 6), (4,)):
+        solver = Solver(3, path)
+        solver.wins(play(new_game(3), *cells))
+        solver.save()
+        solver.close()
+    solved = Solver(3, path).solved
+    with open(path, "rb") as file: data = file.read()
+    assert int.from_bytes(data[8:HEADER_SIZE], "big") == solved
+    record = (len(data) - HEADER_SIZE) // solved
+    keys = [data[offset:offset + record - 1] for offset in range(HEADER_SIZE, len(data), record)]
+    assert keys == sorted(set(keys))
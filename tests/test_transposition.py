@@ -0,0 +1,61 @@
+from engine.transposition import TableStats, TranspositionTable
+
+
+def test_capacity_is_a_power_of_two():
+    assert TranspositionTable(1000).capacity == 1024
+    assert TranspositionTable(1).capacity == 1
+
+
+def test_deeper_entry_of_the_current_search_is_kept():
+    table = TranspositionTable(16)
+    # 5 and 21 share a slot
+    assert table.store(5, "deep", depth=3)
+    assert not table.store(21, "shallow", depth=1)
+    assert table.get(5) == "deep" and table.get(21) is None
+    # The same position searched no deeper doesn't replace it either, but as deep does
+    assert not table.store(5, "again", depth=2)
+    assert table.store(5, "as deep", depth=3)
+    assert table.get(5) == "as deep"
+    assert table.store(21, "deeper", depth=4)
+    assert table.get(21) == "deeper" and table.get(5) is None
+
+
+def test_entry_of_an_older_search_is_replaced():
+    table = TranspositionTable(16)
+    table.store(5, "old", depth=6)
+    table.new_search()
+    # Still found until replaced
+    assert table.get(5) == "old"
+    assert table.store(21, "new", depth=0)
+    assert table.get(21) == "new" and table.get(5) is None
+    # The same position too, however deep it was searched
+    table.store(21, "deep", depth=6)
+    table.new_search()
+    assert table.store(21, "shallower", depth=0)
+    assert table.get(21) == "shallower"
+
+
+def test_depth_of_the_lookup():
+    table = TranspositionTable(16)
+    table.store(7, "value", depth=2)
+    assert table.get(7, depth=2) == "value"
+    assert table.get(7, depth=3) is None
+
+
+def test_counters():
+    table = TranspositionTable(16)
+    table.store(1, "a", depth=2)
+    table.store(2, "b")
+    table.store(17, "c", depth=1)    # rejected, 1 holds a deeper entry
+    table.store(18, "d")             # replaces 2
+    table.get(1)
+    table.get(18)
+    table.get(2)
+    table.get(3)
+    assert table.stats == TableStats(hits=2, misses=2, stores=3, replacements=1, rejections=1, used=2, capacity=16)
+    assert table.stats.hit_rate == 0.5 and len(table) == 2
+
+    table.reset_stats()
+    assert table.stats == TableStats(0, 0, 0, 0, 0, 2, 16)
+    table.clear()
+    assert len(table) == 0 and table.get(1) is None
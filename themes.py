@@ -18,6 +18,8 @@ class Theme:
     HEXAGON_BORDER_COLOR: color = "black"
     HEXAGON_BORDER_WIDTH: int = 4
     COLOR_BRIGHTNESS: tuple[float, float] = (1.0, 0.9)
+    HINT_COLOR: color = "gold"
+    OVERLAY_COLOR: color = "dimgray"
 
     TITLE_FONT: str = ""
     TEXT_FONT: str = ""
@@ -29,6 +31,11 @@ class Theme:
     CANVAS_SIZE_Y: int = 0
     HEX_SIDE_SIZE: int = CANVAS_SIZE_X // (3*GAME_SIZE-1)
     HEX_SIDE_SIZE_ROOT_3: int = int(HEX_SIDE_SIZE*3**(1/2))
+    ## Viewport: zoom step of the wheel and keys, largest hexagon side when zoomed in, and the side below which the
+    ## board is drawn as an image instead of a polygon per cell
+    ZOOM_STEP: float = 1.25
+    MAX_HEX_SIDE_SIZE: int = 60
+    LOD_HEX_SIDE_SIZE: int = 10
 
     def __post_init__(self):
         self.DEFAULT_BUTTON = {"bg": self.BACKGROUND_COLOR, "fg": self.TEXT_COLOR, "font": (self.TEXT_FONT, 12)}